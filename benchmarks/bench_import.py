@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark du temps d'import des modules src et des scripts (python -X importtime)
+
+Chaque cible est importée dans un interpréteur neuf; le temps retenu est
+la somme des imports de premier niveau, moins celle d'un interpréteur
+vide, médiane de --repeat exécutions. Chaque cible a un budget en
+millisecondes et une liste de dépendances lourdes qu'elle ne doit pas
+charger (ex: importer src ne doit charger ni pandas ni Selenium). Sort en
+erreur si un budget est dépassé ou si une dépendance interdite est
+importée.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --target src.models --repeat 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# (cible, budget en ms, dépendances interdites); les budgets laissent de la
+# marge pour une machine lente, les dépendances interdites sont le vrai garde-fou
+TARGETS = [
+    ("src", 50, ["pandas", "numpy", "sklearn", "selenium", "gspread", "dotenv"]),
+    ("src.metrics", 100, ["pandas", "numpy", "sklearn", "selenium", "gspread"]),
+    ("src.preprocessor", 1200, ["sklearn", "scipy", "joblib", "selenium", "gspread"]),
+    ("src.models", 1200, ["sklearn", "scipy", "joblib", "selenium", "gspread"]),
+    ("src.sheets_handler", 1200, ["gspread", "gspread_dataframe", "google", "sklearn", "selenium"]),
+    ("src.scraper", 1500, ["selenium.webdriver", "sklearn", "gspread"]),
+    ("scripts/predict.py", 1500, ["selenium", "gspread", "sklearn", "scipy", "bs4"]),
+    ("scripts/scrape.py", 1800, ["selenium.webdriver", "sklearn", "scipy", "joblib", "gspread"]),
+]
+
+
+def import_code(target):
+    """Code qui importe la cible: module, ou script exécuté sans son bloc __main__"""
+    if target.endswith(".py"):
+        return f"import runpy; runpy.run_path({str(ROOT / target)!r}, run_name='bench_import')"
+    return f"import {target}"
+
+
+def importtime(code):
+    """Temps cumulé des imports de premier niveau (µs) et modules importés"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT), LOG_LEVEL="WARNING")
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stderr
+    total, modules = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # ligne d'en-tête
+        modules.add(name.strip())
+        # Un seul espace avant le nom: import de premier niveau (les autres y sont inclus)
+        if name.startswith(" ") and not name.startswith("  "):
+            total += int(cumulative)
+    return total, modules
+
+
+def forbidden_imports(modules, forbidden):
+    return sorted(
+        name for name in forbidden
+        if any(module == name or module.startswith(name + ".") for module in modules)
+    )
+
+
+def measure(target, budget_ms, forbidden, repeat, baseline_us):
+    runs, modules = [], set()
+    for _ in range(repeat):
+        total, modules = importtime(import_code(target))
+        runs.append(max(total - baseline_us, 0))
+    ms = round(statistics.median(runs) / 1000, 1)
+    loaded = forbidden_imports(modules, forbidden)
+    return {
+        "target": target, "ms": ms, "budget_ms": budget_ms,
+        "forbidden_loaded": loaded, "ok": ms <= budget_ms and not loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", nargs="+", help="cibles à mesurer (défaut: toutes)")
+    parser.add_argument("--repeat", type=int, default=5, help="exécutions par cible (médiane)")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    targets = [t for t in TARGETS if not args.target or t[0] in args.target]
+    unknown = set(args.target or []) - {t[0] for t in targets}
+    if unknown:
+        parser.error(f"cibles inconnues: {', '.join(sorted(unknown))}")
+
+    # Coût d'un interpréteur vide (site, encodings...), retiré de chaque mesure
+    baseline_us = statistics.median(importtime("pass")[0] for _ in range(args.repeat))
+    results = [measure(*target, args.repeat, baseline_us) for target in targets]
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'cible':<22}{'import (ms)':>12}{'budget':>9}  dépendances interdites chargées")
+        for r in results:
+            status = "" if r["ok"] else "  <- ÉCHEC"
+            print(f"{r['target']:<22}{r['ms']:>12}{r['budget_ms']:>9}  "
+                  f"{', '.join(r['forbidden_loaded']) or '-'}{status}")
+
+    if not all(r["ok"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark mémoire: preprocess -> encode_and_scale avec et sans copies
+
+Chaque mode tourne dans un processus séparé pour mesurer son pic de RSS.
+
+    python benchmarks/bench_memory.py --rows 100000
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+MODES = ["copy", "no-copy", "no-copy-float32", "sparse"]
+
+
+def peak_rss_mb():
+    """Pic de RSS du processus courant en Mo (ru_maxrss est en Ko sous Linux)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+def run_mode(mode, n_rows):
+    """Exécute un mode et retourne ses mesures"""
+    from benchmarks.synthetic import generate_ads
+    from src.preprocessor import DataPreprocessor
+
+    preprocessor = DataPreprocessor()
+    sample = preprocessor.preprocess(generate_ads(2000, seed=1), fit=True)
+    preprocessor.encode_and_scale(sample, fit=True)
+
+    df = generate_ads(n_rows)
+    rss_before = peak_rss_mb()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "copy":
+        df_clean = preprocessor.preprocess(df)
+        features, _ = preprocessor.encode_and_scale(df_clean)
+    elif mode == "sparse":
+        df_clean = preprocessor.preprocess(df, copy=False)
+        features, _ = preprocessor.encode_and_scale(df_clean, sparse=True)
+    else:
+        dtype = np.float32 if mode == "no-copy-float32" else np.float64
+        df_clean = preprocessor.preprocess(df, copy=False)
+        features, _ = preprocessor.encode_and_scale(df_clean, copy=False, dtype=dtype)
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": mode,
+        "rows": n_rows,
+        "seconds": round(elapsed, 3),
+        "traced_peak_mb": round(traced_peak / 1024 ** 2, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_rss_increase_mb": round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--mode", choices=MODES, help="exécute un seul mode (processus enfant)")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.rows)))
+        return
+
+    results = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--rows", str(args.rows)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<18}{'temps (s)':>12}{'pic alloc (Mo)':>16}{'pic RSS (Mo)':>14}{'+RSS (Mo)':>12}")
+    for r in results:
+        print(f"{r['mode']:<18}{r['seconds']:>12}{r['traced_peak_mb']:>16}"
+              f"{r['peak_rss_mb']:>14}{r['peak_rss_increase_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark du scraping parallèle sur un site d'annonces local (benchmarks/fixture_site.py)
+
+Lance PropertyScraper.stream_parallel (driver HttpDriver: pages
+téléchargées depuis le serveur local, extraction identique à Selenium) et
+HttpPropertyScraper avec plusieurs nombres de workers. Vérifie que chaque
+run produit toutes les annonces du site une seule fois, et les mêmes
+données quel que soit le nombre de workers; sort en erreur sinon.
+
+    python benchmarks/bench_parallel.py --pages 8 --per-page 10 --workers 1 2 4
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_driver import HttpDriver
+from benchmarks.fixture_site import FixtureSite
+from src.http_scraper import HttpPropertyScraper
+from src.scraper import PropertyScraper
+
+
+class FixtureScraper(PropertyScraper):
+    """PropertyScraper dont chaque worker télécharge les pages au lieu d'ouvrir Chrome"""
+
+    def setup_driver(self):
+        self.driver = HttpDriver()
+
+
+def make_scraper(engine, site, workers, delay):
+    if engine == "http":
+        return HttpPropertyScraper(base_url=site.base_url, workers=workers, delay=delay,
+                                   jitter=0, js_fallback=False,
+                                   page_url_template=site.page_url_template)
+    # Attentes courtes: la page vide après la dernière est attendue ready_timeout
+    return FixtureScraper(base_url=site.base_url, workers=workers, delay=delay, jitter=0,
+                          page_url_template=site.page_url_template,
+                          wait_timeout=0.05, ready_timeout=0.5)
+
+
+def run(engine, site, workers, delay):
+    site.hits.clear()
+    scraper = make_scraper(engine, site, workers, delay)
+    start = time.perf_counter()
+    ads = list(scraper.stream_parallel() if engine == "selenium" else scraper.stream())
+    elapsed = time.perf_counter() - start
+    urls = [ad.get("url") for ad in ads]
+    expected = site.ad_urls()
+    return {
+        "engine": engine, "workers": workers, "seconds": round(elapsed, 3),
+        "ads": len(ads), "expected": len(expected), "duplicates": len(urls) - len(set(urls)),
+        "missing": len(expected - set(urls)), "requests": sum(site.hits.values()),
+        "ok": set(urls) == expected and len(urls) == len(set(urls)),
+        "records": sorted(json.dumps(ad, sort_keys=True, default=str) for ad in ads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=6)
+    parser.add_argument("--per-page", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--latency", type=float, default=0.02, help="latence du serveur (s)")
+    parser.add_argument("--delay", type=float, default=0.0, help="intervalle entre deux pages d'un worker (s)")
+    parser.add_argument("--engine", nargs="+", choices=["selenium", "http"], default=["selenium", "http"])
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    results = []
+    with FixtureSite(pages=args.pages, per_page=args.per_page, latency=args.latency) as site:
+        for engine in args.engine:
+            for workers in args.workers:
+                results.append(run(engine, site, workers, args.delay))
+
+    # Mêmes annonces, mêmes données, quel que soit le nombre de workers
+    for engine in args.engine:
+        runs = [r for r in results if r["engine"] == engine]
+        for r in runs:
+            r["same_output"] = r["records"] == runs[0]["records"]
+            r["ok"] = r["ok"] and r["same_output"]
+    for r in results:
+        del r["records"]
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'moteur':<10}{'workers':>8}{'temps (s)':>11}{'annonces':>10}{'attendues':>11}"
+              f"{'doublons':>10}{'requêtes':>10}")
+        for r in results:
+            status = "" if r["ok"] else "  <- ÉCHEC"
+            print(f"{r['engine']:<10}{r['workers']:>8}{r['seconds']:>11}{r['ads']:>10}"
+                  f"{r['expected']:>11}{r['duplicates']:>10}{r['requests']:>10}{status}")
+
+    if not all(r["ok"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
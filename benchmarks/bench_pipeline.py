@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de bout en bout: annonces synthétiques -> prédictions -> Google Sheets
+
+Mesure le temps et le pic d'allocation (tracemalloc) de chaque étape
+(génération, prétraitement, encodage, chargement et prédiction des
+modèles, sortie, écriture et lecture Sheets sur le faux backend) à
+plusieurs tailles. Temps et mémoire sont mesurés dans deux processus
+séparés: tracemalloc ralentit fortement le code Python. Les modèles sont de
+petits modèles de test entraînés au lancement (benchmarks/fixtures.py).
+
+Résultats en JSON (--output); --baseline compare à une référence
+enregistrée et sort en erreur si une étape régresse au-delà de la
+tolérance. La référence dépend de la machine et des versions des dépendances: la
+régénérer avec --save-baseline, sur la machine qui fait la vérification
+et avec les versions de requirements.txt. Un avertissement signale une
+référence produite avec d'autres versions.
+
+    python benchmarks/bench_pipeline.py --sizes 1000 10000 --baseline
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+# Dépendances dont la version est enregistrée avec les résultats
+PACKAGES = ["numpy", "pandas", "sklearn", "scipy", "pyarrow", "gspread"]
+
+
+def peak_rss_mb():
+    """Pic de RSS du processus courant en Mo (ru_maxrss est en Ko sous Linux)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+class StageTimer:
+    """Temps ("time") ou pic d'allocation ("memory") de chaque étape"""
+
+    def __init__(self, measure):
+        self.measure = measure
+        self.stages = {}
+        if measure == "memory":
+            tracemalloc.start()
+
+    def run(self, name, func, *args, **kwargs):
+        if self.measure == "time":
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            self.stages[name] = round(time.perf_counter() - start, 4)
+            return result
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        self.stages[name] = round((peak - before) / 1024 ** 2, 2)
+        return result
+
+    def close(self):
+        if self.measure == "memory":
+            tracemalloc.stop()
+
+
+def run_size(n_rows, model_dir, sheets_max_rows, measure):
+    """Exécute toutes les étapes pour n_rows annonces; retourne {étape: mesure}"""
+    from benchmarks.fake_sheets import FakeClient
+    # Modules scikit-learn importés d'avance: load_models ne mesure que le chargement
+    for module in ("sklearn.linear_model", "sklearn.ensemble", "sklearn.svm"):
+        importlib.import_module(module)
+    from benchmarks.synthetic import generate_ads
+    from configs.config import (
+        ENCODER_FILE, SCALER_FILE, FEATURES_COLUMNS_FILE, BOOL_COLUMNS_FILE,
+        NUMERIC_FILL_FILE
+    )
+    from src.models import PricePredictor
+    from src.preprocessor import DataPreprocessor
+    from src.sheets_handler import SheetsHandler, prepare_output
+
+    model_dir = Path(model_dir)
+    timer = StageTimer(measure)
+
+    df = timer.run("generate", generate_ads, n_rows)
+    raw = df.copy() if n_rows <= sheets_max_rows else None
+
+    preprocessor = DataPreprocessor()
+    preprocessor.load_transformers(
+        model_dir / ENCODER_FILE, model_dir / SCALER_FILE,
+        model_dir / FEATURES_COLUMNS_FILE, model_dir / BOOL_COLUMNS_FILE,
+        model_dir / NUMERIC_FILL_FILE
+    )
+    df_clean = timer.run("preprocess", preprocessor.preprocess, df, copy=False)
+    features, prix_reel = timer.run("encode_and_scale", preprocessor.encode_and_scale, df_clean)
+
+    predictor = timer.run("load_models", PricePredictor, model_dir=model_dir, lazy=False)
+    predictions = timer.run("predict", predictor.predict, features)
+    output_df = timer.run("prepare_output", prepare_output, df_clean, predictions, prix_reel)
+
+    # Au-delà de sheets_max_rows, l'onglet dépasserait la limite de cellules de Google Sheets
+    if raw is not None:
+        gc = FakeClient()
+        handler = SheetsHandler(gc=gc, cache_dir=None)
+        timer.run("sheets_write", handler.write_incremental, output_df, "Predictions")
+        handler.write_incremental(raw, "Feuille 1")
+        timer.run("sheets_read", lambda: sum(len(chunk) for chunk in handler.iter_input("Feuille 1")))
+
+    timer.close()
+    return {"stages": timer.stages, "peak_rss_mb": round(peak_rss_mb(), 1)}
+
+
+def run_child(n_rows, model_dir, sheets_max_rows, measure):
+    output = subprocess.run(
+        [sys.executable, __file__, "--size", str(n_rows), "--model-dir", model_dir,
+         "--sheets-max-rows", str(sheets_max_rows), "--measure", measure],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_size(n_rows, model_dir, sheets_max_rows, repeat=3):
+    """Temps (meilleur de repeat exécutions) et mémoire de chaque étape pour n_rows annonces"""
+    timings = [run_child(n_rows, model_dir, sheets_max_rows, "time") for _ in range(repeat)]
+    memory = run_child(n_rows, model_dir, sheets_max_rows, "memory")
+    return {
+        "rows": n_rows,
+        # Pic RSS des processus non instrumentés
+        "peak_rss_mb": min(timing["peak_rss_mb"] for timing in timings),
+        "stages": [
+            {"stage": name, "seconds": min(timing["stages"][name] for timing in timings),
+             "peak_mb": memory["stages"][name]}
+            for name in timings[0]["stages"]
+        ],
+    }
+
+
+def compare(results, baseline, tolerance, min_seconds=0.05, min_mb=1.0):
+    """Étapes plus lentes ou plus gourmandes que la référence au-delà de la tolérance
+
+    Les écarts absolus inférieurs à min_seconds / min_mb sont ignorés
+    (bruit de mesure sur les petites étapes).
+    """
+    reference = {
+        (size["rows"], stage["stage"]): stage
+        for size in baseline["results"] for stage in size["stages"]
+    }
+    regressions = []
+    for size in results:
+        for stage in size["stages"]:
+            base = reference.get((size["rows"], stage["stage"]))
+            if base is None:
+                continue
+            for metric, slack in (("seconds", min_seconds), ("peak_mb", min_mb)):
+                current, previous = stage[metric], base[metric]
+                if current > previous * (1 + tolerance) and current - previous > slack:
+                    regressions.append({
+                        "rows": size["rows"], "stage": stage["stage"], "metric": metric,
+                        "baseline": previous, "current": current,
+                        "ratio": round(current / previous, 2) if previous else None,
+                    })
+    return regressions
+
+
+def print_table(results):
+    print(f"{'lignes':>9}  {'étape':<18}{'temps (s)':>12}{'pic alloc (Mo)':>16}")
+    for size in results:
+        for stage in size["stages"]:
+            print(f"{size['rows']:>9}  {stage['stage']:<18}{stage['seconds']:>12}{stage['peak_mb']:>16}")
+        print(f"{size['rows']:>9}  {'(pic RSS)':<18}{'':>12}{size['peak_rss_mb']:>16}")
+
+
+def environment():
+    """Python, plateforme et versions des dépendances de PACKAGES"""
+    env = {"python": platform.python_version(), "platform": platform.platform()}
+    for package in PACKAGES:
+        env[package] = importlib.import_module(package).__version__
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--sheets-max-rows", type=int, default=100_000,
+                        help="taille maximale pour les étapes Google Sheets")
+    parser.add_argument("--repeat", type=int, default=3, help="exécutions chronométrées par taille")
+    parser.add_argument("--model-dir", help="modèles de test existants (sinon entraînés au lancement)")
+    parser.add_argument("--output", help="fichier de résultats JSON")
+    parser.add_argument("--baseline", nargs="?", const=str(BASELINE_PATH),
+                        help="référence JSON (défaut: benchmarks/baseline.json): erreur si une étape régresse")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="régression tolérée (0.5: jusqu'à +50%% par rapport à la référence)")
+    parser.add_argument("--save-baseline", nargs="?", const=str(BASELINE_PATH),
+                        help="enregistre les résultats comme nouvelle référence")
+    # Processus enfant: une taille, une mesure
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--measure", choices=["time", "memory"], help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    if args.size:
+        print(json.dumps(run_size(args.size, args.model_dir, args.sheets_max_rows, args.measure)))
+        return
+
+    # Hérité par les processus enfants
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_dir = args.model_dir
+        if model_dir is None:
+            from benchmarks.fixtures import build_fixture_models
+            model_dir = str(build_fixture_models(tmp_dir))
+
+        results = [measure_size(n_rows, model_dir, args.sheets_max_rows, args.repeat) for n_rows in args.sizes]
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        previous_env = baseline.get("environment", {})
+        mismatched = [
+            f"{package} {previous_env.get(package)} -> {report['environment'][package]}"
+            for package in PACKAGES if previous_env.get(package) != report["environment"][package]
+        ]
+        if mismatched:
+            print(f"Attention: référence produite avec d'autres versions ({', '.join(mismatched)})",
+                  file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        report["regressions"] = regressions
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_table(results)
+        for r in regressions:
+            print(f"RÉGRESSION {r['rows']} lignes, {r['stage']} ({r['metric']}): "
+                  f"{r['baseline']} -> {r['current']} (x{r['ratio']})")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark d'extraction Selenium: allers-retours navigateur et timeouts par annonce
+
+Compare les modes d'extraction de PropertyScraper ("dom", "source") sur
+des pages d'annonces statiques, avec un driver en mémoire qui compte les
+allers-retours. Les timeouts sont comptés puis projetés avec le délai
+réel (SCRAPER_WAIT_TIMEOUT) pour ne pas attendre pendant le benchmark
+(WebDriverWait interroge toutes les POLL_FREQUENCY = 0,1 s: le mode "dom"
+reste lent).
+
+    python benchmarks/bench_scraper.py --ads 5
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from configs.config import EXTRAS_LIST, SCRAPER_WAIT_TIMEOUT
+
+MODES = ["dom", "source"]
+
+
+def make_ad_page(i):
+    """Page d'annonce réaliste: certains champs absents, quelques extras"""
+    extras = "".join(f"<li>{extra}</li>" for extra in EXTRAS_LIST[i % 5::5])
+    rooms = f'<span class="rooms">{2 + i % 4} pièces</span>' if i % 2 else ""
+    return f"""<html><body>
+        <h1 class="ad-title">Appartement {i}</h1>
+        <div class="listing-price">{(i + 5) * 100} 000 DH</div>
+        <div class="area">{60 + i} m²</div>
+        {rooms}
+        <div class="address">Maarif à Casablanca</div>
+        <a href="/listing/{i}">Lien</a>
+        <ul class="features">{extras}</ul>
+    </body></html>"""
+
+
+def run_mode(mode, n_ads):
+    """Extrait n_ads annonces dans un mode et retourne les mesures par annonce"""
+    from benchmarks.fake_driver import StaticDriver
+    from src.scraper import PropertyScraper
+
+    pages = {f"http://fixture/listing/{i}": make_ad_page(i) for i in range(n_ads)}
+    scraper = PropertyScraper(extract_mode=mode, wait_timeout=0.01)
+    scraper.driver = StaticDriver(pages)
+
+    start = time.perf_counter()
+    results = []
+    for url in pages:
+        scraper.driver.get(url)
+        results.append(scraper.extract_property(url))
+    elapsed = time.perf_counter() - start
+
+    # Les "get" de navigation sont communs aux deux modes
+    round_trips = scraper.driver.total_round_trips() - scraper.driver.round_trips['get']
+    timeouts = scraper.stats['selector_timeouts']
+    return {
+        "mode": mode,
+        "ads": n_ads,
+        "round_trips_per_ad": round(round_trips / n_ads, 1),
+        "selector_timeouts_per_ad": round(timeouts / n_ads, 1),
+        "projected_timeout_seconds_per_ad": round(timeouts / n_ads * SCRAPER_WAIT_TIMEOUT, 1),
+        "local_seconds_per_ad": round(elapsed / n_ads, 4),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ads", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    runs = [run_mode(mode, args.ads) for mode in MODES]
+    identical = runs[0].pop("results") == runs[1].pop("results")
+
+    if args.json:
+        print(json.dumps({"runs": runs, "identical_output": identical}, indent=2))
+        return
+
+    print(f"{'mode':<8}{'allers-retours/annonce':>24}{'timeouts/annonce':>18}"
+          f"{'attente projetée (s)':>22}")
+    for r in runs:
+        print(f"{r['mode']:<8}{r['round_trips_per_ad']:>24}{r['selector_timeouts_per_ad']:>18}"
+              f"{r['projected_timeout_seconds_per_ad']:>22}")
+    print(f"Sorties identiques entre les modes: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark d'écriture Google Sheets sur un faux backend gspread en mémoire
+
+- Réécriture complète vs écriture incrémentale: écrit un onglet de
+  prédictions puis une version où une fraction des lignes a changé.
+- Ajout en fin d'onglet: relecture de toute la feuille (ancien
+  append_data) vs API append, sur une feuille qui grandit.
+- Lecture de l'onglet d'entrée en une plage vs par blocs (iter_input):
+  pic mémoire Python et types obtenus.
+
+Compte les appels API et les cellules envoyées ou relues.
+
+    python benchmarks/bench_sheets.py --rows 10000 --changed 0.01
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fake_sheets import FakeClient
+from configs.config import EXTRAS_LIST, INPUT_WORKSHEET_NAME
+from src.sheets_handler import SheetsAppender, SheetsHandler, sheet_values
+
+WORKSHEET = "Predictions"
+
+
+def make_predictions(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "prix_reel": rng.integers(300_000, 5_000_000, n_rows).astype(float),
+        "random_forest": rng.normal(1.5e6, 4e5, n_rows),
+        "xgboost": rng.normal(1.5e6, 4e5, n_rows),
+        "ensemble": rng.normal(1.5e6, 4e5, n_rows),
+        "ville": rng.choice(["Casablanca", "Rabat", "Marrakech"], n_rows),
+        "surface": rng.integers(30, 300, n_rows).astype(float),
+    })
+
+
+def run(n_rows, changed, incremental):
+    df = make_predictions(n_rows)
+    updated = df.copy()
+    rows = np.random.default_rng(1).choice(n_rows, int(n_rows * changed), replace=False)
+    updated.loc[rows, "ensemble"] += 1000
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        gc = FakeClient()
+        handler = SheetsHandler(gc=gc, cache_dir=cache_dir if incremental else None)
+        spreadsheet = gc.open(handler.sheet_name)
+        handler.write_incremental(df, WORKSHEET)
+
+        spreadsheet.calls.clear()
+        spreadsheet.cells_sent = 0
+        handler.write_incremental(updated, WORKSHEET)
+
+        header, values = sheet_values(updated)
+        return {
+            "mode": "incrémental" if incremental else "complet",
+            "rows": n_rows,
+            "api_calls": sum(spreadsheet.calls.values()),
+            "cells_sent": spreadsheet.cells_sent,
+            "content_ok": spreadsheet.sheets[WORKSHEET].values() == [header] + values,
+        }
+
+
+def legacy_append(handler, df, worksheet_name):
+    """Ancien append_data: relit toute la feuille pour trouver la prochaine ligne"""
+    worksheet = handler.sh.worksheet(worksheet_name)
+    _, rows = sheet_values(df)
+    first_row = len(worksheet.get_all_values()) + 1
+    if first_row + len(rows) - 1 > worksheet.row_count:
+        worksheet.resize(rows=first_row + len(rows) - 1)
+    handler.sh.values_batch_update({"data": [{
+        "range": f"'{worksheet_name}'!A{first_row}", "values": rows
+    }]})
+
+
+def run_append(n_rows, appends, mode):
+    """appends ajouts successifs de n_rows/appends lignes dans un onglet"""
+    df = make_predictions(n_rows)
+    size = -(-n_rows // appends)
+    chunks = [df.iloc[start:start + size] for start in range(0, n_rows, size)]
+    gc = FakeClient()
+    handler = SheetsHandler(gc=gc, cache_dir=None)
+    spreadsheet = gc.open(handler.sheet_name)
+    spreadsheet.add_worksheet("Feuille 1", rows=1, cols=len(df.columns))
+
+    if mode == "relecture":
+        for chunk in chunks:
+            legacy_append(handler, chunk, "Feuille 1")
+    elif mode == "append":
+        for chunk in chunks:
+            handler.append_data(chunk, "Feuille 1")
+    else:
+        with SheetsAppender(handler, "Feuille 1", batch_rows=n_rows) as appender:
+            for chunk in chunks:
+                appender.append(chunk)
+
+    _, values = sheet_values(df)
+    return {
+        "mode": mode, "rows": n_rows, "appends": appends,
+        "api_calls": sum(spreadsheet.calls.values()),
+        "cells_read": spreadsheet.cells_read,
+        "content_ok": spreadsheet.sheets["Feuille 1"].values() == values,
+    }
+
+
+def make_input(n_rows, seed=0):
+    """Annonces brutes telles que scrapées (texte), comme l'onglet d'entrée"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "titre": [f"Appartement {i}" for i in range(n_rows)],
+        "prix": [f"{p} DH" for p in rng.integers(300, 5000, n_rows) * 1000],
+        "ville": rng.choice(["Casablanca", "Rabat", "Marrakech"], n_rows),
+        "zone": rng.choice(["Centre", "Maarif", "Agdal", ""], n_rows),
+        "surface": rng.integers(30, 300, n_rows).astype(str),
+        "pièces": rng.integers(1, 8, n_rows).astype(str),
+    })
+    for extra in EXTRAS_LIST:
+        df[extra] = rng.integers(0, 2, n_rows)
+    return df
+
+
+def run_read(n_rows, chunk_rows):
+    """Lecture de l'onglet d'entrée par iter_input; chunk_rows >= n_rows: une seule plage"""
+    df = make_input(n_rows)
+    gc = FakeClient()
+    handler = SheetsHandler(gc=gc, cache_dir=None)
+    spreadsheet = gc.open(handler.sheet_name)
+    handler.write_incremental(df, INPUT_WORKSHEET_NAME)
+    spreadsheet.calls.clear()
+
+    tracemalloc.start()
+    rows, chunks, dtypes = 0, 0, None
+    for chunk in handler.iter_input(INPUT_WORKSHEET_NAME, chunk_rows=chunk_rows):
+        rows += len(chunk)
+        chunks += 1
+        dtypes = chunk.dtypes
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": "par blocs" if chunk_rows < n_rows else "une plage",
+        "rows": rows, "chunks": chunks,
+        "api_calls": sum(spreadsheet.calls.values()),
+        "pic_memoire_mo": round(peak / 1e6, 1),
+        "types": dict(sorted(dtypes.astype(str).value_counts().items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction de lignes modifiées")
+    parser.add_argument("--chunk-rows", type=int, default=1000, help="taille des blocs de lecture")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    # Sans état local, write_incremental vide et réécrit tout l'onglet
+    results = [run(args.rows, args.changed, incremental) for incremental in (False, True)]
+    results += [run_append(args.rows, 50, mode) for mode in ("relecture", "append", "regroupé")]
+    results += [run_read(args.rows, chunk_rows) for chunk_rows in (args.rows, args.chunk_rows)]
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for result in results:
+        print(" | ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
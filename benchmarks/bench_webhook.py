@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'envoi au webhook: envoi bloquant par annonce vs file en arrière-plan
+
+Lance un faux webhook n8n local (latence et pannes configurables) et mesure
+le temps pendant lequel le scraping est bloqué par les envois, puis vérifie
+qu'une panne du webhook est absorbée par le spool et rejouée au retour.
+
+    python benchmarks/bench_webhook.py --ads 200 --latency 0.05
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import requests
+
+from src.webhook import WebhookDelivery
+
+
+class StubWebhook:
+    """Faux webhook n8n: compte les annonces reçues, latence et panne simulables"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.down = False
+        self.received = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                time.sleep(stub.latency)
+                status = 503 if stub.down else 200
+                with stub._lock:
+                    stub.requests += 1
+                    if status == 200:
+                        payload = json.loads(body)
+                        stub.received += len(payload) if isinstance(payload, list) else 1
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        self.received = self.requests = 0
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_ads(n):
+    return [{"titre": f"Appartement {i}", "prix": f"{i} 000 DH", "url": f"/listing/{i}"}
+            for i in range(n)]
+
+
+def bench_blocking(stub, ads):
+    """Ancien comportement: un requests.post par annonce, nouvelle connexion à chaque fois"""
+    start = time.perf_counter()
+    for ad in ads:
+        requests.post(stub.url, json=ad, timeout=5)
+    blocked = time.perf_counter() - start
+    return {"mode": "bloquant", "scraping_bloque_s": round(blocked, 3),
+            "total_s": round(blocked, 3), "requetes": stub.requests, "recues": stub.received}
+
+
+def bench_background(stub, ads, batch_size, spool_dir):
+    start = time.perf_counter()
+    delivery = WebhookDelivery(stub.url, batch_size=batch_size, flush_interval=0.2,
+                               spool_dir=spool_dir).start()
+    for ad in ads:
+        delivery.submit(ad)
+    blocked = time.perf_counter() - start
+    delivery.close()
+    total = time.perf_counter() - start
+    metrics = delivery.snapshot()
+    return {"mode": f"file (lots de {batch_size})", "scraping_bloque_s": round(blocked, 3),
+            "total_s": round(total, 3), "requetes": stub.requests, "recues": stub.received,
+            "latence_moyenne_s": metrics["latency_mean"], "file_max": metrics["max_queue_depth"]}
+
+
+def bench_outage(stub, ads, batch_size, spool_dir):
+    """Webhook en panne pendant le run: tout part dans le spool, puis est rejoué
+
+    Seul le premier lot est tenté (avec reprises), les suivants vont
+    directement au spool.
+    """
+    stub.down = True
+    delivery = WebhookDelivery(stub.url, batch_size=batch_size, flush_interval=0.2,
+                               retries=1, backoff=0.05, spool_dir=spool_dir).start()
+    for ad in ads:
+        delivery.submit(ad)
+    delivery.close()
+    metrics = delivery.snapshot()
+    failed_requests = stub.requests
+
+    stub.down = False
+    replay = WebhookDelivery(stub.url, batch_size=batch_size, spool_dir=spool_dir)
+    replayed = replay.replay_spool()
+    return {"mode": "panne puis reprise", "requetes_en_panne": failed_requests,
+            "spool": metrics["spooled"], "sans_essai": metrics["short_circuited"], "rejouees": replayed,
+            "recues": stub.received, "spool_restant": len(list(Path(spool_dir).glob("*.jsonl")))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ads", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="latence du webhook (s)")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    ads = make_ads(args.ads)
+    stub = StubWebhook(latency=args.latency)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as spool_dir:
+            results.append(bench_blocking(stub, ads))
+            stub.reset()
+            results.append(bench_background(stub, ads, args.batch_size, spool_dir))
+            stub.reset()
+            results.append(bench_outage(stub, ads, args.batch_size, spool_dir))
+    finally:
+        stub.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for result in results:
+        print(" | ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
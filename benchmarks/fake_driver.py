@@ -0,0 +1,115 @@
+"""
+Driver Selenium statique pour les benchmarks du scraper
+
+Sert des pages HTML en mémoire via BeautifulSoup et compte chaque
+aller-retour navigateur (recherches d'éléments, lecture de texte,
+d'attributs ou du code source), comme le ferait un vrai WebDriver.
+HttpDriver télécharge les pages depuis un serveur local à la place.
+"""
+
+import re
+from collections import Counter
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+_XPATH_CONTAINS = re.compile(r"contains\(text\(\), '(.*)'\)")
+
+
+class StaticElement:
+    """WebElement minimal adossé à un nœud BeautifulSoup"""
+
+    def __init__(self, driver, node):
+        self._driver = driver
+        self._node = node
+
+    @property
+    def text(self):
+        self._driver.round_trips['text'] += 1
+        return " ".join(self._node.get_text(" ").split())
+
+    def get_attribute(self, name):
+        self._driver.round_trips['get_attribute'] += 1
+        value = self._node.get(name)
+        # Comme Selenium, href/src sont résolus en URL absolue
+        if value is not None and name in ("href", "src"):
+            return urljoin(self._driver.current_url or "", value)
+        return value
+
+    def find_elements(self, by, value):
+        self._driver.round_trips['find_elements'] += 1
+        return [StaticElement(self._driver, node) for node in self._node.select(value)]
+
+    def click(self):
+        self._driver.round_trips['click'] += 1
+
+
+class StaticDriver:
+    """Driver servant des pages HTML en mémoire: {url: html}"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.current_url = None
+        self._soup = BeautifulSoup("", "html.parser")
+        self.round_trips = Counter()
+
+    def get(self, url):
+        self.round_trips['get'] += 1
+        self.current_url = url
+        self._soup = BeautifulSoup(self.pages.get(url, ""), "html.parser")
+
+    @property
+    def page_source(self):
+        self.round_trips['page_source'] += 1
+        return str(self._soup)
+
+    def _select(self, by, value):
+        if by == By.XPATH:
+            match = _XPATH_CONTAINS.search(value)
+            if not match:
+                raise NotImplementedError(value)
+            return [node.parent for node in self._soup.find_all(string=lambda t: match.group(1) in t)]
+        return self._soup.select(value)
+
+    def find_elements(self, by, value):
+        self.round_trips['find_elements'] += 1
+        return [StaticElement(self, node) for node in self._select(by, value)]
+
+    def find_element(self, by, value):
+        self.round_trips['find_element'] += 1
+        nodes = self._select(by, value)
+        if not nodes:
+            raise NoSuchElementException(value)
+        return StaticElement(self, nodes[0])
+
+    def execute_script(self, script, *args):
+        self.round_trips['execute_script'] += 1
+        return "complete"
+
+    def quit(self):
+        pass
+
+    def total_round_trips(self):
+        return sum(self.round_trips.values())
+
+
+class HttpDriver(StaticDriver):
+    """Driver qui télécharge les pages (ex: benchmarks.fixture_site) au lieu de les lire en mémoire"""
+
+    def __init__(self, timeout=10):
+        import requests
+        super().__init__({})
+        self.session = requests.Session()
+        self.timeout = timeout
+
+    def get(self, url):
+        self.round_trips['get'] += 1
+        self.current_url = url
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        self._soup = BeautifulSoup(response.text, "html.parser")
+
+    def quit(self):
+        self.session.close()
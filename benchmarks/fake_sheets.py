@@ -0,0 +1,142 @@
+"""
+Faux backend gspread en mémoire pour les benchmarks Google Sheets
+
+Implémente le sous-ensemble de l'API utilisé par SheetsHandler et compte
+les appels API et les cellules envoyées, comme le quota Google.
+"""
+
+import itertools
+from collections import Counter
+
+import gspread
+from gspread.utils import a1_to_rowcol
+
+_ids = itertools.count(1)
+
+
+def split_range(range_name):
+    """"'Onglet'!A2:C5" -> ("Onglet", (2, 1), (5, 3))"""
+    title, _, cells = range_name.rpartition("!")
+    title = title[1:-1].replace("''", "'") if title.startswith("'") else title
+    start, _, end = cells.partition(":")
+    return title, a1_to_rowcol(start), a1_to_rowcol(end or start)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, rows, cols):
+        self.spreadsheet = spreadsheet
+        self.id = next(_ids)
+        self.title = title
+        self.cells = [[""] * cols for _ in range(rows)]
+
+    @property
+    def row_count(self):
+        return len(self.cells)
+
+    @property
+    def col_count(self):
+        return len(self.cells[0]) if self.cells else 0
+
+    def resize(self, rows=None, cols=None):
+        self.spreadsheet.count("resize")
+        rows = self.row_count if rows is None else rows
+        cols = self.col_count if cols is None else cols
+        self.cells = [(row + [""] * cols)[:cols] for row in self.cells[:rows]]
+        self.cells += [[""] * cols for _ in range(rows - len(self.cells))]
+
+    def clear(self):
+        self.spreadsheet.count("clear")
+        self.cells = [[""] * self.col_count for _ in range(self.row_count)]
+
+    def write(self, first_row, first_col, values):
+        for r, row in enumerate(values):
+            for c, value in enumerate(row):
+                if first_row + r > self.row_count or first_col + c > self.col_count:
+                    raise gspread.exceptions.GSpreadException("Range exceeds grid limits")
+                self.cells[first_row + r - 1][first_col + c - 1] = value
+                self.spreadsheet.cells_sent += 1
+
+    def get_all_values(self):
+        self.spreadsheet.count("get_all_values")
+        values = self.values()
+        self.spreadsheet.cells_read += sum(len(row) for row in values)
+        return values
+
+    def get(self, range_name):
+        """Valeurs d'une plage A1, sans les lignes et cellules vides de fin (comme l'API)"""
+        self.spreadsheet.count("get")
+        _, (r1, c1), (r2, c2) = split_range(range_name)
+        rows = [row[c1 - 1:c2] for row in self.cells[r1 - 1:r2]]
+        rows = [row[:max((i + 1 for i, v in enumerate(row) if v != ""), default=0)] for row in rows]
+        while rows and not rows[-1]:
+            rows.pop()
+        self.spreadsheet.cells_read += sum(len(row) for row in rows)
+        return rows
+
+    def append_rows(self, values, value_input_option="RAW", insert_data_option=None,
+                    table_range=None):
+        """API append: écrit après la dernière ligne non vide, côté serveur"""
+        self.spreadsheet.count("append_rows")
+        first_row = len(self.values()) + 1
+        missing = first_row + len(values) - 1 - self.row_count
+        if missing > 0:
+            self.cells += [[""] * self.col_count for _ in range(missing)]
+        width = max(len(row) for row in values)
+        if width > self.col_count:
+            self.cells = [row + [""] * (width - len(row)) for row in self.cells]
+        self.write(first_row, 1, values)
+        return {}
+
+    def values(self):
+        """Contenu non vide (lignes et colonnes vides de fin retirées), sans compter d'appel"""
+        rows = [list(row) for row in self.cells]
+        while rows and not any(v != "" for v in rows[-1]):
+            rows.pop()
+        width = max((max((i + 1 for i, v in enumerate(row) if v != ""), default=0)
+                     for row in rows), default=0)
+        return [row[:width] for row in rows]
+
+
+class FakeSpreadsheet:
+    def __init__(self, title):
+        self.id = f"fake-{next(_ids)}"
+        self.title = title
+        self.sheets = {}
+        self.calls = Counter()
+        self.cells_sent = 0
+        self.cells_read = 0
+
+    def count(self, name):
+        self.calls[name] += 1
+
+    def worksheet(self, title):
+        self.count("worksheet")
+        if title not in self.sheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.sheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        self.count("add_worksheet")
+        self.sheets[title] = FakeWorksheet(self, title, rows, cols)
+        return self.sheets[title]
+
+    def del_worksheet(self, worksheet):
+        self.count("del_worksheet")
+        del self.sheets[worksheet.title]
+
+    def values_batch_update(self, body):
+        self.count("values_batch_update")
+        for data in body["data"]:
+            title, (row, col), _ = split_range(data["range"])
+            self.sheets[title].write(row, col, data["values"])
+        return {}
+
+
+class FakeClient:
+    """Remplace gspread.Client: SheetsHandler(gc=FakeClient())"""
+
+    def __init__(self):
+        self.spreadsheets = {}
+
+    def open(self, title):
+        return self.spreadsheets.setdefault(title, FakeSpreadsheet(title))
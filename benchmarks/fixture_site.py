@@ -0,0 +1,94 @@
+"""
+Site d'annonces statique servi en local (http.server) pour tester les scrapers
+
+Pages de résultats (BASE_URL, puis PAGE_URL_TEMPLATE) de per_page
+vignettes .listing-item et une page par annonce (benchmarks.bench_scraper.
+make_ad_page). Comme sur le vrai site, chaque page de résultats reprend
+la dernière annonce de la précédente: le flux fusionné doit la
+dédoublonner. Les pages au-delà de la dernière sont vides.
+
+    with FixtureSite(pages=6, per_page=10, latency=0.01) as site:
+        scraper = PropertyScraper(base_url=site.base_url, ...)
+"""
+
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from benchmarks.bench_scraper import make_ad_page
+from configs.config import PAGE_URL_TEMPLATE
+
+
+def make_results_page(ad_ids):
+    """Page de résultats: une vignette (lien + résumé) par annonce"""
+    cards = "".join(
+        f'<div class="listing-item"><a href="/listing/{i}">Appartement {i}</a>'
+        f'<span>{(i + 5) * 100} 000 DH</span></div>'
+        for i in ad_ids
+    )
+    return f"<html><body>{cards}</body></html>"
+
+
+class FixtureSite:
+    """Serveur HTTP local des pages de résultats et d'annonces; compte les requêtes"""
+
+    def __init__(self, pages=5, per_page=10, latency=0.0, page_url_template=PAGE_URL_TEMPLATE):
+        self.n_pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.page_url_template = page_url_template
+        self.hits = Counter()
+        self._lock = threading.Lock()
+        self.paths = {}
+        for page in range(1, pages + 1):
+            first = (page - 1) * per_page
+            # Reprise de la dernière annonce de la page précédente
+            ad_ids = range(max(first - 1, 0), first + per_page)
+            self.paths[self._page_path(page)] = make_results_page(ad_ids)
+        for i in range(pages * per_page):
+            self.paths[f"/listing/{i}"] = make_ad_page(i)
+
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = unquote(self.path)
+                time.sleep(site.latency)
+                with site._lock:
+                    site.hits[path] += 1
+                # Page inconnue: page de résultats vide (au-delà de la dernière)
+                body = site.paths.get(path, "<html><body></body></html>").encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.base_url = self.url + "/list"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _page_path(self, page):
+        return "/list" if page <= 1 else self.page_url_template.format(base_url="/list", page=page)
+
+    def ad_urls(self):
+        """URLs de toutes les annonces du site (sortie attendue d'un scraping complet)"""
+        return {f"{self.url}/listing/{i}" for i in range(self.n_pages * self.per_page)}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,58 @@
+"""
+Modèles de test pour les benchmarks: petits, entraînés sur des annonces synthétiques
+
+Les fichiers sont recréés à chaque suite (les pickles dépendent de la
+version de scikit-learn) avec les mêmes noms que les vrais modèles, pour
+que PricePredictor et DataPreprocessor.load_transformers les chargent
+sans modification.
+"""
+
+from pathlib import Path
+
+import joblib
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.svm import SVR
+
+from benchmarks.synthetic import generate_ads
+from configs.config import (
+    MODELS, ENCODER_FILE, SCALER_FILE, FEATURES_COLUMNS_FILE, BOOL_COLUMNS_FILE,
+    NUMERIC_FILL_FILE
+)
+
+
+def fixture_estimators(seed=0):
+    """Un estimateur léger par modèle de MODELS (prédiction rapide même à 1M lignes)"""
+    return {
+        "Linear_Regression": LinearRegression(),
+        "Random_Forest": RandomForestRegressor(n_estimators=10, max_depth=8, random_state=seed),
+        "Gradient_Boosting": GradientBoostingRegressor(n_estimators=20, max_depth=3, random_state=seed),
+        "SVR": SVR(C=1e6),
+    }
+
+
+def build_fixture_models(model_dir, n_rows=2000, svr_rows=300, seed=0):
+    """Entraîne les modèles de test et écrit modèles et transformateurs dans model_dir
+
+    Le SVR est entraîné sur svr_rows lignes seulement: son coût de
+    prédiction croît avec le nombre de vecteurs de support.
+    """
+    from src.preprocessor import DataPreprocessor
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    preprocessor = DataPreprocessor()
+    df_clean = preprocessor.preprocess(generate_ads(n_rows, seed=seed), fit=True)
+    X, y = preprocessor.encode_and_scale(df_clean, fit=True)
+    preprocessor.save_transformers(
+        model_dir / ENCODER_FILE, model_dir / SCALER_FILE,
+        model_dir / FEATURES_COLUMNS_FILE, model_dir / BOOL_COLUMNS_FILE,
+        model_dir / NUMERIC_FILL_FILE
+    )
+
+    for model_name, estimator in fixture_estimators(seed).items():
+        rows = svr_rows if model_name == "SVR" else n_rows
+        estimator.fit(X[:rows], y[:rows])
+        joblib.dump(estimator, model_dir / MODELS[model_name])
+    return model_dir
@@ -0,0 +1,61 @@
+"""
+Générateur d'annonces immobilières synthétiques au format brut du scraper
+"""
+
+import numpy as np
+import pandas as pd
+
+from configs.config import EXTRAS_LIST
+
+VILLES = ["Casablanca", "Rabat", "Marrakech", "Tanger", "Fès", "Agadir", "Meknès", "Oujda"]
+ZONES = [
+    "Maarif", "Agdal", "Gueliz", "Centre Ville", "Anfa", "Hay Riad", "Bourgogne",
+    "Californie", "Hivernage", "Malabata", "Souissi", "Ain Diab", "Racine", "Palmier"
+]
+
+
+def format_price(value, currency):
+    """Formate un prix comme sur le site: '1 200 000 DH'"""
+    return f"{value:,}".replace(",", " ") + f" {currency}"
+
+
+def generate_ads(n_rows, seed=0):
+    """Génère n_rows annonces brutes (prix, surface, localisation, extras...)"""
+    rng = np.random.default_rng(seed)
+
+    surface = rng.integers(30, 400, n_rows)
+    chambres = rng.integers(1, 6, n_rows)
+    prix = (surface * rng.integers(6000, 20000, n_rows) // 1000) * 1000
+
+    in_eur = rng.random(n_rows) < 0.1
+    prix_str = np.where(
+        in_eur,
+        [format_price(int(p / 10.5) // 1000 * 1000, "EUR") for p in prix],
+        [format_price(int(p), "DH") for p in prix]
+    )
+
+    villes = rng.choice(VILLES, n_rows)
+    zones = rng.choice(ZONES, n_rows)
+    has_zone = rng.random(n_rows) < 0.85
+    localisation = np.where(has_zone, np.char.add(np.char.add(zones, " à "), villes), villes)
+
+    data = {
+        "titre": np.full(n_rows, "Appartement à vendre"),
+        "prix": prix_str,
+        "surface": np.char.add(surface.astype(str), " m²"),
+        "pièces": chambres + rng.integers(1, 3, n_rows),
+        "chambres": chambres,
+        "salles_de_bain": rng.integers(1, 4, n_rows),
+        "localisation": localisation,
+        "url": [f"https://www.mubawab.ma/fr/a/{i}" for i in range(n_rows)],
+        "type_bien": np.full(n_rows, "Appartement"),
+    }
+    for extra in EXTRAS_LIST:
+        data[extra] = (rng.random(n_rows) < 0.4).astype(int)
+
+    df = pd.DataFrame(data)
+    # Quelques valeurs manquantes, comme dans les vraies annonces
+    missing = rng.random(n_rows) < 0.02
+    df.loc[missing, "localisation"] = None
+    df.loc[rng.random(n_rows) < 0.02, "surface"] = None
+    return df
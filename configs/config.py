@@ -21,23 +21,121 @@ NOTEBOOKS_DIR = BASE_DIR / "notebooks"
 SHEET_NAME = os.getenv("SHEET_NAME", "Scraped Properties")
 INPUT_WORKSHEET_NAME = os.getenv("INPUT_WORKSHEET_NAME", "Feuille 1")
 OUTPUT_WORKSHEET_NAME = os.getenv("OUTPUT_WORKSHEET_NAME", "Predictions")
+# Écriture incrémentale: seules les lignes modifiées depuis la dernière écriture
+# (état local dans SHEETS_CACHE_DIR) sont envoyées; false pour tout réécrire
+SHEETS_INCREMENTAL_WRITE = os.getenv("SHEETS_INCREMENTAL_WRITE", "true").lower() in ("1", "true", "yes")
+SHEETS_CACHE_DIR = os.getenv("SHEETS_CACHE_DIR", str(DATA_DIR / "sheets_cache"))
+# Colonne identifiant les lignes d'un onglet pour l'écriture incrémentale
+# (à défaut, les lignes sont identifiées par leur position)
+SHEETS_ROW_KEY = os.getenv("SHEETS_ROW_KEY", "url")
+SHEETS_MAX_CELLS_PER_REQUEST = int(os.getenv("SHEETS_MAX_CELLS_PER_REQUEST", "50000"))
+# Ajouts regroupés (SheetsAppender): lignes mises en tampon avant une requête append
+SHEETS_APPEND_BATCH_ROWS = int(os.getenv("SHEETS_APPEND_BATCH_ROWS", "500"))
+# Lecture de l'onglet d'entrée par blocs de lignes (0: lecture complète en une fois)
+SHEETS_READ_CHUNK_ROWS = int(os.getenv("SHEETS_READ_CHUNK_ROWS", "5000"))
 SERVICE_ACCOUNT_PATH = os.getenv("SERVICE_ACCOUNT_PATH", str(CONFIGS_DIR / "service_account.json"))
 
 # n8n Webhook
 WEBHOOK_URL = os.getenv("WEBHOOK_URL", None)
 SEND_TO_WEBHOOK = WEBHOOK_URL is not None
+# Envoi en arrière-plan: lots JSON, délai max avant envoi d'un lot incomplet (s),
+# taille de la file, reprises avec backoff exponentiel, spool disque si n8n est indisponible
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))
+WEBHOOK_FLUSH_INTERVAL = float(os.getenv("WEBHOOK_FLUSH_INTERVAL", "2"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "10000"))
+WEBHOOK_RETRIES = int(os.getenv("WEBHOOK_RETRIES", "3"))
+WEBHOOK_BACKOFF = float(os.getenv("WEBHOOK_BACKOFF", "1"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_SPOOL_DIR = os.getenv("WEBHOOK_SPOOL_DIR", str(DATA_DIR / "webhook_spool"))
+# Après un échec, lots écrits directement dans le spool; nouvel essai toutes les N s
+WEBHOOK_PROBE_INTERVAL = float(os.getenv("WEBHOOK_PROBE_INTERVAL", "30"))
+# Attente max des envois restants à la fermeture, le reste va au spool
+WEBHOOK_CLOSE_TIMEOUT = float(os.getenv("WEBHOOK_CLOSE_TIMEOUT", "30"))
 
 # Scraping
 CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "C:/webdrivers/chromedriver.exe")
 BASE_URL = os.getenv("BASE_URL", "https://www.mubawab.ma/fr/sc/appartements-a-vendre")
 MAX_ADS = int(os.getenv("MAX_ADS", "100000"))
+# URL d'une page de résultats ({base_url}, {page}); la page 1 est BASE_URL
+PAGE_URL_TEMPLATE = os.getenv("PAGE_URL_TEMPLATE", "{base_url}:p:{page}")
+
+# Scraping parallèle: nombre de drivers, mode headless
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "1"))
+SCRAPER_HEADLESS = os.getenv("SCRAPER_HEADLESS", "false").lower() in ("1", "true", "yes")
+# Limite de débit: intervalle minimal entre deux chargements de page d'un même
+# worker (s), allongé d'une part aléatoire jusqu'à SCRAPER_JITTER
+SCRAPER_DELAY = float(os.getenv("SCRAPER_DELAY", "1"))
+SCRAPER_JITTER = float(os.getenv("SCRAPER_JITTER", "0.3"))
+# Plafond optionnel tous workers confondus (s entre deux pages, 0: aucun)
+SCRAPER_GLOBAL_DELAY = float(os.getenv("SCRAPER_GLOBAL_DELAY", "0"))
+# Attente du chargement complet d'une page (s)
+SCRAPER_READY_TIMEOUT = float(os.getenv("SCRAPER_READY_TIMEOUT", "10"))
+# Essais avant d'ignorer un sélecteur qui ne trouve jamais rien
+SCRAPER_SELECTOR_MIN_TRIALS = int(os.getenv("SCRAPER_SELECTOR_MIN_TRIALS", "20"))
+# Extraction Selenium: "dom" (une requête navigateur par champ/extra) ou
+# "source" (code source récupéré une fois, analysé localement)
+SCRAPER_EXTRACT_MODE = os.getenv("SCRAPER_EXTRACT_MODE", "dom")
+SCRAPER_WAIT_TIMEOUT = float(os.getenv("SCRAPER_WAIT_TIMEOUT", "2"))  # attente max d'un champ absent (s)
+
+# Moteur de scraping: "selenium" (navigateur) ou "http" (requests + HTML, Selenium en repli)
+SCRAPER_ENGINE = os.getenv("SCRAPER_ENGINE", "selenium")
+HTTP_WORKERS = int(os.getenv("HTTP_WORKERS", "16"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_DELAY = float(os.getenv("HTTP_DELAY", "0"))  # intervalle minimal entre requêtes (s)
+HTML_PARSER = os.getenv("HTML_PARSER", "html.parser")  # ou "lxml" si installé
+# Index SQLite des annonces déjà scrapées (scraping incrémental et reprise);
+# vide pour désactiver
+SCRAPE_INDEX_PATH = os.getenv("SCRAPE_INDEX_PATH", str(DATA_DIR / "scrape_index.sqlite"))
+# Sortie en flux du scraping: dossier Parquet partitionné (src/storage.py), ou
+# fichier .csv / .parquet, et taille des blocs écrits
+SCRAPE_OUTPUT_PATH = os.getenv("SCRAPE_OUTPUT_PATH", str(DATA_DIR / "raw" / "properties"))
+SINK_CHUNK_SIZE = int(os.getenv("SINK_CHUNK_SIZE", "500"))
+
+# Stockage Parquet partitionné (scrape_date, ville)
+PROCESSED_DATA_PATH = os.getenv("PROCESSED_DATA_PATH", str(DATA_DIR / "processed" / "properties"))
+STORAGE_WRITE_ROWS = int(os.getenv("STORAGE_WRITE_ROWS", "20000"))  # lignes par écriture (un fichier par partition)
+STORAGE_BATCH_ROWS = int(os.getenv("STORAGE_BATCH_ROWS", "50000"))  # lignes par bloc en lecture
 
 # Models
 MODEL_DIR = os.getenv("MODEL_DIR", str(MODELS_DIR))
 
+# Prédiction parallèle (1 = séquentiel, -1 = tous les cœurs)
+PREDICT_N_JOBS = int(os.getenv("PREDICT_N_JOBS", "1"))
+PREDICT_BACKEND = os.getenv("PREDICT_BACKEND", "threading")  # threading | loky
+# Blocs de lignes répartis entre les threads (threading); avec des processus
+# (loky), chaque worker reçoit un modèle une seule fois et découpe les lignes
+PREDICT_CHUNK_SIZE = int(os.getenv("PREDICT_CHUNK_SIZE", "20000"))
+
+# Matrice de features creuse (CSR) pour l'inférence
+SPARSE_FEATURES = os.getenv("SPARSE_FEATURES", "false").lower() in ("1", "true", "yes")
+
+# Chargement des modèles (paresseux, et mmap_mode="r" pour partager les pages)
+MODEL_LAZY_LOAD = os.getenv("MODEL_LAZY_LOAD", "true").lower() in ("1", "true", "yes")
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE") or None
+
+# Prédiction par lots depuis un jeu Parquet au lieu de l'onglet d'entrée (vide = Google Sheets),
+# limitée aux annonces scrapées depuis PREDICT_SINCE (AAAA-MM-JJ, vide = toutes)
+PREDICT_INPUT_PATH = os.getenv("PREDICT_INPUT_PATH", "")
+PREDICT_SINCE = os.getenv("PREDICT_SINCE", "")
+
+# Cache persistant des prédictions par ligne de features (vide = désactivé), purgé si un pickle de MODEL_DIR change
+PREDICTION_CACHE_PATH = os.getenv("PREDICTION_CACHE_PATH", str(DATA_DIR / "prediction_cache.sqlite"))
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "500000"))  # éviction LRU au-delà
+
+# Serveur de prédiction (scripts/serve.py)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_RELOAD_INTERVAL = float(os.getenv("SERVER_RELOAD_INTERVAL", "30"))  # secondes, 0 = désactivé
+
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# Métriques d'exécution (src/metrics.py): export JSON, ou textfile Prometheus si le chemin finit par .prom
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_PATH = os.getenv("METRICS_PATH", str(DATA_DIR / "metrics.json"))
+# Identifiant du run (ex: id d'exécution n8n), repris dans l'export
+METRICS_RUN_ID = os.getenv("METRICS_RUN_ID", "")
+
 # === Configuration de scraping ===
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -65,12 +163,18 @@ MODELS = {
 ENCODER_FILE = "encoder.pkl"
 SCALER_FILE = "scaler.pkl"
 FEATURES_COLUMNS_FILE = "features_columns.pkl"
+BOOL_COLUMNS_FILE = "bool_columns.pkl"
+NUMERIC_FILL_FILE = "numeric_fill.pkl"  # médianes d'imputation des colonnes numériques
+
+# === Pipeline d'inférence fusionné (transformateurs + modèles) ===
+PIPELINE_FILE = "inference_pipeline.pkl"
 
 # === Colonnes à supprimer ===
 COLUMNS_TO_DROP = [
     "titre", "url", "prix", "type de bien", "étage du bien", "Porte blindée", 
     "Jardin", "Réfrigérateur", "Four", "type_bien", "Machine à laver", 
-    "Façade extérieure", "Antenne parabolique", "Salon Marocain", "Meublé"
+    "Façade extérieure", "Antenne parabolique", "Salon Marocain", "Meublé",
+    "scrape_date"
 ]
 
 # === Colonnes numériques ===
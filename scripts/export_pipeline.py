@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Script d'export du pipeline d'inférence
+Fusionne encodeur, scaler, colonnes et modèles en un seul artefact
+"""
+
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pipeline import InferencePipeline, pipeline_path
+from configs.config import MODEL_DIR
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def main():
+    """Exporte le pipeline fusionné dans MODEL_DIR"""
+    try:
+        logger.info("=== Export du pipeline d'inférence ===")
+        pipeline = InferencePipeline.from_model_dir(MODEL_DIR)
+        pipeline.save(pipeline_path(MODEL_DIR))
+        logger.info("✅ Pipeline exporté avec succès!")
+    except Exception as e:
+        logger.error(f"Erreur critique: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,55 +5,105 @@ Prédit les prix à partir des données dans Google Sheets
 """
 
 import sys
-import os
 from pathlib import Path
 
 # Ajouter le répertoire parent au path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pandas as pd
-import numpy as np
 from src.sheets_handler import SheetsHandler, prepare_output
 from src.preprocessor import DataPreprocessor
 from src.models import PricePredictor
-from configs.config import MODEL_DIR, ENCODER_FILE, SCALER_FILE, FEATURES_COLUMNS_FILE
+from src.pipeline import InferencePipeline, pipeline_path
+from src.prediction_cache import CachedPredictor, PredictionCache
+from src.metrics import metrics
+from src.storage import iter_dataset
+from configs.config import (
+    MODEL_DIR, ENCODER_FILE, SCALER_FILE, FEATURES_COLUMNS_FILE, BOOL_COLUMNS_FILE, NUMERIC_FILL_FILE,
+    SPARSE_FEATURES, SHEETS_READ_CHUNK_ROWS, PREDICTION_CACHE_PATH, PREDICT_INPUT_PATH, PREDICT_SINCE
+)
 from src.utils import get_logger
 
 logger = get_logger(__name__)
 
 
+def load_predict_chunk(input_path=None, filters=None):
+    """Charge les modèles une fois; retourne une fonction bloc -> DataFrame de sortie
+
+    Avec le cache des prédictions, seules les lignes absentes du cache
+    passent par les modèles. Si les transformateurs n'ont pas de médianes
+    d'imputation, elles sont calculées une fois sur input_path (jeu Parquet).
+    """
+    cache = PredictionCache(PREDICTION_CACHE_PATH, MODEL_DIR) if PREDICTION_CACHE_PATH else None
+    
+    if pipeline_path(MODEL_DIR).exists():
+        # Artefact fusionné: un seul chargement, features écrites directement
+        logger.info("Chargement du pipeline fusionné...")
+        pipeline = InferencePipeline.load(pipeline_path(MODEL_DIR))
+        if input_path and pipeline.preprocessor.numeric_fill is None:
+            pipeline.preprocessor.fit_numeric_fill(input_path, filters)
+        predictor = pipeline.predictor if cache is None else CachedPredictor(pipeline.predictor, cache)
+        
+        def predict_chunk(df):
+            features, prix_reel, df_clean = pipeline.transform(df, sparse=SPARSE_FEATURES)
+            return prepare_output(df_clean, predictor.predict(features), prix_reel)
+        return predict_chunk
+    
+    # Charger les transformateurs
+    logger.info("Chargement des transformateurs et des modèles...")
+    preprocessor = DataPreprocessor()
+    encoder_path = Path(MODEL_DIR) / ENCODER_FILE
+    scaler_path = Path(MODEL_DIR) / SCALER_FILE
+    features_path = Path(MODEL_DIR) / FEATURES_COLUMNS_FILE
+    bool_columns_path = Path(MODEL_DIR) / BOOL_COLUMNS_FILE
+    numeric_fill_path = Path(MODEL_DIR) / NUMERIC_FILL_FILE
+    preprocessor.load_transformers(
+        encoder_path, scaler_path, features_path, bool_columns_path, numeric_fill_path
+    )
+    if input_path and preprocessor.numeric_fill is None:
+        preprocessor.fit_numeric_fill(input_path, filters)
+    # Avec le cache, les modèles ne sont chargés qu'au premier défaut de cache
+    predictor = PricePredictor() if cache is None else CachedPredictor(PricePredictor, cache)
+    
+    def predict_chunk(df):
+        # Le bloc vient d'être lu: le prétraitement peut le modifier sur place
+        df_clean = preprocessor.preprocess(df, copy=False)
+        df_prepared, prix_reel = preprocessor.encode_and_scale(
+            df_clean, fit=False, sparse=SPARSE_FEATURES
+        )
+        predictions = predictor.predict(df_prepared)
+        return prepare_output(df_clean, predictions, prix_reel)
+    return predict_chunk
+
+
 def main():
     """Lance les prédictions"""
     try:
         logger.info("=== Démarrage des prédictions ===")
         
-        # Lire les données
-        logger.info("Lecture des données...")
         handler = SheetsHandler()
-        df = handler.read_input()
-        
-        # Prétraitement
-        logger.info("Prétraitement...")
-        preprocessor = DataPreprocessor()
-        
-        # Charger les transformateurs
-        encoder_path = Path(MODEL_DIR) / ENCODER_FILE
-        scaler_path = Path(MODEL_DIR) / SCALER_FILE
-        features_path = Path(MODEL_DIR) / FEATURES_COLUMNS_FILE
+        # Jeu Parquet: seules les partitions des dates demandées sont lues
+        filters = [("scrape_date", ">=", PREDICT_SINCE)] if PREDICT_SINCE else None
+        predict_chunk = load_predict_chunk(PREDICT_INPUT_PATH, filters)
         
-        preprocessor.load_transformers(encoder_path, scaler_path, features_path)
+        # Lecture, prétraitement et prédictions bloc par bloc: seules les
+        # sorties (quelques colonnes) restent en mémoire
+        if PREDICT_INPUT_PATH:
+            chunks = iter_dataset(PREDICT_INPUT_PATH, filters=filters)
+        elif SHEETS_READ_CHUNK_ROWS > 0:
+            chunks = handler.iter_input(chunk_rows=SHEETS_READ_CHUNK_ROWS)
+        else:
+            chunks = [handler.read_input()]
         
-        # Prétraiter
-        df_clean = preprocessor.preprocess(df)
-        df_prepared, prix_reel = preprocessor.encode_and_scale(df_clean, fit=False)
+        outputs = []
+        for i, df in enumerate(chunks, 1):
+            logger.info(f"Prédictions du bloc {i} ({len(df)} lignes)...")
+            outputs.append(predict_chunk(df))
         
-        # Prédictions
-        logger.info("Génération des prédictions...")
-        predictor = PricePredictor()
-        predictions = predictor.predict(df_prepared)
-        
-        # Préparer la sortie
-        output_df = prepare_output(df_clean, predictions, prix_reel)
+        if not outputs:
+            logger.warning("Aucune donnée à prédire")
+            return
+        output_df = pd.concat(outputs, ignore_index=True)
         
         # Écrire dans Google Sheets
         handler.write_output(output_df, worksheet_name="Predictions")
@@ -66,6 +116,9 @@ def main():
         import traceback
         logger.error(traceback.format_exc())
         sys.exit(1)
+    
+    finally:
+        metrics.export()
 
 
 if __name__ == "__main__":
@@ -12,7 +12,13 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.scraper import PropertyScraper
+from src.scrape_index import ScrapeIndex
+from src.sinks import SheetsSink, WebhookSink, file_sink
+from configs.config import (
+    SCRAPER_ENGINE, SCRAPE_INDEX_PATH, SCRAPE_OUTPUT_PATH, SHEETS_ROW_KEY, WEBHOOK_URL
+)
 from src.sheets_handler import SheetsHandler
+from src.metrics import metrics
 from src.utils import get_logger
 
 logger = get_logger(__name__)
@@ -23,29 +29,52 @@ def main():
     try:
         logger.info("=== Démarrage du scraping ===")
         
+        # Index des annonces déjà vues: seules les nouvelles sont scrapées
+        index = ScrapeIndex(SCRAPE_INDEX_PATH) if SCRAPE_INDEX_PATH else None
+        
         # Scraper les propriétés
-        scraper = PropertyScraper()
-        df = scraper.scrape()
+        if SCRAPER_ENGINE == "http":
+            from src.http_scraper import HttpPropertyScraper
+            scraper = HttpPropertyScraper(index=index)
+        else:
+            scraper = PropertyScraper(index=index)
+        
+        try:
+            handler = SheetsHandler()
+        except Exception as e:
+            logger.error(f"Erreur Google Sheets: {e}")
+            handler = None
         
-        if df is not None and len(df) > 0:
-            logger.info(f"{len(df)} propriétés collectées")
-            
-            # Envoyer à Google Sheets
-            try:
-                handler = SheetsHandler()
-                handler.write_output(df, worksheet_name="Scraped Properties")
+        # Annonces écrites au fil de l'eau: fichier (sert aussi de secours), webhook
+        sinks = [file_sink(SCRAPE_OUTPUT_PATH)]
+        if WEBHOOK_URL:
+            sinks.append(WebhookSink(WEBHOOK_URL))
+        if handler is not None:
+            # Avec l'index, l'onglet est le catalogue de tous les runs: seules les
+            # annonces nouvelles ou modifiées du run y sont fusionnées (par URL)
+            key = SHEETS_ROW_KEY if index is not None else None
+            sinks.append(SheetsSink(handler, "Scraped Properties", key=key))
+        count = scraper.scrape_into(sinks)
+        
+        if index is not None:
+            logger.info(f"{count} annonces nouvelles ou modifiées, {len(index)} dans le catalogue")
+            index.close()
+        
+        if count > 0:
+            logger.info(f"{count} propriétés collectées")
+            if handler is not None:
                 logger.info("✅ Scraping et upload réussi!")
-            except Exception as e:
-                logger.error(f"Erreur Google Sheets: {e}")
-                # Sauvegarder en CSV de secours
-                df.to_csv("data/raw/backup_properties.csv", index=False)
-                logger.info("Données sauvegardées en CSV de secours")
+            else:
+                logger.info(f"Données sauvegardées dans {SCRAPE_OUTPUT_PATH}")
         else:
             logger.warning("Aucune propriété n'a été collectée")
     
     except Exception as e:
         logger.error(f"Erreur critique: {e}")
         sys.exit(1)
+    
+    finally:
+        metrics.export()
 
 
 if __name__ == "__main__":
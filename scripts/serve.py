@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Serveur de prédiction persistant
+Garde les modèles chargés et expose des endpoints HTTP pour n8n
+"""
+
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.server import serve
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def main():
+    """Lance le serveur"""
+    try:
+        logger.info("=== Démarrage du serveur de prédiction ===")
+        serve()
+    except Exception as e:
+        logger.error(f"Erreur critique: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
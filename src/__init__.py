@@ -1,14 +1,20 @@
 """
 Module de configuration et initialisation du package
+
+Importer src ne charge rien d'autre: les sous-modules (et leurs
+dépendances lourdes: pandas, scikit-learn, Selenium, gspread) ne sont
+chargés qu'à leur propre import, la configuration au premier accès.
 """
 
 __version__ = "1.0.0"
 __author__ = "BOUKECHOUCH Mohamed"
 __description__ = "Property Price Predictor - ML-based real estate price prediction"
 
-from configs.config import *
-from src.utils import get_logger
-
-logger = get_logger(__name__)
 
-logger.info(f"Property Price Predictor v{__version__}")
+def __getattr__(name):
+    """Paramètres de configs.config accessibles comme attributs de src (src.MODEL_DIR...)"""
+    if name.isupper():
+        from configs import config
+        if hasattr(config, name):
+            return getattr(config, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,262 @@
+"""
+Moteur de scraping HTTP
+
+Récupère les pages de résultats et d'annonces avec une session requests
+partagée (connexions keep-alive) et les analyse en HTML statique. Selenium
+n'est utilisé qu'en repli, pour les pages rendues en JavaScript.
+"""
+
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from configs.config import (
+    BASE_URL, MAX_ADS, CHROMEDRIVER_PATH, USER_AGENTS, WEBHOOK_URL, PAGE_URL_TEMPLATE,
+    HTTP_WORKERS, HTTP_TIMEOUT, HTTP_DELAY, SCRAPER_JITTER, SCRAPE_OUTPUT_PATH
+)
+from src.metrics import metrics
+from src.pacing import RateLimiter, TimingStats
+from src.parsing import parse_property, parse_listing_cards, needs_javascript
+from src.scrape_index import IndexWriter, card_hash
+from src.sinks import write_stream
+from src.storage import write_dataset
+from src.webhook import WebhookDelivery
+from src.scraper import PropertyScraper, format_page_url, property_key
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class HttpPropertyScraper:
+    """Scrape les annonces en HTTP, avec Selenium en repli pour les pages JavaScript"""
+
+    def __init__(self, base_url=BASE_URL, max_ads=MAX_ADS, workers=HTTP_WORKERS,
+                 timeout=HTTP_TIMEOUT, page_url_template=PAGE_URL_TEMPLATE,
+                 chromedriver_path=CHROMEDRIVER_PATH, js_fallback=True, delay=HTTP_DELAY,
+                 jitter=SCRAPER_JITTER, index=None):
+        self.base_url = base_url
+        self.max_ads = max_ads
+        self.workers = workers
+        self.timeout = timeout
+        self.page_url_template = page_url_template
+        self.chromedriver_path = chromedriver_path
+        self.js_fallback = js_fallback
+        # Index des annonces déjà vues (src.scrape_index.ScrapeIndex), optionnel
+        self.index = index
+        # Annonces du run en attente d'indexation (créé par stream())
+        self.index_writer = None
+        self.rate_limiter = RateLimiter(delay, jitter)
+        self.timings = TimingStats()
+        self.data = []
+        self.session = self._build_session()
+        self.browser = None
+        self._browser_lock = threading.Lock()
+
+    def _build_session(self):
+        """Session HTTP avec pool de connexions et reprises sur erreurs transitoires"""
+        session = requests.Session()
+        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = random.choice(USER_AGENTS)
+        return session
+
+    def fetch(self, url):
+        """Télécharge une page et retourne son HTML"""
+        with self.timings.span('rate_limit'):
+            self.rate_limiter.wait()
+        with self.timings.span('fetch'):
+            response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def render(self, url):
+        """Rend une page avec Selenium (repli JavaScript) et retourne son HTML"""
+        with self._browser_lock:
+            if self.browser is None:
+                self.browser = PropertyScraper(
+                    base_url=self.base_url, chromedriver_path=self.chromedriver_path,
+                    workers=1, headless=True
+                )
+                self.browser.rate_limiter = self.rate_limiter
+                self.browser.timings = self.timings
+                self.browser.setup_driver()
+            self.browser.navigate(url)
+            return self.browser.driver.page_source
+
+    def fetch_property(self, card):
+        """Extrait une annonce (URL, empreinte de vignette); retourne None en cas d'erreur"""
+        url, _ = card
+        try:
+            html = self.fetch(url)
+            with self.timings.span('parse'):
+                property_data = parse_property(html, url)
+            if needs_javascript(property_data) and self.js_fallback:
+                logger.info(f"Page rendue en JavaScript, repli Selenium: {url}")
+                property_data = parse_property(self.render(url), url)
+            property_data['url'] = property_data.get('url') or url
+            return property_data
+        except Exception as e:
+            logger.warning(f"Erreur sur l'annonce {url}: {e}")
+            return None
+
+    def listing_cards(self, page):
+        """(URL, empreinte de la vignette) des annonces d'une page de résultats"""
+        url = format_page_url(self.base_url, page, self.page_url_template)
+        try:
+            html = self.fetch(url)
+        except requests.HTTPError as e:
+            # Page au-delà de la dernière
+            if e.response is not None and e.response.status_code == 404:
+                return []
+            raise
+        cards = parse_listing_cards(html, url)
+        if not cards and self.js_fallback:
+            cards = parse_listing_cards(self.render(url), url)
+        return [(card_url, card_hash(text)) for card_url, text in cards]
+
+    def listing_urls(self, page):
+        """URLs des annonces d'une page de résultats"""
+        return [url for url, _ in self.listing_cards(page)]
+
+    def stream(self, autocommit=True):
+        """Annonces produites au fil du scraping (générateur), sans les garder en mémoire
+
+        Avec un index, une annonce n'est indexée qu'une fois reprise par le
+        consommateur (autocommit), ou quand commit_index le confirme
+        (scrape_into: après écriture par les sinks). Les pages de détail ne
+        sont plus téléchargées une fois max_ads annonces produites.
+        """
+        logger.info(f"Démarrage du scraping HTTP depuis {self.base_url}")
+
+        seen = set()
+        ads_count = 0
+        page, writer = 1, None
+        if self.index is not None:
+            page = self.index.load_checkpoint(self.base_url) + 1
+            if page > 1:
+                logger.info(f"Reprise du run interrompu à la page {page}")
+            writer = IndexWriter(self.index, self.base_url, page)
+        self.index_writer = writer
+        # Fin du catalogue atteinte (dernière page, page connue): sinon le
+        # point de reprise est gardé pour le run suivant
+        complete = False
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while ads_count < self.max_ads:
+                    logger.info(f"Scraping page {page}...")
+                    try:
+                        cards = self.listing_cards(page)
+                    except Exception as e:
+                        logger.error(f"Erreur lors du scraping de la page {page}: {e}")
+                        # Garder le point de reprise pour le prochain run
+                        break
+                    if not cards:
+                        logger.info("Dernière page atteinte")
+                        complete = True
+                        break
+                    if self.index is not None:
+                        known = [url for url, h in cards if self.index.is_unchanged(url, h)]
+                        self.index.touch(known)
+                        known = set(known)
+                        cards = [card for card in cards if card[0] not in known]
+                        if not cards:
+                            logger.info(f"Page {page} déjà connue, arrêt")
+                            complete = True
+                            break
+
+                    # Pas plus de pages de détail que d'annonces encore attendues
+                    while cards and ads_count < self.max_ads:
+                        batch, cards = cards[:self.max_ads - ads_count], cards[self.max_ads - ads_count:]
+                        for (url, content_hash), property_data in zip(
+                                batch, executor.map(self.fetch_property, batch)):
+                            if property_data is None:
+                                continue
+                            key = property_key(property_data)
+                            if key in seen:
+                                continue
+                            seen.add(key)
+
+                            ads_count += 1
+                            logger.info(f"Annonce {ads_count} extraite")
+                            if writer is not None:
+                                writer.add(url, content_hash, property_data)
+                            yield property_data
+                            if writer is not None and autocommit:
+                                writer.commit()
+                    if cards:
+                        # max_ads atteint en cours de page: page non terminée
+                        break
+                    if writer is not None:
+                        writer.page_done(page)
+                    page += 1
+
+            if writer is not None and complete:
+                writer.finish()
+            logger.info(f"Scraping terminé! {ads_count} annonces collectées")
+            self.timings.log_summary()
+
+        finally:
+            self.publish_metrics(ads_count)
+            self.close()
+
+    def commit_index(self, count=None):
+        """Indexe les count premières annonces du run en cours (défaut: toutes celles produites)"""
+        if self.index_writer is not None:
+            self.index_writer.commit(count)
+
+    def publish_metrics(self, ads_count):
+        """Reporte les compteurs et les temps du run dans src.metrics"""
+        metrics.inc("ads_scraped", ads_count, engine="http")
+        # Le navigateur de repli partage self.timings: seuls ses compteurs sont repris
+        if self.browser is not None:
+            metrics.add_counts(self.browser.stats, prefix="scraper_")
+        metrics.add_timings(self.timings, prefix="scrape_")
+
+    def scrape_into(self, sinks):
+        """Scrape en envoyant chaque annonce aux sinks (src.sinks); retourne leur nombre
+
+        Avec un index, une annonce n'est indexée qu'une fois écrite par tous les sinks.
+        """
+        return write_stream(self.stream(autocommit=False), sinks, on_written=self.commit_index)
+
+    def scrape(self):
+        """Lance le scraping"""
+        webhook = WebhookDelivery(WEBHOOK_URL).start() if WEBHOOK_URL else None
+        try:
+            for property_data in self.stream():
+                self.data.append(property_data)
+                if webhook is not None:
+                    webhook.submit(property_data)
+        finally:
+            if webhook is not None:
+                webhook.close()
+        return pd.DataFrame(self.data)
+
+    def close(self):
+        """Ferme la session HTTP et le navigateur de repli"""
+        self.session.close()
+        if self.browser is not None and self.browser.driver:
+            self.browser.driver.quit()
+            self.browser = None
+
+    def to_csv(self, filepath):
+        """Sauvegarde les données en CSV"""
+        df = pd.DataFrame(self.data)
+        df.to_csv(filepath, index=False, encoding='utf-8')
+        logger.info(f"Données sauvegardées dans {filepath}")
+        return df
+
+    def to_dataset(self, root=SCRAPE_OUTPUT_PATH):
+        """Ajoute les données au jeu Parquet partitionné par date et ville (src.storage)"""
+        df = pd.DataFrame(self.data)
+        write_dataset(df, root)
+        logger.info(f"Données sauvegardées dans {root}")
+        return df
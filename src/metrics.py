@@ -0,0 +1,210 @@
+"""
+Métriques d'exécution: temps par étape (spans) et compteurs
+
+Les points d'entrée du pipeline (lecture/écriture Sheets, prétraitement,
+encodage, prédiction par modèle, scraping, webhook) enregistrent ici leurs
+temps et compteurs. En fin de script, export() écrit un fichier JSON (à
+joindre à l'exécution n8n) ou un textfile Prometheus (chemin en .prom).
+
+Désactivé (METRICS_ENABLED=false), chaque appel se limite à un test
+d'attribut: span() retourne un contexte vide partagé.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+
+from configs.config import METRICS_ENABLED, METRICS_PATH, METRICS_RUN_ID
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+PROMETHEUS_PREFIX = "property_predictor"
+
+_NULL_SPAN = nullcontext()
+
+
+def metric_key(name, labels):
+    """Clé lisible d'une série: 'nom' ou 'nom{clé=valeur,...}'"""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def _prometheus_name(name):
+    return PROMETHEUS_PREFIX + "_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class Metrics:
+    """Registre de spans (appels, temps total, temps max) et de compteurs, partagé entre threads"""
+
+    def __init__(self, enabled=METRICS_ENABLED, run_id=METRICS_RUN_ID):
+        self.enabled = enabled
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}     # (nom, labels) -> [appels, total, max]
+            self.counters = {}  # (nom, labels) -> valeur
+            self.started_at = time.time()
+
+    def enable(self, run_id=None):
+        self.enabled = True
+        if run_id:
+            self.run_id = run_id
+        return self
+
+    def span(self, name, **labels):
+        """Contexte qui chronomètre une étape: with metrics.span("preprocess"): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, labels)
+
+    @contextmanager
+    def _span(self, name, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Décorateur: chronomètre chaque appel de la fonction sous le span name"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._span(name, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name, seconds, count=1, **labels):
+        """Ajoute une durée mesurée ailleurs (ex: dans un worker) au span name"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            stats = self.spans.get(key)
+            if stats is None:
+                self.spans[key] = [count, seconds, seconds / count if count else 0.0]
+            else:
+                stats[0] += count
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds / count if count else 0.0)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_counts(self, counts, prefix="", **labels):
+        """Reprend un Counter existant (ex: stats du scraper) sous forme de compteurs"""
+        if not self.enabled:
+            return
+        for name, value in counts.items():
+            self.inc(prefix + name, value, **labels)
+
+    def add_timings(self, timings, prefix="", **labels):
+        """Reprend les totaux d'un src.pacing.TimingStats sous forme de spans"""
+        if not self.enabled:
+            return
+        for name, stats in timings.summary().items():
+            self.observe(prefix + name, stats["total"], count=stats["count"], **labels)
+
+    def snapshot(self):
+        """Métriques courantes en dictionnaire sérialisable en JSON"""
+        with self._lock:
+            spans = {
+                metric_key(name, labels): {
+                    "count": count, "total_s": round(total, 6),
+                    "mean_s": round(total / count, 6) if count else 0.0, "max_s": round(peak, 6),
+                }
+                for (name, labels), (count, total, peak) in sorted(self.spans.items())
+            }
+            counters = {
+                metric_key(name, labels): value
+                for (name, labels), value in sorted(self.counters.items())
+            }
+        finished_at = time.time()
+        return {
+            "run_id": self.run_id,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(finished_at)),
+            "duration_s": round(finished_at - self.started_at, 3),
+            "spans": spans,
+            "counters": counters,
+        }
+
+    def to_prometheus(self):
+        """Format texte Prometheus (node_exporter textfile collector)"""
+        with self._lock:
+            spans = sorted(self.spans.items())
+            counters = sorted(self.counters.items())
+        run = _prometheus_labels((("run_id", self.run_id),))
+        lines = [
+            f"# TYPE {PROMETHEUS_PREFIX}_run_info gauge",
+            f"{PROMETHEUS_PREFIX}_run_info{run} 1",
+            f"# TYPE {PROMETHEUS_PREFIX}_run_timestamp_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_run_timestamp_seconds {time.time():.3f}",
+            f"# TYPE {PROMETHEUS_PREFIX}_run_duration_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_run_duration_seconds {time.time() - self.started_at:.3f}",
+        ]
+        if spans:
+            span_series = [(_prometheus_labels((("span", name),) + labels), stats)
+                           for (name, labels), stats in spans]
+            for metric, index, kind in (("span_calls_total", 0, "counter"),
+                                        ("span_seconds_total", 1, "counter"),
+                                        ("span_seconds_max", 2, "gauge")):
+                lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{metric} {kind}")
+                lines += [f"{PROMETHEUS_PREFIX}_{metric}{labels} {stats[index]:.6g}"
+                          for labels, stats in span_series]
+        declared = set()
+        for (name, labels), value in counters:
+            metric = _prometheus_name(name) + "_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_prometheus_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=METRICS_PATH):
+        """Écrit les métriques (JSON, ou Prometheus si path finit par .prom); None si désactivé"""
+        if not self.enabled or not path:
+            return None
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".prom":
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2, ensure_ascii=False) + "\n"
+        # Écriture atomique: le collecteur ne lit jamais un fichier partiel
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        tmp_path.replace(path)
+        logger.info(f"Métriques écrites dans {path}")
+        return path
+
+
+# Registre du processus, utilisé par tous les modules
+metrics = Metrics()
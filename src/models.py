@@ -2,89 +2,296 @@
 Module de prédiction avec les modèles ML
 """
 
-import os
-import joblib
+import threading
+import time
+import weakref
+from collections.abc import Mapping
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
-from configs.config import MODEL_DIR, MODELS
+from configs.config import (
+    MODEL_DIR, MODELS, PREDICT_N_JOBS, PREDICT_BACKEND, PREDICT_CHUNK_SIZE,
+    MODEL_LAZY_LOAD, MODEL_MMAP_MODE
+)
+from src.metrics import metrics
 from src.utils import get_logger
 
 logger = get_logger(__name__)
 
+# joblib et SciPy sont importés à l'usage: importer le module reste léger
+
+
+def _n_rows(X):
+    """Nombre de lignes de X (DataFrame, ndarray ou matrice SciPy)"""
+    return X.shape[0]
+
+
+def accepts_sparse(model):
+    """Indique si le modèle peut prédire sur une matrice SciPy creuse
+
+    Les modèles libsvm (SVR) entraînés sur des données denses refusent
+    une entrée creuse; les autres estimateurs sklearn l'acceptent.
+    """
+    return getattr(model, '_sparse', True) is not False
+
+
+def _predict_chunk(model_name, model, X, start, stop, step=None):
+    """Prédit les lignes start:stop avec un modèle, en isolant les erreurs
+
+    Avec step, les lignes sont prédites par blocs de step lignes dans le
+    worker (un seul envoi du modèle pour toutes les lignes). Retourne
+    aussi la durée: mesurée dans le worker, elle est agrégée dans les
+    métriques par le processus principal.
+    """
+    begin = time.perf_counter()
+    try:
+        step = step or max(stop - start, 1)
+        parts = []
+        for offset in range(start, max(stop, start + 1), step):
+            end = min(offset + step, stop)
+            chunk = X.iloc[offset:end] if hasattr(X, 'iloc') else X[offset:end]
+            parts.append(np.asarray(model.predict(chunk), dtype=float).ravel())
+        preds = np.concatenate(parts)
+        return model_name, start, preds, None, time.perf_counter() - begin
+    except Exception as e:
+        return model_name, start, None, e, time.perf_counter() - begin
+
+
+class LazyModelRegistry(Mapping):
+    """Dictionnaire de modèles chargés à la première utilisation
+
+    Avec mmap_mode='r', les tableaux numpy des pickles non compressés sont
+    projetés en mémoire et partagés entre les processus workers.
+    """
+    
+    def __init__(self, paths, mmap_mode=None):
+        self.paths = dict(paths)
+        self.mmap_mode = mmap_mode
+        self._loaded = {}
+        self._lock = threading.Lock()
+    
+    def __getitem__(self, model_name):
+        if model_name not in self.paths:
+            raise KeyError(model_name)
+        if model_name not in self._loaded:
+            with self._lock:
+                if model_name not in self._loaded:
+                    import joblib
+                    with metrics.span("model_load", model=model_name):
+                        self._loaded[model_name] = joblib.load(
+                            self.paths[model_name], mmap_mode=self.mmap_mode
+                        )
+                    logger.info(f"Modèle {model_name} chargé avec succès")
+        return self._loaded[model_name]
+    
+    def __iter__(self):
+        return iter(self.paths)
+    
+    def __len__(self):
+        return len(self.paths)
+    
+    def is_loaded(self, model_name):
+        """Indique si le modèle est déjà en mémoire"""
+        return model_name in self._loaded
+
 
 class PricePredictor:
     """Prédit les prix immobiliers avec plusieurs modèles"""
     
-    def __init__(self, model_dir=MODEL_DIR):
+    def __init__(self, model_dir=MODEL_DIR, n_jobs=PREDICT_N_JOBS,
+                 backend=PREDICT_BACKEND, chunk_size=PREDICT_CHUNK_SIZE,
+                 lazy=MODEL_LAZY_LOAD, mmap_mode=MODEL_MMAP_MODE, models=None):
         self.model_dir = Path(model_dir)
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.lazy = lazy
+        self.mmap_mode = mmap_mode
         self.models = {}
-        self.load_models()
+        self._cache = None
+        if models is not None:
+            # Modèles déjà en mémoire (ex: pipeline d'inférence fusionné)
+            self.models = dict(models)
+            if not self.models:
+                raise ValueError("Aucun modèle n'a pu être chargé!")
+        else:
+            self.load_models()
     
     def load_models(self):
-        """Charge tous les modèles"""
+        """Charge tous les modèles (ou les référence si le chargement est paresseux)"""
         logger.info("Chargement des modèles...")
+        self._cache = None
         
-        for model_name, model_file in MODELS.items():
-            model_path = self.model_dir / model_file
-            try:
-                self.models[model_name] = joblib.load(model_path)
-                logger.info(f"Modèle {model_name} chargé avec succès")
-            except Exception as e:
-                logger.error(f"Erreur lors du chargement de {model_name}: {e}")
+        if self.lazy:
+            paths = {}
+            for model_name, model_file in MODELS.items():
+                model_path = self.model_dir / model_file
+                if model_path.exists():
+                    paths[model_name] = model_path
+                else:
+                    logger.error(f"Erreur lors du chargement de {model_name}: fichier {model_path} introuvable")
+            self.models = LazyModelRegistry(paths, mmap_mode=self.mmap_mode)
+        else:
+            import joblib
+            self.models = {}
+            for model_name, model_file in MODELS.items():
+                model_path = self.model_dir / model_file
+                try:
+                    with metrics.span("model_load", model=model_name):
+                        self.models[model_name] = joblib.load(model_path, mmap_mode=self.mmap_mode)
+                    logger.info(f"Modèle {model_name} chargé avec succès")
+                except Exception as e:
+                    logger.error(f"Erreur lors du chargement de {model_name}: {e}")
         
         if not self.models:
             raise ValueError("Aucun modèle n'a pu être chargé!")
     
-    def predict(self, X):
-        """Prédit les prix avec tous les modèles"""
-        logger.info(f"Génération des prédictions pour {len(X)} propriétés...")
+    def _predict_matrix(self, X):
+        """Calcule une seule fois les prédictions de chaque modèle pour X
+
+        Retourne les noms des modèles, une matrice (n_modèles × n_lignes)
+        et les erreurs rencontrées par modèle. Le résultat est mis en cache
+        pour le dernier objet X (identité et forme, sans le hacher) afin
+        que predict, predict_ensemble et predict_with_confidence partagent
+        le même passage. Après une modification de X sur place, appeler
+        clear_cache(). Les méthodes publiques retournent des copies.
+        """
+        import joblib
+        from scipy import sparse
+        if self._cache is not None:
+            ref, shape, result = self._cache
+            if ref() is X and X.shape == shape:
+                return result
         
-        predictions = {}
+        names = list(self.models)
+        n_rows = _n_rows(X)
+        matrix = np.full((len(names), n_rows), np.nan)
+        errors = {}
         
-        for model_name, model in self.models.items():
+        # Résoudre les modèles (chargement paresseux) en isolant les erreurs
+        models = {}
+        for name in names:
             try:
-                preds = model.predict(X)
-                predictions[f"prix_predit_{model_name}"] = preds.flatten()
-                logger.info(f"Prédictions générées avec {model_name}")
+                models[name] = self.models[name]
             except Exception as e:
-                logger.error(f"Erreur avec {model_name}: {e}")
-                predictions[f"prix_predit_{model_name}"] = [None] * len(X)
+                errors[name] = e
+        
+        step = max(int(self.chunk_size), 1)
+        if self.n_jobs == 1:
+            tasks = [(name, 0, n_rows, None) for name in models]
+        elif self.backend == "threading":
+            # Mémoire partagée: les blocs de lignes se répartissent entre les threads
+            tasks = [
+                (name, start, min(start + step, n_rows), None)
+                for name in models
+                for start in range(0, max(n_rows, 1), step)
+            ]
+        else:
+            # Processus: chaque modèle n'est sérialisé qu'une fois, le worker
+            # découpe lui-même les lignes en blocs
+            tasks = [(name, 0, n_rows, step) for name in models]
+        
+        # Entrée creuse: repli dense (calculé une fois) pour les modèles qui ne l'acceptent pas
+        inputs = {name: X for name in models}
+        if sparse.issparse(X):
+            X_dense = None
+            for name, model in models.items():
+                if not accepts_sparse(model):
+                    if X_dense is None:
+                        X_dense = X.toarray()
+                    inputs[name] = X_dense
+        
+        results = joblib.Parallel(n_jobs=self.n_jobs, backend=self.backend)(
+            joblib.delayed(_predict_chunk)(name, models[name], inputs[name], start, stop, chunk_step)
+            for name, start, stop, chunk_step in tasks
+        )
+        
+        rows = {name: i for i, name in enumerate(names)}
+        for model_name, start, preds, error, seconds in results:
+            metrics.observe("model_predict", seconds, model=model_name)
+            if error is not None:
+                errors.setdefault(model_name, error)
+            else:
+                matrix[rows[model_name], start:start + len(preds)] = preds
+        
+        for model_name in names:
+            if model_name in errors:
+                logger.error(f"Erreur avec {model_name}: {errors[model_name]}")
+                matrix[rows[model_name]] = np.nan
+            else:
+                logger.info(f"Prédictions générées avec {model_name}")
+        
+        result = (names, matrix, errors)
+        try:
+            # Référence faible: le cache ne garde pas X en mémoire
+            self._cache = (weakref.ref(X), X.shape, result)
+        except TypeError:
+            self._cache = None
+        return result
+    
+    def _valid_matrix(self, X):
+        """Retourne la matrice de prédictions, en échouant si un modèle a échoué"""
+        names, matrix, errors = self._predict_matrix(X)
+        if errors:
+            model_name, error = next(iter(errors.items()))
+            raise RuntimeError(f"Erreur avec {model_name}: {error}") from error
+        return list(names), matrix.copy()
+    
+    def predict_matrix(self, X, return_errors=False):
+        """Matrice (n_modèles × n_lignes) des prédictions, NaN pour un modèle en erreur
+
+        return_errors=True ajoute les noms des modèles en erreur.
+        """
+        names, matrix, errors = self._predict_matrix(X)
+        if return_errors:
+            return list(names), matrix.copy(), set(errors)
+        return list(names), matrix.copy()
+    
+    @metrics.timed("predict")
+    def predict(self, X):
+        """Prédit les prix avec tous les modèles"""
+        logger.info(f"Génération des prédictions pour {_n_rows(X)} propriétés...")
+        metrics.inc("rows_predicted", _n_rows(X))
+        
+        names, matrix, errors = self._predict_matrix(X)
+        
+        predictions = {}
+        for i, model_name in enumerate(names):
+            if model_name in errors:
+                predictions[f"prix_predit_{model_name}"] = [None] * _n_rows(X)
+            else:
+                predictions[f"prix_predit_{model_name}"] = matrix[i].copy()
         
         return predictions
     
     def predict_ensemble(self, X, weights=None):
         """Prédit avec une moyenne pondérée des modèles"""
-        if weights is None:
-            weights = {model: 1/len(self.models) for model in self.models}
+        names, matrix = self._valid_matrix(X)
         
-        ensemble_pred = np.zeros(len(X))
-        
-        for model_name, model in self.models.items():
-            weight = weights.get(model_name, 1/len(self.models))
-            preds = model.predict(X)
-            ensemble_pred += weight * preds
+        if weights is None:
+            weights = {}
+        w = np.array([weights.get(name, 1/len(names)) for name in names])
         
-        return ensemble_pred
+        return w @ matrix
     
     def predict_with_confidence(self, X):
         """Prédit avec un intervalle de confiance (écart-type)"""
-        all_predictions = []
-        
-        for model_name, model in self.models.items():
-            preds = model.predict(X)
-            all_predictions.append(preds)
+        _, matrix = self._valid_matrix(X)
         
-        all_predictions = np.array(all_predictions)
-        mean_pred = np.mean(all_predictions, axis=0)
-        std_pred = np.std(all_predictions, axis=0)
+        mean_pred = matrix.mean(axis=0)
+        std_pred = matrix.std(axis=0)
         
         return {
             'predictions': mean_pred,
             'lower_bound': mean_pred - 1.96 * std_pred,
             'upper_bound': mean_pred + 1.96 * std_pred
         }
+    
+    def clear_cache(self):
+        """Vide le cache des prédictions (à appeler si X est modifié sur place)"""
+        self._cache = None
 
 
 class ModelEvaluator:
@@ -130,9 +337,26 @@ if __name__ == "__main__":
     # Exemple d'utilisation
     from src.preprocessor import DataPreprocessor
     
-    # Charger les données
-    df = pd.read_csv("data/processed/prepared_data.csv")
-    X = df.drop(columns=['prix_dh'])
+    from configs.config import (
+        PROCESSED_DATA_PATH, ENCODER_FILE, SCALER_FILE, FEATURES_COLUMNS_FILE, BOOL_COLUMNS_FILE,
+        NUMERIC_FILL_FILE
+    )
+    from src.storage import read_dataset
+    
+    # Charger les données prétraitées (Parquet partitionné écrit par DataPreprocessor.preprocess_dataset)
+    df = read_dataset(PROCESSED_DATA_PATH)
+    
+    # Encoder et normaliser avec les transformateurs de l'entraînement
+    model_dir = Path(MODEL_DIR)
+    preprocessor = DataPreprocessor()
+    preprocessor.load_transformers(
+        model_dir / ENCODER_FILE,
+        model_dir / SCALER_FILE,
+        model_dir / FEATURES_COLUMNS_FILE,
+        model_dir / BOOL_COLUMNS_FILE,
+        model_dir / NUMERIC_FILL_FILE
+    )
+    X, _ = preprocessor.encode_and_scale(df)
     
     # Prédire
     predictor = PricePredictor()
@@ -0,0 +1,171 @@
+"""
+Cadence du scraping: limite de débit, attentes sur conditions réelles,
+statistiques de sélecteurs et mesures de temps
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Stratégies de localisation Selenium (valeurs de By): importer
+# selenium.webdriver.common.by charge selenium.webdriver et tous ses pilotes
+CSS_SELECTOR = "css selector"
+XPATH = "xpath"
+TAG_NAME = "tag name"
+
+# Intervalle d'interrogation des attentes (WebDriverWait: 0,5 s par défaut)
+POLL_FREQUENCY = 0.1
+
+
+class RateLimiter:
+    """Intervalle minimal (plus une part aléatoire) entre deux requêtes, sûr entre threads"""
+
+    def __init__(self, min_interval=0.0, jitter=0.0):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Bloque jusqu'au prochain créneau disponible; retourne le temps attendu"""
+        if self.min_interval <= 0:
+            return 0.0
+        interval = self.min_interval * (1 + random.uniform(0, self.jitter))
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class SelectorStats:
+    """Taux de succès par sélecteur, pour essayer d'abord ceux qui trouvent
+
+    Un sélecteur qui n'a jamais trouvé après min_trials essais est ignoré
+    lors de la recherche immédiate; un champ rarement présent n'est plus
+    attendu.
+    """
+
+    def __init__(self, min_trials=20, wait_threshold=0.5):
+        self.min_trials = min_trials
+        self.wait_threshold = wait_threshold
+        self.selectors = defaultdict(lambda: [0, 0])  # (champ, sélecteur) -> [succès, essais]
+        self.fields = defaultdict(lambda: [0, 0])     # champ -> [trouvé, essais]
+        self._lock = threading.Lock()
+
+    def record(self, field, selector, hit):
+        with self._lock:
+            counts = self.selectors[(field, selector)]
+            counts[0] += int(hit)
+            counts[1] += 1
+
+    def record_field(self, field, found):
+        with self._lock:
+            counts = self.fields[field]
+            counts[0] += int(found)
+            counts[1] += 1
+
+    def hit_rate(self, field, selector):
+        hits, trials = self.selectors.get((field, selector), (0, 0))
+        # Sélecteur jamais essayé: taux neutre pour conserver l'ordre d'origine
+        return hits / trials if trials else 0.5
+
+    def is_dead(self, field, selector):
+        hits, trials = self.selectors.get((field, selector), (0, 0))
+        return trials >= self.min_trials and hits == 0
+
+    def order(self, field, selectors):
+        """Sélecteurs actifs triés par taux de succès décroissant (tri stable)"""
+        active = [s for s in selectors if not self.is_dead(field, s)]
+        return sorted(active, key=lambda s: -self.hit_rate(field, s))
+
+    def should_wait(self, field):
+        """Attendre un champ absent seulement s'il est habituellement présent"""
+        found, trials = self.fields.get(field, (0, 0))
+        return trials < self.min_trials or found / trials >= self.wait_threshold
+
+    def summary(self):
+        with self._lock:
+            return {
+                f"{field} {selector}": {"hits": hits, "trials": trials}
+                for (field, selector), (hits, trials) in self.selectors.items()
+            }
+
+
+class TimingStats:
+    """Temps cumulé et nombre d'appels par étape du scraping"""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.totals[name] += seconds
+            self.counts[name] += 1
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: {"total": round(total, 3), "count": self.counts[name],
+                       "mean": round(total / self.counts[name], 4)}
+                for name, total in sorted(self.totals.items(), key=lambda kv: -kv[1])
+            }
+
+    def log_summary(self):
+        for name, stats in self.summary().items():
+            logger.info(f"Temps {name}: {stats['total']}s sur {stats['count']} appels "
+                        f"(moyenne {stats['mean']}s)")
+
+
+def wait_until(driver, condition, timeout):
+    """WebDriverWait avec interrogation fine; retourne le résultat ou None si délai dépassé"""
+    # Importé à l'usage: selenium.webdriver.support charge tout le client WebDriver distant
+    from selenium.webdriver.support.ui import WebDriverWait
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+    except Exception:
+        return None
+
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def wait_for_ready(driver, timeout):
+    """Attend que le document soit entièrement chargé"""
+    return wait_until(driver, document_ready, timeout) is not None
+
+
+def wait_for_navigation(driver, old_root, timeout):
+    """Attend qu'une navigation par clic remplace la page puis que la nouvelle soit chargée"""
+    if old_root is not None:
+        from selenium.webdriver.support import expected_conditions as EC
+        wait_until(driver, EC.staleness_of(old_root), timeout)
+    return wait_for_ready(driver, timeout)
+
+
+def page_root(driver):
+    """Élément racine de la page courante, pour détecter sa disparition"""
+    try:
+        return driver.find_element(TAG_NAME, "html")
+    except Exception:
+        return None
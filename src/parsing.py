@@ -0,0 +1,98 @@
+"""
+Analyse HTML des pages d'annonces, partagée par les moteurs de scraping
+"""
+
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from configs.config import EXTRAS_LIST, HTML_PARSER
+
+# Sélecteurs CSS de chaque champ, essayés dans l'ordre
+FIELD_SELECTORS = {
+    'titre': ['.listing-title', '.ad-title', 'h1'],
+    'prix': ['.price', '.listing-price', '[data-price]'],
+    'surface': ['.surface', '[data-surface]', '.area'],
+    'pièces': ['.rooms', '[data-rooms]'],
+    'chambres': ['.bedrooms', '[data-bedrooms]'],
+    'salles_de_bain': ['.bathrooms', '[data-bathrooms]'],
+    'localisation': ['.location', '[data-location]', '.address'],
+    'type_bien': ['.property-type', '[data-type]'],
+}
+LISTING_SELECTOR = '.listing-item'
+URL_SELECTOR = 'a[href*="/listing/"]'
+LISTING_URL_ATTRIBUTES = ['href', 'linkref', 'data-url']
+
+# Un seul motif pour tous les extras (les plus longs d'abord)
+EXTRAS_PATTERN = re.compile(
+    "|".join(re.escape(extra) for extra in sorted(EXTRAS_LIST, key=len, reverse=True))
+)
+
+
+def make_soup(html, parser=HTML_PARSER):
+    """Construit l'arbre HTML avec le parseur configuré"""
+    return BeautifulSoup(html, parser)
+
+
+def element_text(element):
+    """Texte d'un élément, espaces normalisés comme WebElement.text"""
+    return " ".join(element.get_text(" ").split())
+
+
+def find_extras(soup):
+    """Extras présents dans les nœuds texte de la page (un seul passage)"""
+    found = set()
+    for text in soup.find_all(string=True):
+        found.update(EXTRAS_PATTERN.findall(text))
+    return found
+
+
+def parse_property(html, page_url=None, parser=HTML_PARSER):
+    """Extrait une annonce d'une page HTML, au format de PropertyScraper.extract_property"""
+    soup = html if isinstance(html, BeautifulSoup) else make_soup(html, parser)
+    property_data = {}
+
+    for field, selectors in FIELD_SELECTORS.items():
+        value = None
+        for selector in selectors:
+            element = soup.select_one(selector)
+            if element is not None:
+                value = element_text(element)
+                break
+        property_data[field] = value
+
+        # URL juste après la localisation, comme dans extract_property
+        if field == 'localisation':
+            link = soup.select_one(URL_SELECTOR)
+            property_data['url'] = urljoin(page_url or '', link['href']) if link else None
+
+    extras = find_extras(soup)
+    for extra in EXTRAS_LIST:
+        property_data[extra] = 1 if extra in extras else 0
+
+    return property_data
+
+
+def parse_listing_cards(html, page_url, parser=HTML_PARSER):
+    """(URL absolue, texte de la vignette) de chaque annonce d'une page de résultats"""
+    soup = html if isinstance(html, BeautifulSoup) else make_soup(html, parser)
+    cards = []
+    for listing in soup.select(LISTING_SELECTOR):
+        url = next((listing.get(attr) for attr in LISTING_URL_ATTRIBUTES if listing.get(attr)), None)
+        if not url:
+            link = listing.select_one('a[href]')
+            url = link['href'] if link else None
+        if url:
+            cards.append((urljoin(page_url, url), element_text(listing)))
+    return cards
+
+
+def parse_listing_urls(html, page_url, parser=HTML_PARSER):
+    """URLs absolues des annonces d'une page de résultats"""
+    return [url for url, _ in parse_listing_cards(html, page_url, parser)]
+
+
+def needs_javascript(property_data):
+    """Vrai si la page semble rendue côté client (ni titre ni prix dans le HTML)"""
+    return not property_data.get('titre') and not property_data.get('prix')
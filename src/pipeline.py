@@ -0,0 +1,119 @@
+"""
+Pipeline d'inférence fusionné
+
+Regroupe l'encodeur, le scaler, l'ordre des colonnes, le schéma booléen et
+tous les modèles dans un seul artefact versionné, chargé en un appel.
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+
+from configs.config import (
+    MODEL_DIR, ENCODER_FILE, SCALER_FILE, FEATURES_COLUMNS_FILE, BOOL_COLUMNS_FILE,
+    NUMERIC_FILL_FILE, PIPELINE_FILE
+)
+from src.preprocessor import DataPreprocessor
+from src.models import PricePredictor
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Version du format de l'artefact (à incrémenter si sa structure change)
+PIPELINE_FORMAT_VERSION = 1
+
+
+class InferencePipeline:
+    """Transforme un DataFrame brut en matrice de prédictions"""
+
+    def __init__(self, preprocessor, predictor, version=None, created_at=None):
+        self.preprocessor = preprocessor
+        self.predictor = predictor
+        self.created_at = created_at or time.time()
+        self.version = version or time.strftime("%Y%m%d%H%M%S", time.localtime(self.created_at))
+
+    @classmethod
+    def from_model_dir(cls, model_dir=MODEL_DIR, version=None):
+        """Construit le pipeline à partir des fichiers séparés de model_dir"""
+        model_dir = Path(model_dir)
+        preprocessor = DataPreprocessor()
+        preprocessor.load_transformers(
+            model_dir / ENCODER_FILE,
+            model_dir / SCALER_FILE,
+            model_dir / FEATURES_COLUMNS_FILE,
+            model_dir / BOOL_COLUMNS_FILE,
+            model_dir / NUMERIC_FILL_FILE
+        )
+        predictor = PricePredictor(model_dir=model_dir, lazy=False)
+        return cls(preprocessor, predictor, version=version)
+
+    def save(self, path):
+        """Exporte le pipeline complet dans un seul fichier"""
+        artifact = {
+            "format_version": PIPELINE_FORMAT_VERSION,
+            "version": self.version,
+            "created_at": self.created_at,
+            "encoder": self.preprocessor.encoder,
+            "scaler": self.preprocessor.scaler,
+            "features_columns": self.preprocessor.features_columns,
+            "bool_columns": self.preprocessor.bool_columns,
+            "numeric_fill": self.preprocessor.numeric_fill,
+            "models": {name: self.predictor.models[name] for name in self.predictor.models},
+        }
+        import joblib
+        joblib.dump(artifact, path)
+        logger.info(f"Pipeline d'inférence v{self.version} exporté dans {path}")
+
+    @classmethod
+    def load(cls, path, **predictor_kwargs):
+        """Charge le pipeline en un seul appel"""
+        import joblib
+        artifact = joblib.load(path)
+        if artifact.get("format_version") != PIPELINE_FORMAT_VERSION:
+            raise ValueError(
+                f"Format de pipeline {artifact.get('format_version')} non supporté "
+                f"(attendu {PIPELINE_FORMAT_VERSION})"
+            )
+
+        preprocessor = DataPreprocessor()
+        preprocessor.encoder = artifact["encoder"]
+        preprocessor.scaler = artifact["scaler"]
+        preprocessor.features_columns = artifact["features_columns"]
+        preprocessor.bool_columns = artifact["bool_columns"]
+        # Absent des artefacts exportés avant les médianes d'imputation
+        preprocessor.numeric_fill = artifact.get("numeric_fill")
+
+        predictor = PricePredictor(models=artifact["models"], **predictor_kwargs)
+        logger.info(f"Pipeline d'inférence v{artifact['version']} chargé")
+        return cls(preprocessor, predictor, version=artifact["version"],
+                   created_at=artifact["created_at"])
+
+    def transform(self, df_raw, sparse=False, dtype=np.float64):
+        """Prétraite df_raw et écrit ses features dans l'ordre des modèles
+
+        Retourne (features, prix_reel, df_clean); df_raw n'est pas modifié.
+        """
+        df_clean = self.preprocessor.preprocess(df_raw)
+        if sparse:
+            features, prix_reel = self.preprocessor.encode_and_scale(df_clean, sparse=True)
+        else:
+            features, prix_reel = self.preprocessor.encode_and_scale(
+                df_clean.copy(deep=False), copy=False, dtype=dtype
+            )
+        return features, prix_reel, df_clean
+
+    def predict_matrix(self, df_raw, sparse=False):
+        """DataFrame brut -> (noms des modèles, matrice n_modèles × n_lignes)"""
+        features, _, _ = self.transform(df_raw, sparse=sparse)
+        return self.predictor.predict_matrix(features)
+
+    def predict(self, df_raw, sparse=False):
+        """Prédictions par modèle (comme PricePredictor.predict), prix réel et données nettoyées"""
+        features, prix_reel, df_clean = self.transform(df_raw, sparse=sparse)
+        return self.predictor.predict(features), prix_reel, df_clean
+
+
+def pipeline_path(model_dir=MODEL_DIR):
+    """Chemin de l'artefact fusionné dans model_dir"""
+    return Path(model_dir) / PIPELINE_FILE
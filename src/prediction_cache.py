@@ -0,0 +1,278 @@
+"""
+Cache persistant des prédictions par ligne de features
+
+Base SQLite indexée par l'empreinte de la ligne de features normalisée
+(celle que reçoivent les modèles), salée par l'empreinte des pickles de
+MODEL_DIR: un modèle ou un transformateur modifié rend toutes les
+entrées obsolètes, purgées à l'ouverture suivante. Taille bornée, les
+entrées les moins récemment utilisées sont évincées en premier.
+
+Les annonces reviennent d'un run à l'autre dans l'onglet d'entrée: seules
+les lignes absentes du cache passent par PricePredictor.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from configs.config import MODEL_DIR, PREDICTION_CACHE_PATH, PREDICTION_CACHE_MAX_ENTRIES
+from src.metrics import metrics
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    key BLOB PRIMARY KEY,
+    value BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Paramètres par requête SQLite (limite historique: 999)
+_SQL_BATCH = 900
+# Lignes densifiées à la fois pour hacher une matrice creuse
+_SPARSE_BLOCK_ROWS = 10000
+
+
+def model_dir_fingerprint(model_dir=MODEL_DIR):
+    """Empreinte (nom, taille, date de modification) de tous les pickles de model_dir"""
+    digest = hashlib.blake2b(digest_size=32)
+    for path in sorted(Path(model_dir).glob("*.pkl")):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _normalized_rows(X):
+    """Lignes de X en float64 contigus, -0.0 et NaN sous une forme unique"""
+    rows = np.array(X, dtype=np.float64, order="C", copy=True)
+    rows += 0.0  # -0.0 -> 0.0
+    rows[np.isnan(rows)] = np.nan
+    return rows.reshape(len(rows), -1)
+
+
+def row_hashes(X, salt=b""):
+    """Empreinte de chaque ligne de X (DataFrame, ndarray ou matrice SciPy)
+
+    Une même ligne a la même empreinte quel que soit le format de X.
+    salt (64 octets max) distingue les versions de modèles.
+    """
+    if hasattr(X, "toarray"):
+        return [
+            key
+            for start in range(0, X.shape[0], _SPARSE_BLOCK_ROWS)
+            for key in row_hashes(X[start:start + _SPARSE_BLOCK_ROWS].toarray(), salt)
+        ]
+    rows = _normalized_rows(X)
+    if rows.shape[1] == 0:
+        return [hashlib.blake2b(b"", digest_size=16, key=salt).digest()] * len(rows)
+    records = rows.view(np.dtype((np.void, rows.shape[1] * rows.itemsize))).ravel()
+    return [hashlib.blake2b(record.tobytes(), digest_size=16, key=salt).digest()
+            for record in records]
+
+
+def take_rows(X, positions):
+    """Sous-ensemble de lignes de X (DataFrame, ndarray ou matrice SciPy)"""
+    if hasattr(X, "iloc"):
+        return X.iloc[positions]
+    return X[positions]
+
+
+class PredictionCache:
+    """Cache SQLite des prédictions (un flottant par modèle) par empreinte de ligne"""
+
+    def __init__(self, path=PREDICTION_CACHE_PATH, model_dir=MODEL_DIR,
+                 max_entries=PREDICTION_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.version = model_dir_fingerprint(model_dir)
+        self._salt = bytes.fromhex(self.version)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.model_names = None
+        self._check_version()
+
+    def _check_version(self):
+        """Purge le cache si les pickles de MODEL_DIR ont changé depuis son écriture"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is not None and row[0] == self.version:
+                names = self._conn.execute(
+                    "SELECT value FROM meta WHERE name = 'models'"
+                ).fetchone()
+                self.model_names = names[0].split(",") if names and names[0] else None
+                return
+            if row is not None:
+                logger.info("Modèles modifiés depuis la dernière exécution, cache des prédictions vidé")
+            self._conn.execute("DELETE FROM predictions")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.execute("INSERT INTO meta (name, value) VALUES ('version', ?)", (self.version,))
+
+    def _set_model_names(self, names):
+        """Modèles (dans l'ordre des valeurs stockées); un autre jeu de modèles vide le cache"""
+        names = list(names)
+        if names == self.model_names:
+            return
+        with self._lock, self._conn:
+            if self.model_names is not None:
+                self._conn.execute("DELETE FROM predictions")
+            self._conn.execute(
+                """INSERT INTO meta (name, value) VALUES ('models', ?)
+                   ON CONFLICT(name) DO UPDATE SET value = excluded.value""",
+                (",".join(names),)
+            )
+        self.model_names = names
+
+    def keys(self, X):
+        """Clés de cache des lignes de X pour la version courante des modèles"""
+        return row_hashes(X, self._salt)
+
+    def get_many(self, keys):
+        """{clé: prédictions (tableau, une valeur par modèle)} des clés présentes"""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), _SQL_BATCH):
+                batch = unique[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT key, value FROM predictions WHERE key IN ({placeholders})", batch
+                ).fetchall())
+            # Date d'utilisation mise à jour pour l'éviction LRU
+            if found:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE predictions SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+        return {key: np.frombuffer(value, dtype=np.float64) for key, value in found.items()}
+
+    def put_many(self, keys, names, matrix):
+        """Enregistre les prédictions (matrice n_modèles × n_lignes) des lignes keys
+
+        Les lignes où un modèle a échoué (NaN) ne sont pas mises en cache.
+        """
+        self._set_model_names(names)
+        matrix = np.asarray(matrix, dtype=np.float64)
+        # Une ligne contiguë par annonce
+        values = np.ascontiguousarray(matrix.T)
+        valid = ~np.isnan(values).any(axis=1)
+        now = time.time()
+        entries = [(keys[i], values[i].tobytes(), now) for i in np.flatnonzero(valid)]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions (key, value, last_used) VALUES (?, ?, ?)",
+                entries
+            )
+        self.evict()
+        return len(entries)
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_entries"""
+        if not self.max_entries or self.max_entries <= 0:
+            return 0
+        with self._lock, self._conn:
+            excess = len(self) - self.max_entries
+            if excess <= 0:
+                return 0
+            self._conn.execute(
+                """DELETE FROM predictions WHERE key IN (
+                       SELECT key FROM predictions ORDER BY last_used LIMIT ?)""",
+                (excess,)
+            )
+        metrics.inc("prediction_cache_evictions", excess)
+        return excess
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM predictions")
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedPredictor:
+    """PricePredictor derrière un PredictionCache: seules les lignes absentes sont prédites
+
+    predictor peut être une instance ou une fonction qui la construit: les
+    modèles ne sont alors chargés qu'au premier défaut de cache.
+    """
+
+    def __init__(self, predictor, cache):
+        self._predictor = predictor
+        self.cache = cache
+
+    @property
+    def predictor(self):
+        if callable(self._predictor):
+            self._predictor = self._predictor()
+        return self._predictor
+
+    def predict_matrix(self, X, return_errors=False):
+        """(noms des modèles, matrice n_modèles × n_lignes), NaN pour un modèle en erreur
+
+        return_errors=True ajoute les noms des modèles en erreur sur les
+        lignes prédites (le cache ne contient que des lignes sans erreur).
+        """
+        keys = self.cache.keys(X)
+        cached = self.cache.get_many(keys)
+        misses = [i for i, key in enumerate(keys) if key not in cached]
+        metrics.inc("prediction_cache_hits", len(keys) - len(misses))
+        metrics.inc("prediction_cache_misses", len(misses))
+        logger.info(f"Cache des prédictions: {len(keys) - len(misses)} lignes trouvées, "
+                    f"{len(misses)} à prédire")
+
+        names = self.cache.model_names
+        fresh, errors = None, set()
+        if misses:
+            fresh_names, fresh, errors = self.predictor.predict_matrix(
+                take_rows(X, misses), return_errors=True
+            )
+            if cached and list(fresh_names) != names:
+                # Jeu de modèles différent de celui du cache: tout repredire
+                misses = list(range(len(keys)))
+                cached = {}
+                fresh_names, fresh, errors = self.predictor.predict_matrix(X, return_errors=True)
+            names = list(fresh_names)
+            self.cache.put_many([keys[i] for i in misses], names, fresh)
+
+        matrix = np.full((len(names or []), len(keys)), np.nan)
+        if fresh is not None:
+            matrix[:, misses] = fresh
+        for i, key in enumerate(keys):
+            value = cached.get(key)
+            if value is not None:
+                matrix[:, i] = value
+        if return_errors:
+            return names or [], matrix, errors
+        return names or [], matrix
+
+    @metrics.timed("predict")
+    def predict(self, X):
+        """Prédit les prix avec tous les modèles (même sortie que PricePredictor.predict)
+
+        Un modèle en erreur donne une colonne de None, comme PricePredictor.predict.
+        """
+        names, matrix, errors = self.predict_matrix(X, return_errors=True)
+        return {
+            f"prix_predit_{name}": [None] * matrix.shape[1] if name in errors else matrix[i]
+            for i, name in enumerate(names)
+        }
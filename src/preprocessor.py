@@ -3,19 +3,62 @@ Module de prétraitement des données
 """
 
 import re
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-import joblib
 
 from configs.config import (
     NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, COLUMNS_TO_DROP,
-    PRICE_MIN, PRICE_MAX, SURFACE_MIN, SURFACE_MAX
+    PRICE_MIN, PRICE_MAX, SURFACE_MIN, SURFACE_MAX,
+    SCRAPE_OUTPUT_PATH, PROCESSED_DATA_PATH, STORAGE_BATCH_ROWS
 )
+from src.metrics import metrics
+from src.storage import iter_dataset, open_dataset, processed_schema, read_dataset, write_dataset
 from src.utils import get_logger, PropertyScraper
 
 logger = get_logger(__name__)
 
+TRUE_VALUES = ["TRUE", "True", True, 1]
+FALSE_VALUES = ["FALSE", "False", False, 0]
+EUR_TO_DH = 10.5
+_PRICE_DH_PATTERN = r'(\d[\d\s]*) ?DH'
+_PRICE_EUR_PATTERN = r'(\d[\d\s]*) ?EUR'
+
+
+def _to_float(value):
+    """float() tolérant, NaN en cas d'échec"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _digits_to_float(matches):
+    """Convertit des groupes '1 200 000' capturés par regex en float"""
+    # Séparateurs de milliers: espace, espace insécable, tabulation...
+    digits = matches.str.replace(r'\s', '', regex=True)
+    try:
+        return digits.to_numpy(dtype=float)
+    except ValueError:
+        return pd.to_numeric(digits, errors='coerce').to_numpy(dtype=float)
+
+
+def _factorize(values):
+    """pd.factorize qui distingue True/False de 1/0 (égaux pour un dict Python)
+
+    Les booléens d'une colonne object mélangée sont remplacés par leur
+    texte, ce que les fonctions de nettoyage en font de toute façon.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    if values.dtype == object and any(not isinstance(u, str) and u in (0, 1) for u in uniques):
+        is_bool = np.fromiter((isinstance(v, (bool, np.bool_)) for v in values), bool, len(values))
+        if is_bool.any() and not is_bool.all():
+            values = values.copy()
+            values[is_bool] = values[is_bool].astype(str)
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    return codes, uniques
+
 
 class DataPreprocessor:
     """Prétraite les données immobilières"""
@@ -24,6 +67,10 @@ class DataPreprocessor:
         self.encoder = None
         self.scaler = None
         self.features_columns = None
+        self.bool_columns = None
+        # Valeurs d'imputation des colonnes numériques, fixées au fit
+        self.numeric_fill = None
+        self._warned_numeric_fill = False
     
     def clean_price(self, prix):
         """Nettoie et convertit le prix en DH"""
@@ -35,11 +82,11 @@ class DataPreprocessor:
         if 'DH' in prix_str:
             match = re.search(r'(\d[\d\s]*) ?DH', prix_str)
             if match:
-                return float(match.group(1).replace(" ", ""))
+                return float(re.sub(r'\s', '', match.group(1)))
         elif 'EUR' in prix_str:
             match = re.search(r'(\d[\d\s]*) ?EUR', prix_str)
             if match:
-                return float(match.group(1).replace(" ", "")) * 10.5
+                return float(re.sub(r'\s', '', match.group(1))) * EUR_TO_DH
         
         try:
             return float(prix_str)
@@ -53,31 +100,117 @@ class DataPreprocessor:
         digits = re.sub(r'\D', '', str(val))
         return int(digits) if digits else np.nan
     
+    def clean_price_series(self, prix):
+        """Version vectorisée de clean_price sur une Series entière
+
+        Le nettoyage est calculé une seule fois par valeur distincte
+        (pd.factorize) puis rediffusé sur les lignes.
+        """
+        prix = pd.Series(prix)
+        if pd.api.types.is_numeric_dtype(prix) and not pd.api.types.is_bool_dtype(prix):
+            return prix.astype(float)
+        
+        codes, uniques = _factorize(prix)
+        # dtype object: regex Python (et non pyarrow) pour garder la sémantique de re
+        prix_str = pd.Series(uniques, dtype=object).astype(str).astype(object)
+        cleaned = np.full(len(prix_str), np.nan)
+        
+        has_dh = prix_str.str.contains('DH', regex=False).to_numpy(dtype=bool)
+        has_eur = ~has_dh & prix_str.str.contains('EUR', regex=False).to_numpy(dtype=bool)
+        
+        dh = prix_str[has_dh].str.extract(_PRICE_DH_PATTERN, expand=False)
+        eur = prix_str[has_eur].str.extract(_PRICE_EUR_PATTERN, expand=False)
+        dh_matched = np.flatnonzero(has_dh)[dh.notna().to_numpy()]
+        eur_matched = np.flatnonzero(has_eur)[eur.notna().to_numpy()]
+        
+        cleaned[dh_matched] = _digits_to_float(dh.dropna())
+        cleaned[eur_matched] = _digits_to_float(eur.dropna()) * EUR_TO_DH
+        
+        # Repli float() sur les valeurs sans motif DH/EUR reconnu
+        fallback = np.ones(len(prix_str), dtype=bool)
+        fallback[dh_matched] = False
+        fallback[eur_matched] = False
+        cleaned[fallback] = [_to_float(v) for v in prix_str[fallback]]
+        
+        result = np.where(codes >= 0, cleaned[codes], np.nan) if len(cleaned) else np.full(len(prix), np.nan)
+        return pd.Series(result, index=prix.index, dtype=float)
+    
+    def clean_surface_series(self, surface):
+        """Version vectorisée de clean_surface sur une Series entière"""
+        surface = pd.Series(surface)
+        
+        codes, uniques = _factorize(surface)
+        digits = pd.Series(uniques, dtype=object).astype(str).astype(object).str.replace(
+            r'\D', '', regex=True
+        )
+        cleaned = pd.to_numeric(digits.where(digits != ''), errors='coerce').to_numpy(dtype=float, copy=True)
+        # Chiffres non ASCII (int() les accepte, pas to_numeric) et entiers
+        # trop longs pour être parsés exactement en float
+        missing = (np.isnan(cleaned) | (digits.str.len() > 15).to_numpy()) & (digits != '').to_numpy()
+        if missing.any():
+            # Entiers Python exacts, comme clean_surface
+            cleaned = cleaned.astype(object)
+            cleaned[missing] = [int(d) for d in digits[missing]]
+        
+        if len(cleaned) == 0:
+            return pd.Series(np.nan, index=surface.index, dtype=float)
+        result = pd.Series(np.where(codes >= 0, cleaned[codes], np.nan), index=surface.index)
+        if result.isna().any():
+            return result.astype(float)
+        try:
+            return result.astype('int64')
+        except OverflowError:
+            # Au-delà d'int64: entiers Python, comme Series.apply(clean_surface)
+            return result
+    
     def extract_location(self, df):
-        """Extrait zone et ville de la localisation"""
-        zone_list, ville_list = [], []
-        
-        for loc in df.get('localisation', pd.Series()):
-            if pd.isna(loc):
-                ville_list.append("Unknown")
-                zone_list.append("Unknown")
-            elif ' à ' in str(loc):
-                parts = str(loc).split(' à ', 1)
-                zone_list.append(parts[0].strip())
-                ville_list.append(parts[1].strip())
-            else:
-                ville_list.append(str(loc).strip())
-                zone_list.append("Unknown")
+        """Extrait zone et ville de la localisation
+
+        Le découpage 'Zone à Ville' est fait une fois par localisation
+        distincte; zone et ville sont retournées en catégories pandas.
+        """
+        loc = df['localisation'] if 'localisation' in df.columns else pd.Series(index=df.index, dtype=object)
         
-        df['zone'] = zone_list
-        df['ville'] = ville_list
-        return df.drop(columns=['localisation'], errors='ignore')
+        codes, uniques = pd.factorize(loc, use_na_sentinel=True)
+        loc_str = pd.Series(uniques, dtype=object).astype(str).astype(object)
+        has_sep = loc_str.str.contains(' à ', regex=False)
+        parts = loc_str.str.split(' à ', n=1)
+        
+        zone_u = parts.str[0].str.strip().where(has_sep, "Unknown")
+        ville_u = parts.str[1].str.strip().where(has_sep, loc_str.str.strip())
+        
+        df['zone'] = self._categorical_from_codes(codes, zone_u)
+        df['ville'] = self._categorical_from_codes(codes, ville_u)
+        df.drop(columns=['localisation'], errors='ignore', inplace=True)
+        return df
     
-    def preprocess(self, df):
-        """Prétraitement complet des données"""
+    @staticmethod
+    def _categorical_from_codes(codes, values, missing="Unknown"):
+        """Construit une Categorical à partir des codes de lignes et des valeurs distinctes"""
+        value_codes, categories = pd.factorize(pd.Series(values, dtype=object))
+        categories = pd.Index(categories, dtype=object)
+        if missing not in categories:
+            categories = categories.append(pd.Index([missing], dtype=object))
+        missing_code = categories.get_loc(missing)
+        
+        row_codes = np.full(len(codes), missing_code, dtype=np.int64)
+        known = codes >= 0
+        row_codes[known] = value_codes[codes[known]]
+        return pd.Categorical.from_codes(row_codes, categories=categories)
+    
+    @metrics.timed("preprocess")
+    def preprocess(self, df, copy=True, fit=False):
+        """Prétraitement complet des données
+
+        Avec copy=False, l'appelant cède df: il est modifié sur place et
+        ne doit plus être utilisé après l'appel. fit=True fixe les médianes
+        d'imputation (self.numeric_fill), appliquées telles quelles ensuite:
+        le résultat d'une ligne ne dépend pas du bloc qui la contient.
+        """
         logger.info("Début du prétraitement...")
+        metrics.inc("rows_processed", len(df), stage="preprocess")
         
-        df_cleaned = df.copy()
+        df_cleaned = df.copy() if copy else df
         
         # Convertir les colonnes booléennes en int
         bool_cols = df_cleaned.select_dtypes(include='bool').columns
@@ -89,13 +222,13 @@ class DataPreprocessor:
         
         # Nettoyage prix
         if 'prix' in df_cleaned.columns:
-            df_cleaned['prix_dh'] = df_cleaned['prix'].apply(self.clean_price)
+            df_cleaned['prix_dh'] = self.clean_price_series(df_cleaned['prix'])
         elif 'prix_dh' in df_cleaned.columns:
-            df_cleaned['prix_dh'] = df_cleaned['prix_dh'].apply(self.clean_price)
+            df_cleaned['prix_dh'] = self.clean_price_series(df_cleaned['prix_dh'])
         
         # Nettoyage surface
         if 'surface' in df_cleaned.columns:
-            df_cleaned['surface'] = df_cleaned['surface'].apply(self.clean_surface)
+            df_cleaned['surface'] = self.clean_surface_series(df_cleaned['surface'])
         
         # Extraction localisation
         if 'localisation' in df_cleaned.columns:
@@ -107,38 +240,132 @@ class DataPreprocessor:
         
         # Supprimer les colonnes inutiles
         existing_columns_to_drop = [col for col in COLUMNS_TO_DROP if col in df_cleaned.columns]
-        df_cleaned = df_cleaned.drop(columns=existing_columns_to_drop, errors="ignore")
+        if copy:
+            df_cleaned = df_cleaned.drop(columns=existing_columns_to_drop, errors="ignore")
+        else:
+            df_cleaned.drop(columns=existing_columns_to_drop, errors="ignore", inplace=True)
         
         # Remplir les colonnes numériques manquantes
-        for col in NUMERICAL_COLUMNS:
-            if col in df_cleaned.columns:
-                df_cleaned[col] = pd.to_numeric(df_cleaned[col], errors='coerce').fillna(df_cleaned[col].median())
+        numeric = {
+            col: pd.to_numeric(df_cleaned[col], errors='coerce')
+            for col in NUMERICAL_COLUMNS if col in df_cleaned.columns
+        }
+        if fit:
+            self.numeric_fill = {col: float(values.median()) for col, values in numeric.items()}
+        elif self.numeric_fill is None and not self._warned_numeric_fill:
+            logger.warning("Médianes d'imputation absentes, calculées sur chaque lot")
+            self._warned_numeric_fill = True
+        for col, values in numeric.items():
+            fill = (self.numeric_fill or {}).get(col)
+            df_cleaned[col] = values.fillna(values.median() if fill is None else fill)
         
         logger.info("Prétraitement terminé")
         return df_cleaned
     
-    def encode_and_scale(self, df, fit=False):
-        """One-hot encoding et standardisation"""
-        logger.info("Encodage et standardisation...")
+    def preprocess_dataset(self, source=SCRAPE_OUTPUT_PATH, target=PROCESSED_DATA_PATH,
+                           filters=None, batch_rows=STORAGE_BATCH_ROWS):
+        """Prétraite un jeu Parquet brut par blocs et écrit le résultat dans target
+
+        filters (ex: [("scrape_date", "=", "2026-10-17")]) limite les
+        partitions lues; la date de scraping de chaque annonce est conservée
+        pour le partitionnement de target. Les partitions écrites remplacent
+        celles d'un prétraitement précédent: relancer sur les mêmes données
+        ne duplique pas les lignes. Retourne le nombre de lignes écrites.
+        """
+        if self.numeric_fill is None:
+            self.fit_numeric_fill(source, filters)
+        schema, total = None, 0
+        partitions = set()
+        for df in iter_dataset(source, filters=filters, batch_rows=batch_rows):
+            scrape_date = df["scrape_date"].to_numpy()
+            df_clean = self.preprocess(df, copy=False)
+            df_clean["scrape_date"] = scrape_date
+            if schema is None:
+                schema = processed_schema(df_clean)
+            total += write_dataset(df_clean, target, schema=schema, written_partitions=partitions)
+        logger.info(f"{total} annonces prétraitées écrites dans {target}")
+        return total
+    
+    def fit_numeric_fill(self, source, filters=None):
+        """Médianes d'imputation calculées une fois sur tout le jeu Parquet source
+
+        Seules les colonnes numériques sont lues; utilisé quand les
+        transformateurs chargés n'en contiennent pas.
+        """
+        available = open_dataset(source).schema.names
+        columns = [col for col in NUMERICAL_COLUMNS if col in available]
+        df = read_dataset(source, columns=columns, filters=filters)
+        if 'surface' in df.columns:
+            df['surface'] = self.clean_surface_series(df['surface'])
+        self.numeric_fill = {
+            col: float(pd.to_numeric(df[col], errors='coerce').median()) for col in columns
+        }
+        return self.numeric_fill
+    
+    def detect_bool_columns(self, df):
+        """Détecte les colonnes booléennes (TRUE/FALSE, 1/0) d'un DataFrame
+
+        Les colonnes numériques, catégorielles et le prix en sont exclues:
+        elles ne sont jamais converties, même si l'échantillon ne contient
+        que des 0 et des 1.
+        """
+        excluded = set(NUMERICAL_COLUMNS) | set(CATEGORICAL_COLUMNS) | {'prix_dh'}
+        allowed = set(TRUE_VALUES) | set(FALSE_VALUES)
+        return [
+            col for col in df.columns
+            if col not in excluded and set(df[col].dropna().unique()) <= allowed
+        ]
+    
+    def _prepare_columns(self, df_prepared, fit=False):
+        """Convertit les colonnes booléennes et remplit les colonnes numériques
+
+        Le schéma booléen est fixé au fit (self.bool_columns) puis appliqué
+        tel quel en inférence, en une seule conversion sur tout le bloc.
+        """
+        if fit or self.bool_columns is None:
+            bool_columns = self.detect_bool_columns(df_prepared)
+            if fit:
+                self.bool_columns = bool_columns
+        else:
+            bool_columns = [col for col in self.bool_columns if col in df_prepared.columns]
         
-        df_prepared = df.copy()
+        if bool_columns:
+            block = df_prepared[bool_columns]
+            df_prepared[bool_columns] = np.where(
+                block.isin(TRUE_VALUES), 1.0,
+                np.where(block.isin(FALSE_VALUES), 0.0, np.nan)
+            )
         
-        # Convertir les booléens
-        for col in df_prepared.columns:
-            uniques = set(df_prepared[col].dropna().unique())
-            if uniques <= {"TRUE", "FALSE", "True", "False", 1, 0, True, False}:
-                df_prepared[col] = df_prepared[col].map({
-                    "TRUE": 1, "True": 1, True: 1,
-                    "FALSE": 0, "False": 0, False: 0,
-                    1: 1, 0: 0
-                }).astype(float)
-        
-        # Remplir les colonnes numériques
         for col in NUMERICAL_COLUMNS:
             if col not in df_prepared.columns:
                 df_prepared[col] = 0
             else:
                 df_prepared[col] = df_prepared[col].fillna(0)
+        return df_prepared
+    
+    @metrics.timed("encode_and_scale")
+    def encode_and_scale(self, df, fit=False, sparse=False, copy=True, dtype=np.float64, out=None):
+        """One-hot encoding et standardisation
+
+        En inférence (fit=False):
+        - sparse=True retourne une matrice SciPy CSR dans l'ordre de
+          features_columns au lieu d'un DataFrame dense;
+        - copy=False cède df (modifié sur place) et écrit les features
+          directement dans un buffer NumPy préalloué (out, ou alloué en
+          dtype), retourné sous forme de DataFrame sans copie.
+        """
+        metrics.inc("rows_processed", len(df), stage="encode_and_scale")
+        if sparse and not fit:
+            return self._transform_sparse(df)
+        if not copy and not fit:
+            return self._transform_dense(df, dtype=dtype, out=out)
+        
+        logger.info("Encodage et standardisation...")
+        
+        df_prepared = df.copy()
+        
+        # Convertir les booléens et remplir les colonnes numériques
+        df_prepared = self._prepare_columns(df_prepared, fit=fit)
         
         # Sauvegarder prix réel
         prix_reel = None
@@ -148,12 +375,14 @@ class DataPreprocessor:
         
         # One-hot encoding
         if fit:
+            # scikit-learn (~1 s à l'import) n'est nécessaire qu'à l'entraînement
+            from sklearn.preprocessing import OneHotEncoder, StandardScaler
             self.encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
             encoded_array = self.encoder.fit_transform(df_prepared[CATEGORICAL_COLUMNS])
         else:
             if self.encoder is None:
                 raise ValueError("Encoder not fitted! Use fit=True first")
-            encoded_array = self.encoder.transform(df_prepared[CATEGORICAL_COLUMNS])
+            encoded_array = self._one_hot(df_prepared[CATEGORICAL_COLUMNS])
         
         encoded_df = pd.DataFrame(
             encoded_array,
@@ -188,16 +417,169 @@ class DataPreprocessor:
         logger.info("Encodage et standardisation terminés")
         return df_prepared, prix_reel
     
-    def save_transformers(self, encoder_path, scaler_path, features_path):
+    def _one_hot_positions(self, df_cat):
+        """Positions (lignes, colonnes) des 1 du one-hot
+
+        Passe par les codes entiers des colonnes catégorielles, équivalent à
+        self.encoder.transform (handle_unknown='ignore') sans comparer de
+        chaînes ligne par ligne; repli sur l'encodeur sinon.
+        """
+        simple_encoder = (
+            getattr(self.encoder, 'drop', None) is None
+            and getattr(self.encoder, 'min_frequency', None) is None
+            and getattr(self.encoder, 'max_categories', None) is None
+        )
+        if not simple_encoder or not all(
+            isinstance(df_cat[col].dtype, pd.CategoricalDtype) for col in df_cat.columns
+        ):
+            return np.nonzero(self.encoder.transform(df_cat))
+        
+        all_rows, all_cols = [], []
+        offset = 0
+        for col, categories in zip(df_cat.columns, self.encoder.categories_):
+            series = df_cat[col]
+            # position de chaque catégorie pandas dans les catégories de l'encodeur
+            lookup = pd.Index(categories).get_indexer(series.cat.categories)
+            codes = series.cat.codes.to_numpy()
+            positions = np.where(codes >= 0, lookup[np.maximum(codes, 0)], -1) if len(lookup) else np.full(len(codes), -1)
+            rows = np.flatnonzero(positions >= 0)
+            all_rows.append(rows)
+            all_cols.append(offset + positions[rows])
+            offset += len(categories)
+        return np.concatenate(all_rows), np.concatenate(all_cols)
+    
+    def _one_hot(self, df_cat):
+        """One-hot dense de df_cat selon l'encodeur"""
+        width = sum(len(categories) for categories in self.encoder.categories_)
+        encoded = np.zeros((len(df_cat), width))
+        encoded[self._one_hot_positions(df_cat)] = 1
+        return encoded
+    
+    def _check_fitted(self):
+        if self.encoder is None:
+            raise ValueError("Encoder not fitted! Use fit=True first")
+        if self.scaler is None:
+            raise ValueError("Scaler not fitted! Use fit=True first")
+    
+    def _dense_features(self, df_prepared, positions):
+        """Colonnes hors one-hot: (position dans features_columns, valeurs)"""
+        scaled = self.scaler.transform(df_prepared[NUMERICAL_COLUMNS])
+        for j, col in enumerate(NUMERICAL_COLUMNS):
+            if col in positions:
+                yield positions[col], scaled[:, j]
+        for col in df_prepared.columns:
+            if (col in positions and col not in NUMERICAL_COLUMNS
+                    and col not in CATEGORICAL_COLUMNS and col != 'prix_dh'):
+                yield positions[col], df_prepared[col].to_numpy(dtype=float)
+    
+    def _onehot_features(self, df_prepared, positions):
+        """Positions des 1 du one-hot dans features_columns (lignes, colonnes)
+
+        Retourne aussi les positions de toutes les colonnes one-hot.
+        """
+        onehot_names = self.encoder.get_feature_names_out(CATEGORICAL_COLUMNS)
+        onehot_map = np.array([positions.get(name, -1) for name in onehot_names], dtype=np.int64)
+        rows, cols = self._one_hot_positions(df_prepared[CATEGORICAL_COLUMNS])
+        cols = onehot_map[cols]
+        kept = cols >= 0
+        return rows[kept], cols[kept], onehot_map[onehot_map >= 0]
+    
+    def _transform_sparse(self, df):
+        """Transforme df en matrice CSR dans l'ordre de features_columns"""
+        from scipy import sparse
+        
+        logger.info("Encodage et standardisation (sparse)...")
+        self._check_fitted()
+        
+        # Copie superficielle: seules les colonnes remplacées sont matérialisées
+        df_prepared = self._prepare_columns(df.copy(deep=False))
+        
+        prix_reel = None
+        if 'prix_dh' in df_prepared.columns:
+            prix_reel = df_prepared['prix_dh'].copy()
+        
+        positions = {col: j for j, col in enumerate(self.features_columns)}
+        n_rows = len(df_prepared)
+        
+        all_rows, all_cols, all_data = [], [], []
+        for position, values in self._dense_features(df_prepared, positions):
+            nonzero = np.flatnonzero(values)
+            all_rows.append(nonzero)
+            all_cols.append(np.full(len(nonzero), position, dtype=np.int64))
+            all_data.append(values[nonzero])
+        
+        # Bloc one-hot: indices entiers, sans matrice dense intermédiaire
+        onehot_rows, onehot_cols, _ = self._onehot_features(df_prepared, positions)
+        all_rows.append(onehot_rows)
+        all_cols.append(onehot_cols)
+        all_data.append(np.ones(len(onehot_rows)))
+        
+        matrix = sparse.csr_matrix(
+            (np.concatenate(all_data), (np.concatenate(all_rows), np.concatenate(all_cols))),
+            shape=(n_rows, len(self.features_columns))
+        )
+        
+        logger.info("Encodage et standardisation terminés")
+        return matrix, prix_reel
+    
+    def _transform_dense(self, df, dtype=np.float64, out=None):
+        """Écrit les features de df dans un buffer préalloué, sans copie du DataFrame
+
+        df appartient désormais au préprocesseur: ses colonnes booléennes et
+        numériques sont converties sur place.
+        """
+        logger.info("Encodage et standardisation (sans copie)...")
+        self._check_fitted()
+        
+        df_prepared = self._prepare_columns(df)
+        prix_reel = df_prepared['prix_dh'] if 'prix_dh' in df_prepared.columns else None
+        
+        positions = {col: j for j, col in enumerate(self.features_columns)}
+        shape = (len(df_prepared), len(self.features_columns))
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        elif out.shape != shape:
+            raise ValueError(f"Buffer de sortie de forme {out.shape}, attendu {shape}")
+        
+        written = np.zeros(shape[1], dtype=bool)
+        for position, values in self._dense_features(df_prepared, positions):
+            out[:, position] = values
+            written[position] = True
+        
+        onehot_rows, onehot_cols, onehot_positions = self._onehot_features(df_prepared, positions)
+        written[onehot_positions] = False
+        out[:, ~written] = 0
+        out[onehot_rows, onehot_cols] = 1
+        
+        logger.info("Encodage et standardisation terminés")
+        return pd.DataFrame(out, columns=self.features_columns, copy=False), prix_reel
+    
+    def save_transformers(self, encoder_path, scaler_path, features_path, bool_columns_path=None,
+                          numeric_fill_path=None):
         """Sauvegarde les transformateurs"""
+        import joblib
         joblib.dump(self.encoder, encoder_path)
         joblib.dump(self.scaler, scaler_path)
         joblib.dump(self.features_columns, features_path)
+        if bool_columns_path is not None:
+            joblib.dump(self.bool_columns, bool_columns_path)
+        if numeric_fill_path is not None:
+            joblib.dump(self.numeric_fill, numeric_fill_path)
         logger.info(f"Transformateurs sauvegardés")
     
-    def load_transformers(self, encoder_path, scaler_path, features_path):
+    def load_transformers(self, encoder_path, scaler_path, features_path, bool_columns_path=None,
+                          numeric_fill_path=None):
         """Charge les transformateurs"""
+        import joblib
         self.encoder = joblib.load(encoder_path)
         self.scaler = joblib.load(scaler_path)
         self.features_columns = joblib.load(features_path)
+        self.bool_columns = None
+        if bool_columns_path is not None and Path(bool_columns_path).exists():
+            self.bool_columns = joblib.load(bool_columns_path)
+        else:
+            logger.warning("Schéma des colonnes booléennes absent, détection à chaque lot")
+        self.numeric_fill = None
+        if numeric_fill_path is not None and Path(numeric_fill_path).exists():
+            self.numeric_fill = joblib.load(numeric_fill_path)
         logger.info(f"Transformateurs chargés")
@@ -0,0 +1,209 @@
+"""
+Index local des annonces déjà scrapées
+
+Base SQLite indexée par URL d'annonce: empreinte de la vignette de la page
+de résultats, dates de première et dernière vue et données extraites. Sert
+à ignorer les annonces inchangées, à arrêter le scraping quand une page
+est entièrement connue et à reprendre un run interrompu depuis la
+dernière page terminée.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ads (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_key TEXT PRIMARY KEY,
+    page INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def card_hash(text):
+    """Empreinte du contenu d'une vignette d'annonce (titre, prix, surface...)"""
+    normalized = " ".join((text or "").split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ScrapeIndex:
+    """Index SQLite des annonces, partagé entre les threads d'un run"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def is_unchanged(self, url, content_hash):
+        """Vrai si l'annonce est connue avec la même empreinte"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM ads WHERE url = ?", (url,)
+            ).fetchone()
+        return row is not None and row[0] == content_hash
+
+    def touch(self, urls):
+        """Met à jour la date de dernière vue d'annonces inchangées"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE ads SET last_seen = ? WHERE url = ?", [(now, url) for url in urls]
+            )
+
+    def upsert(self, url, content_hash, property_data):
+        """Enregistre une annonce nouvelle ou modifiée"""
+        now = time.time()
+        data = json.dumps(property_data, ensure_ascii=False, default=str)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO ads (url, content_hash, first_seen, last_seen, data)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET
+                       content_hash = excluded.content_hash,
+                       last_seen = excluded.last_seen,
+                       data = excluded.data""",
+                (url, content_hash, now, now, data)
+            )
+
+    def load_checkpoint(self, run_key):
+        """Dernière page entièrement traitée d'un run interrompu, sinon 0"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page FROM checkpoints WHERE run_key = ?", (run_key,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def save_checkpoint(self, run_key, page):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO checkpoints (run_key, page, updated_at) VALUES (?, ?, ?)
+                   ON CONFLICT(run_key) DO UPDATE SET
+                       page = excluded.page, updated_at = excluded.updated_at""",
+                (run_key, page, time.time())
+            )
+
+    def clear_checkpoint(self, run_key):
+        """Run terminé: le prochain repartira de la page 1"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM checkpoints WHERE run_key = ?", (run_key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ads").fetchone()[0]
+
+    def iter_records(self, since=None, batch_size=1000):
+        """Annonces de l'index (vues depuis le timestamp since), lues par lots"""
+        query, params = "SELECT data FROM ads", ()
+        if since is not None:
+            query, params = query + " WHERE last_seen >= ?", (since,)
+        with self._lock:
+            cursor = self._conn.execute(query + " ORDER BY first_seen", params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for (data,) in rows:
+                yield json.loads(data)
+
+    def to_frame(self, since=None):
+        """Annonces de l'index (vues depuis le timestamp since) en DataFrame"""
+        return pd.DataFrame(list(self.iter_records(since)))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PageCheckpoint:
+    """Suit les pages terminées (éventuellement dans le désordre) et sauvegarde
+    la plus grande page p telle que toutes les pages 1..p sont terminées"""
+
+    def __init__(self, index, run_key, start_page=1):
+        self.index = index
+        self.run_key = run_key
+        self.frontier = start_page - 1
+        self.done = set()
+        self._lock = threading.Lock()
+
+    def page_done(self, page):
+        with self._lock:
+            self.done.add(page)
+            advanced = False
+            while self.frontier + 1 in self.done:
+                self.frontier += 1
+                self.done.discard(self.frontier)
+                advanced = True
+            if advanced:
+                self.index.save_checkpoint(self.run_key, self.frontier)
+
+
+class IndexWriter:
+    """Indexe les annonces d'un run une fois acceptées par le consommateur du flux
+
+    Le scraper déclare chaque annonce produite (add) et chaque page dont
+    toutes les annonces ont été produites (page_done). commit(n) enregistre
+    les n premières annonces produites puis avance le point de reprise sur
+    les pages entièrement enregistrées. Une annonce jamais écrite (arrêt à
+    max_ads, sink en erreur, crash avant l'écriture d'un bloc) n'est donc
+    ni indexée ni couverte par le point de reprise: le run suivant la
+    scrapera de nouveau.
+    """
+
+    def __init__(self, index, run_key, start_page=1):
+        self.index = index
+        self.run_key = run_key
+        self.checkpoint = PageCheckpoint(index, run_key, start_page)
+        # (numéro d'ordre, URL, empreinte, données) des annonces non enregistrées
+        self.pending = deque()
+        # (page, numéro de sa dernière annonce) des pages terminées
+        self.pages = deque()
+        self.produced = 0
+        self.committed = 0
+        self.finished = False
+
+    def add(self, url, content_hash, property_data):
+        self.produced += 1
+        self.pending.append((self.produced, url, content_hash, property_data))
+
+    def page_done(self, page):
+        self.pages.append((page, self.produced))
+
+    def commit(self, count=None):
+        """Enregistre les count premières annonces produites (défaut: toutes)"""
+        count = self.produced if count is None else min(count, self.produced)
+        while self.pending and self.pending[0][0] <= count:
+            _, url, content_hash, property_data = self.pending.popleft()
+            self.index.upsert(url, content_hash, property_data)
+        self.committed = max(self.committed, count)
+        while self.pages and self.pages[0][1] <= self.committed:
+            self.checkpoint.page_done(self.pages.popleft()[0])
+        if self.finished and self.committed == self.produced:
+            # Run terminé et tout enregistré: le prochain repartira de la page 1
+            self.index.clear_checkpoint(self.run_key)
+
+    def finish(self):
+        """Run terminé sans erreur: le point de reprise est effacé une fois tout enregistré"""
+        self.finished = True
+        self.commit(self.committed)
@@ -2,35 +2,112 @@
 Module de scraping des propriétés immobilières
 """
 
-import time
 import random
 import re
 import json
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from pathlib import Path
 import pandas as pd
 import numpy as np
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-from configs.config import CHROMEDRIVER_PATH, BASE_URL, MAX_ADS, USER_AGENTS, EXTRAS_LIST, WEBHOOK_URL
+from configs.config import (
+    CHROMEDRIVER_PATH, BASE_URL, MAX_ADS, USER_AGENTS, EXTRAS_LIST, WEBHOOK_URL,
+    PAGE_URL_TEMPLATE, SCRAPER_WORKERS, SCRAPER_HEADLESS, SCRAPER_DELAY, SCRAPER_JITTER,
+    SCRAPER_GLOBAL_DELAY,
+    SCRAPER_EXTRACT_MODE, SCRAPER_WAIT_TIMEOUT, SCRAPER_READY_TIMEOUT, SCRAPER_SELECTOR_MIN_TRIALS,
+    SCRAPE_OUTPUT_PATH
+)
+from src.pacing import (
+    RateLimiter, SelectorStats, TimingStats, wait_until, wait_for_ready, wait_for_navigation,
+    page_root, CSS_SELECTOR, XPATH
+)
+from src.parsing import (
+    FIELD_SELECTORS, LISTING_SELECTOR, URL_SELECTOR, LISTING_URL_ATTRIBUTES, parse_property,
+    parse_listing_cards
+)
+from src.metrics import metrics
+from src.scrape_index import IndexWriter, card_hash
+from src.sinks import write_stream
+from src.storage import write_dataset
+from src.webhook import WebhookDelivery
 from src.utils import get_logger, PropertyScraper, DataValidator
 
 logger = get_logger(__name__)
 
+# Fin de flux d'un worker dans la file de fusion
+_WORKER_DONE = object()
+# Fin d'une page dans la file de fusion: (_PAGE_DONE, page, None)
+_PAGE_DONE = object()
+
+
+def format_page_url(base_url, page, page_url_template=PAGE_URL_TEMPLATE):
+    """URL de la page de résultats numéro page (1 = base_url)"""
+    if page <= 1:
+        return base_url
+    return page_url_template.format(base_url=base_url, page=page)
+
+
+def send_to_webhook(data):
+    """Envoie immédiatement (et de façon bloquante) des données au webhook n8n
+
+    Pendant le scraping, préférer src.webhook.WebhookDelivery (file en
+    arrière-plan, lots, reprises).
+    """
+    try:
+        response = requests.post(WEBHOOK_URL, json=data, timeout=5)
+        if response.status_code == 200:
+            logger.info("Données envoyées au webhook avec succès")
+        else:
+            logger.warning(f"Erreur webhook: {response.status_code}")
+    except Exception as e:
+        logger.error(f"Erreur lors de l'envoi au webhook: {e}")
+
+
+def property_key(property_data):
+    """Clé de dédoublonnage d'une annonce: son URL, sinon son contenu"""
+    return property_data.get('url') or json.dumps(property_data, sort_keys=True, default=str)
+
 
 class PropertyScraper:
     """Scrape les propriétés immobilières depuis Mubawab.ma"""
     
-    def __init__(self, base_url=BASE_URL, max_ads=MAX_ADS, chromedriver_path=CHROMEDRIVER_PATH):
+    def __init__(self, base_url=BASE_URL, max_ads=MAX_ADS, chromedriver_path=CHROMEDRIVER_PATH,
+                 workers=SCRAPER_WORKERS, headless=SCRAPER_HEADLESS, delay=SCRAPER_DELAY,
+                 page_url_template=PAGE_URL_TEMPLATE, extract_mode=SCRAPER_EXTRACT_MODE,
+                 wait_timeout=SCRAPER_WAIT_TIMEOUT, jitter=SCRAPER_JITTER,
+                 ready_timeout=SCRAPER_READY_TIMEOUT, index=None, global_delay=SCRAPER_GLOBAL_DELAY):
         self.base_url = base_url
         self.max_ads = max_ads
         self.chromedriver_path = chromedriver_path
+        self.workers = workers
+        self.headless = headless
+        self.delay = delay
+        self.jitter = jitter
+        self.page_url_template = page_url_template
+        self.extract_mode = extract_mode
+        self.wait_timeout = wait_timeout
+        self.ready_timeout = ready_timeout
+        # Index des annonces déjà vues (src.scrape_index.ScrapeIndex), optionnel
+        self.index = index
+        # Annonces du run en attente d'indexation (créé par stream_parallel())
+        self.index_writer = None
+        # État de la dernière page traitée par scrape_page: "empty", "known" ou "scraped"
+        self.page_status = None
+        # Cadence: propre à chaque driver (un par worker en mode parallèle),
+        # plus un plafond optionnel partagé par tous les workers
+        self.rate_limiter = RateLimiter(delay, jitter)
+        self.global_limiter = RateLimiter(global_delay)
+        self.selector_stats = SelectorStats(min_trials=SCRAPER_SELECTOR_MIN_TRIALS)
+        self.timings = TimingStats()
+        # Compteurs d'extraction (recherches d'éléments, timeouts de sélecteurs)
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
         self.driver = None
+        # File d'envoi au webhook, active pendant scrape()
+        self.webhook = None
         self.data = []
         self.validator = DataValidator()
     
@@ -38,10 +115,16 @@ class PropertyScraper:
         """Initialise le driver Selenium"""
         logger.info("Initialisation du driver Chrome...")
         try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+            
             options = Options()
             options.add_argument("--window-size=1920,1080")
             options.add_argument("user-agent=" + random.choice(USER_AGENTS))
             options.add_argument("--disable-blink-features=AutomationControlled")
+            if self.headless:
+                options.add_argument("--headless=new")
             
             service = Service(self.chromedriver_path)
             self.driver = webdriver.Chrome(service=service, options=options)
@@ -50,66 +133,67 @@ class PropertyScraper:
             logger.error(f"Erreur lors de l'initialisation du driver: {e}")
             raise
     
-    def safe_extract(self, selectors):
-        """Extrait le texte de manière sécurisée"""
-        for selector in selectors:
+    def safe_extract(self, selectors, field=None):
+        """Extrait le texte de manière sécurisée
+
+        Les sélecteurs sont d'abord essayés sans attente, les plus
+        fructueux en premier. Si aucun ne trouve, une seule attente bornée
+        porte sur tous à la fois, et seulement si le champ est
+        habituellement présent.
+        """
+        for selector in self.selector_stats.order(field, selectors):
+            self.stats['lookups'] += 1
             try:
-                element = WebDriverWait(self.driver, 2).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                elements = self.driver.find_elements(CSS_SELECTOR, selector)
+            except Exception:
+                elements = []
+            self.selector_stats.record(field, selector, bool(elements))
+            if elements:
+                self.selector_stats.record_field(field, True)
+                return elements[0].text.strip()
+        
+        text = None
+        if self.selector_stats.should_wait(field):
+            from selenium.webdriver.support import expected_conditions as EC
+            self.stats['lookups'] += 1
+            with self.timings.span('wait_selector'):
+                element = wait_until(
+                    self.driver,
+                    EC.presence_of_element_located((CSS_SELECTOR, ", ".join(selectors))),
+                    self.wait_timeout
                 )
-                return element.text.strip()
-            except:
-                continue
-        return None
+            if element is None:
+                self.stats['selector_timeouts'] += 1
+            else:
+                text = element.text.strip()
+        self.selector_stats.record_field(field, text is not None)
+        return text
     
-    def extract_property(self):
+    def extract_property(self, page_url=None):
         """Extrait les informations d'une propriété"""
+        if self.extract_mode == "source":
+            return self.extract_property_from_source(page_url)
+        
         property_data = {}
         
         try:
-            # Titre
-            property_data['titre'] = self.safe_extract([
-                '.listing-title', '.ad-title', 'h1'
-            ])
-            
-            # Prix
-            price_text = self.safe_extract([
-                '.price', '.listing-price', '[data-price]'
-            ])
-            property_data['prix'] = price_text
-            
-            # Surface
-            surface_text = self.safe_extract([
-                '.surface', '[data-surface]', '.area'
-            ])
-            property_data['surface'] = surface_text
-            
-            # Pièces, chambres, salles de bain
-            property_data['pièces'] = self.safe_extract(['.rooms', '[data-rooms]'])
-            property_data['chambres'] = self.safe_extract(['.bedrooms', '[data-bedrooms]'])
-            property_data['salles_de_bain'] = self.safe_extract(['.bathrooms', '[data-bathrooms]'])
-            
-            # Localisation
-            property_data['localisation'] = self.safe_extract([
-                '.location', '[data-location]', '.address'
-            ])
-            
-            # URL
-            try:
-                link = self.driver.find_element(By.CSS_SELECTOR, 'a[href*="/listing/"]')
-                property_data['url'] = link.get_attribute('href')
-            except:
-                property_data['url'] = None
-            
-            # Type de bien
-            property_data['type_bien'] = self.safe_extract([
-                '.property-type', '[data-type]'
-            ])
+            for field, selectors in FIELD_SELECTORS.items():
+                property_data[field] = self.safe_extract(selectors, field)
+                
+                # URL
+                if field == 'localisation':
+                    self.stats['lookups'] += 1
+                    try:
+                        link = self.driver.find_element(CSS_SELECTOR, URL_SELECTOR)
+                        property_data['url'] = link.get_attribute('href')
+                    except:
+                        property_data['url'] = None
             
             # Extras (équipements)
             for extra in EXTRAS_LIST:
+                self.stats['lookups'] += 1
                 try:
-                    element = self.driver.find_element(By.XPATH, f"//*[contains(text(), '{extra}')]")
+                    element = self.driver.find_element(XPATH, f"//*[contains(text(), '{extra}')]")
                     property_data[extra] = 1
                 except:
                     property_data[extra] = 0
@@ -120,16 +204,264 @@ class PropertyScraper:
             logger.warning(f"Erreur lors de l'extraction d'une propriété: {e}")
             return None
     
-    def scrape(self):
-        """Lance le scraping"""
+    def extract_property_from_source(self, page_url=None):
+        """Extrait une propriété en un seul passage sur le code source de la page
+
+        Attend une seule fois qu'un champ principal soit présent, récupère
+        page_source puis résout champs et extras localement (motif
+        précompilé) au lieu d'un aller-retour navigateur par sélecteur.
+        """
+        try:
+            from selenium.webdriver.support import expected_conditions as EC
+            main_selectors = ", ".join(FIELD_SELECTORS['titre'] + FIELD_SELECTORS['prix'])
+            self.stats['lookups'] += 1
+            with self.timings.span('wait_selector'):
+                found = wait_until(
+                    self.driver,
+                    EC.presence_of_element_located((CSS_SELECTOR, main_selectors)),
+                    self.wait_timeout
+                )
+            if found is None:
+                self.stats['selector_timeouts'] += 1
+            
+            html = self.driver.page_source
+            return parse_property(html, page_url or self.driver.current_url)
+        
+        except Exception as e:
+            logger.warning(f"Erreur lors de l'extraction d'une propriété: {e}")
+            return None
+    
+    def navigate(self, url):
+        """Charge une page en respectant la limite de débit, puis attend qu'elle soit prête"""
+        with self.timings.span('rate_limit'):
+            self.rate_limiter.wait()
+            self.global_limiter.wait()
+        with self.timings.span('navigate'):
+            self.driver.get(url)
+            wait_for_ready(self.driver, self.ready_timeout)
+    
+    def click_through(self, element):
+        """Navigue par un clic: attend que l'ancienne page disparaisse puis que la nouvelle soit prête"""
+        with self.timings.span('rate_limit'):
+            self.rate_limiter.wait()
+            self.global_limiter.wait()
+        with self.timings.span('navigate'):
+            old_root = page_root(self.driver)
+            element.click()
+            wait_for_navigation(self.driver, old_root, self.wait_timeout)
+            wait_for_ready(self.driver, self.ready_timeout)
+    
+    def wait_for_listings(self):
+        """Attend les annonces de la page de résultats; retourne False s'il n'y en a pas"""
+        from selenium.webdriver.support import expected_conditions as EC
+        with self.timings.span('wait_listings'):
+            return wait_until(
+                self.driver,
+                EC.presence_of_all_elements_located((CSS_SELECTOR, LISTING_SELECTOR)),
+                self.ready_timeout
+            ) is not None
+    
+    def page_url(self, page):
+        """URL de la page de résultats numéro page (1 = base_url)"""
+        return format_page_url(self.base_url, page, self.page_url_template)
+    
+    def listing_urls(self):
+        """URLs des annonces de la page de résultats courante"""
+        urls = []
+        for listing in self.driver.find_elements(CSS_SELECTOR, LISTING_SELECTOR):
+            url = next((listing.get_attribute(attr) for attr in LISTING_URL_ATTRIBUTES
+                        if listing.get_attribute(attr)), None)
+            if not url:
+                links = listing.find_elements(CSS_SELECTOR, 'a[href]')
+                url = links[0].get_attribute('href') if links else None
+            if url:
+                urls.append(url)
+        return urls
+    
+    def listing_cards(self):
+        """(URL, texte de la vignette) des annonces de la page de résultats courante"""
+        return parse_listing_cards(self.driver.page_source, self.driver.current_url)
+    
+    def scrape_page(self, page):
+        """Extrait les annonces d'une page de résultats (générateur de
+        (URL de la vignette, empreinte, annonce))
+
+        Ouvre chaque annonce par son URL, ce qui rend les pages
+        indépendantes et permet de les répartir entre plusieurs drivers.
+        Avec un index, les annonces dont la vignette n'a pas changé ne
+        sont pas rouvertes; self.page_status indique ensuite si la page
+        était vide, entièrement connue ou scrapée. L'indexation des
+        annonces produites revient au consommateur (stream_parallel).
+        """
+        self.page_status = "empty"
+        self.navigate(self.page_url(page))
+        if not self.wait_for_listings():
+            logger.info(f"Aucune annonce sur la page {page}")
+            return
+        
+        cards = [(url, card_hash(text)) for url, text in self.listing_cards()]
+        if not cards:
+            return
+        if self.index is not None:
+            known = [url for url, content_hash in cards if self.index.is_unchanged(url, content_hash)]
+            self.index.touch(known)
+            known = set(known)
+            cards = [card for card in cards if card[0] not in known]
+        self.page_status = "scraped" if cards else "known"
+        
+        for url, content_hash in cards:
+            try:
+                self.navigate(url)
+                with self.timings.span('extract'):
+                    property_data = self.extract_property(url)
+                if property_data:
+                    property_data['url'] = property_data.get('url') or url
+                    yield url, content_hash, property_data
+            except Exception as e:
+                logger.warning(f"Erreur sur une annonce: {e}")
+    
+    def _scrape_worker(self, worker_id, out_queue, stop_event, start_page=1):
+        """Worker: scrape les pages start_page+worker_id, +n, ... avec son propre driver
+
+        Envoie dans out_queue les annonces de chaque page puis, si elle a
+        été parcourue en entier, sa fin (_PAGE_DONE).
+        """
+        # Même classe que self: une sous-classe peut fournir son propre driver
+        scraper = type(self)(
+            base_url=self.base_url, max_ads=self.max_ads, chromedriver_path=self.chromedriver_path,
+            workers=1, headless=self.headless, delay=self.delay, jitter=self.jitter,
+            page_url_template=self.page_url_template, extract_mode=self.extract_mode,
+            wait_timeout=self.wait_timeout, ready_timeout=self.ready_timeout, index=self.index
+        )
+        # Limite de débit propre au worker, plafond global partagé
+        scraper.global_limiter = self.global_limiter
+        scraper.selector_stats = self.selector_stats
+        scraper.timings = self.timings
+        try:
+            scraper.setup_driver()
+            page = start_page + worker_id
+            while not stop_event.is_set() and page <= self._last_page:
+                logger.info(f"[worker {worker_id}] Scraping page {page}...")
+                for item in scraper.scrape_page(page):
+                    out_queue.put(item)
+                    if stop_event.is_set():
+                        break
+                if stop_event.is_set():
+                    break
+                out_queue.put((_PAGE_DONE, page, None))
+                if scraper.page_status != "scraped":
+                    if scraper.page_status == "known":
+                        logger.info(f"[worker {worker_id}] Page {page} déjà connue, arrêt")
+                    else:
+                        logger.info(f"[worker {worker_id}] Dernière page atteinte")
+                    # Résultats triés du plus récent au plus ancien: les pages
+                    # suivantes sont vides ou déjà connues elles aussi
+                    with self._stats_lock:
+                        self._last_page = min(self._last_page, page)
+                    break
+                page += self.workers
+        except Exception as e:
+            self._worker_failed = True
+            logger.error(f"[worker {worker_id}] Erreur: {e}")
+        finally:
+            if scraper.driver:
+                scraper.driver.quit()
+            with self._stats_lock:
+                self.stats.update(scraper.stats)
+            out_queue.put(_WORKER_DONE)
+    
+    def stream_parallel(self, autocommit=True):
+        """Scrape avec self.workers drivers en parallèle (générateur d'annonces)
+
+        Les pages de résultats sont réparties entre les workers; leurs
+        annonces sont fusionnées en un flux unique dédoublonné par URL.
+        Avec un index, le run reprend après la dernière page terminée d'un
+        run interrompu et ne produit que les annonces nouvelles ou modifiées.
+        Une annonce n'est indexée qu'une fois reprise par le consommateur
+        (autocommit), ou quand commit_index le confirme (scrape_into: après
+        écriture par les sinks); celles jetées après max_ads ne le sont pas.
+        """
+        logger.info(f"Démarrage du scraping parallèle ({self.workers} workers) depuis {self.base_url}")
+        
+        out_queue = queue.Queue(maxsize=self.workers * 50)
+        stop_event = threading.Event()
+        seen = set()
+        ads_count = 0
+        self._last_page = float("inf")
+        self._worker_failed = False
+        
+        start_page, writer = 1, None
+        if self.index is not None:
+            start_page = self.index.load_checkpoint(self.base_url) + 1
+            if start_page > 1:
+                logger.info(f"Reprise du run interrompu à la page {start_page}")
+            writer = IndexWriter(self.index, self.base_url, start_page)
+        self.index_writer = writer
+        
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        running = 0
+        try:
+            for worker_id in range(self.workers):
+                executor.submit(self._scrape_worker, worker_id, out_queue, stop_event, start_page)
+                running += 1
+            
+            while running:
+                item = out_queue.get()
+                if item is _WORKER_DONE:
+                    running -= 1
+                    continue
+                # Continuer à vider la file pour débloquer les workers après l'arrêt
+                # (ni annonces ni fins de page: rien de ce qui suit n'est indexé)
+                if stop_event.is_set():
+                    continue
+                
+                url, content_hash, property_data = item
+                if url is _PAGE_DONE:
+                    # Toutes les annonces de la page sont passées dans le flux
+                    if writer is not None:
+                        writer.page_done(content_hash)
+                    continue
+                
+                key = property_key(property_data)
+                if key in seen:
+                    continue
+                seen.add(key)
+                
+                ads_count += 1
+                logger.info(f"Annonce {ads_count} extraite")
+                if writer is not None:
+                    writer.add(url, content_hash, property_data)
+                yield property_data
+                if writer is not None and autocommit:
+                    writer.commit()
+                
+                if ads_count >= self.max_ads:
+                    stop_event.set()
+            
+            # Arrêt à max_ads ou worker en erreur: point de reprise gardé pour le run suivant
+            if writer is not None and not self._worker_failed and ads_count < self.max_ads:
+                writer.finish()
+            logger.info(f"Scraping terminé! {ads_count} annonces collectées")
+            self.timings.log_summary()
+        
+        finally:
+            # Consommateur arrêté avant la fin: arrêter et attendre les workers
+            stop_event.set()
+            while running:
+                if out_queue.get() is _WORKER_DONE:
+                    running -= 1
+            executor.shutdown()
+            self.publish_metrics(ads_count)
+    
+    def stream_sequential(self):
+        """Scrape avec un seul driver en suivant les clics (générateur d'annonces)"""
         logger.info(f"Démarrage du scraping depuis {self.base_url}")
         
+        ads_count = 0
         try:
             self.setup_driver()
-            self.driver.get(self.base_url)
-            time.sleep(3)
+            self.navigate(self.base_url)
             
-            ads_count = 0
             page = 1
             
             while ads_count < self.max_ads:
@@ -137,29 +469,24 @@ class PropertyScraper:
                 
                 try:
                     # Attendre que les annonces se chargent
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.listing-item'))
-                    )
+                    if not self.wait_for_listings():
+                        raise TimeoutError("aucune annonce chargée")
                     
-                    listings = self.driver.find_elements(By.CSS_SELECTOR, '.listing-item')
+                    listings = self.driver.find_elements(CSS_SELECTOR, LISTING_SELECTOR)
                     
                     for listing in listings:
                         if ads_count >= self.max_ads:
                             break
                         
                         try:
-                            listing.click()
-                            time.sleep(1)
+                            self.click_through(listing)
                             
-                            property_data = self.extract_property()
+                            with self.timings.span('extract'):
+                                property_data = self.extract_property()
                             if property_data:
-                                self.data.append(property_data)
                                 ads_count += 1
                                 logger.info(f"Annonce {ads_count} extraite")
-                                
-                                # Envoyer à webhook si configuré
-                                if WEBHOOK_URL:
-                                    self.send_to_webhook(property_data)
+                                yield property_data
                         
                         except Exception as e:
                             logger.warning(f"Erreur sur une annonce: {e}")
@@ -167,9 +494,8 @@ class PropertyScraper:
                     
                     # Aller à la page suivante
                     try:
-                        next_btn = self.driver.find_element(By.CSS_SELECTOR, 'a.next-page')
-                        next_btn.click()
-                        time.sleep(2)
+                        next_btn = self.driver.find_element(CSS_SELECTOR, 'a.next-page')
+                        self.click_through(next_btn)
                         page += 1
                     except:
                         logger.info("Dernière page atteinte")
@@ -180,22 +506,67 @@ class PropertyScraper:
                     break
             
             logger.info(f"Scraping terminé! {ads_count} annonces collectées")
-            return pd.DataFrame(self.data)
+            self.timings.log_summary()
         
         finally:
             if self.driver:
                 self.driver.quit()
+            self.publish_metrics(ads_count)
     
-    def send_to_webhook(self, data):
-        """Envoie les données à un webhook n8n"""
+    def publish_metrics(self, ads_count, engine="selenium"):
+        """Reporte les compteurs et les temps du run dans src.metrics"""
+        metrics.inc("ads_scraped", ads_count, engine=engine)
+        metrics.add_counts(self.stats, prefix="scraper_")
+        metrics.add_timings(self.timings, prefix="scrape_")
+    
+    def stream(self, autocommit=True):
+        """Annonces produites au fil du scraping, sans les garder en mémoire"""
+        # Le mode incrémental ouvre les annonces par URL, page par page
+        if self.workers > 1 or self.index is not None:
+            return self.stream_parallel(autocommit)
+        return self.stream_sequential()
+    
+    def commit_index(self, count=None):
+        """Indexe les count premières annonces du run en cours (défaut: toutes celles produites)"""
+        if self.index_writer is not None:
+            self.index_writer.commit(count)
+    
+    def scrape_into(self, sinks):
+        """Scrape en envoyant chaque annonce aux sinks (src.sinks); retourne leur nombre
+
+        Avec un index, une annonce n'est indexée qu'une fois écrite par tous les sinks.
+        """
+        return write_stream(self.stream(autocommit=False), sinks, on_written=self.commit_index)
+    
+    def scrape_parallel(self):
+        """Lance le scraping parallèle et retourne les annonces en DataFrame"""
+        return self._collect(self.stream_parallel())
+    
+    def scrape(self):
+        """Lance le scraping"""
+        return self._collect(self.stream())
+    
+    def _collect(self, ads):
+        # Envoyer à webhook si configuré, en arrière-plan
+        if WEBHOOK_URL:
+            self.webhook = WebhookDelivery(WEBHOOK_URL).start()
         try:
-            response = requests.post(WEBHOOK_URL, json=data, timeout=5)
-            if response.status_code == 200:
-                logger.info("Données envoyées au webhook avec succès")
-            else:
-                logger.warning(f"Erreur webhook: {response.status_code}")
-        except Exception as e:
-            logger.error(f"Erreur lors de l'envoi au webhook: {e}")
+            for property_data in ads:
+                self.data.append(property_data)
+                if self.webhook is not None:
+                    self.send_to_webhook(property_data)
+        finally:
+            if self.webhook is not None:
+                self.webhook.close()
+                self.webhook = None
+        return pd.DataFrame(self.data)
+    
+    def send_to_webhook(self, data):
+        """Envoie les données à un webhook n8n (mises en file pendant scrape())"""
+        if self.webhook is not None:
+            self.webhook.submit(data)
+        else:
+            send_to_webhook(data)
     
     def to_csv(self, filepath):
         """Sauvegarde les données en CSV"""
@@ -203,9 +574,16 @@ class PropertyScraper:
         df.to_csv(filepath, index=False, encoding='utf-8')
         logger.info(f"Données sauvegardées dans {filepath}")
         return df
+    
+    def to_dataset(self, root=SCRAPE_OUTPUT_PATH):
+        """Ajoute les données au jeu Parquet partitionné par date et ville (src.storage)"""
+        df = pd.DataFrame(self.data)
+        write_dataset(df, root)
+        logger.info(f"Données sauvegardées dans {root}")
+        return df
 
 
 if __name__ == "__main__":
     scraper = PropertyScraper()
     df = scraper.scrape()
-    scraper.to_csv("data/raw/properties.csv")
+    scraper.to_dataset()
@@ -0,0 +1,271 @@
+"""
+Serveur HTTP de prédiction longue durée
+
+Garde le préprocesseur, les modèles et la connexion Google Sheets en mémoire
+pour que n8n appelle un nœud HTTP au lieu de relancer Python à chaque run.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from configs.config import (
+    MODEL_DIR, MODELS, ENCODER_FILE, SCALER_FILE, FEATURES_COLUMNS_FILE, BOOL_COLUMNS_FILE,
+    NUMERIC_FILL_FILE, INPUT_WORKSHEET_NAME, OUTPUT_WORKSHEET_NAME,
+    PIPELINE_FILE, SERVER_HOST, SERVER_PORT, SERVER_RELOAD_INTERVAL, SPARSE_FEATURES
+)
+from src.preprocessor import DataPreprocessor
+from src.metrics import metrics
+from src.models import PricePredictor
+from src.pipeline import InferencePipeline
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class PredictionService:
+    """Composants de prédiction chauds, rechargés quand les fichiers changent"""
+
+    def __init__(self, model_dir=MODEL_DIR):
+        self.model_dir = Path(model_dir)
+        self.preprocessor = None
+        self.predictor = None
+        self.handler = None
+        self.fingerprint = None
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    def watched_files(self):
+        """Fichiers dont la modification déclenche un rechargement"""
+        files = [ENCODER_FILE, SCALER_FILE, FEATURES_COLUMNS_FILE, BOOL_COLUMNS_FILE,
+                 NUMERIC_FILL_FILE, PIPELINE_FILE] + list(MODELS.values())
+        return [self.model_dir / f for f in files]
+
+    def compute_fingerprint(self):
+        """Empreinte (taille, date de modification) des fichiers surveillés"""
+        fingerprint = []
+        for path in self.watched_files():
+            try:
+                stat = path.stat()
+                fingerprint.append((path.name, stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                fingerprint.append((path.name, None, None))
+        return tuple(fingerprint)
+
+    def load(self):
+        """Construit de nouveaux composants puis les échange atomiquement"""
+        fingerprint = self.compute_fingerprint()
+
+        if (self.model_dir / PIPELINE_FILE).exists():
+            pipeline = InferencePipeline.load(self.model_dir / PIPELINE_FILE)
+            preprocessor, predictor = pipeline.preprocessor, pipeline.predictor
+        else:
+            preprocessor = DataPreprocessor()
+            preprocessor.load_transformers(
+                self.model_dir / ENCODER_FILE,
+                self.model_dir / SCALER_FILE,
+                self.model_dir / FEATURES_COLUMNS_FILE,
+                self.model_dir / BOOL_COLUMNS_FILE,
+                self.model_dir / NUMERIC_FILL_FILE
+            )
+            predictor = PricePredictor(model_dir=self.model_dir)
+            # Charger tous les modèles maintenant plutôt qu'à la première requête
+            for model_name in predictor.models:
+                predictor.models[model_name]
+
+        with self._lock:
+            self.preprocessor = preprocessor
+            self.predictor = predictor
+            self.fingerprint = fingerprint
+            self.loaded_at = time.time()
+        logger.info("Service de prédiction prêt")
+
+    def reload_if_changed(self):
+        """Recharge si un fichier surveillé a changé; retourne True si rechargé"""
+        if self.compute_fingerprint() == self.fingerprint:
+            return False
+        logger.info("Modèles modifiés sur disque, rechargement...")
+        try:
+            self.load()
+            return True
+        except Exception as e:
+            # Garder les anciens composants en service
+            logger.error(f"Erreur lors du rechargement: {e}")
+            return False
+
+    @property
+    def ready(self):
+        return self.predictor is not None and self.preprocessor is not None
+
+    def get_handler(self):
+        """Connexion Google Sheets ouverte une seule fois"""
+        if self.handler is None:
+            from src.sheets_handler import SheetsHandler
+            self.handler = SheetsHandler()
+        return self.handler
+
+    def predict_frame(self, df):
+        """Prétraite et prédit un DataFrame brut, retourne le DataFrame de sortie"""
+        from src.sheets_handler import prepare_output
+
+        with self._lock:
+            preprocessor, predictor = self.preprocessor, self.predictor
+        if preprocessor is None or predictor is None:
+            raise RuntimeError("Service non prêt")
+
+        df_clean = preprocessor.preprocess(df)
+        df_prepared, prix_reel = preprocessor.encode_and_scale(
+            df_clean, fit=False, sparse=SPARSE_FEATURES
+        )
+        predictions = predictor.predict(df_prepared)
+        return prepare_output(df_clean, predictions, prix_reel)
+
+    def predict_records(self, records):
+        """Prédit une liste d'annonces (dicts) et retourne une liste de dicts"""
+        df = pd.DataFrame.from_records(records)
+        output_df = self.predict_frame(df)
+        return to_records(output_df)
+
+    def predict_sheets(self, input_worksheet=INPUT_WORKSHEET_NAME,
+                       output_worksheet=OUTPUT_WORKSHEET_NAME):
+        """Lit l'onglet d'entrée, prédit et écrit l'onglet de sortie"""
+        handler = self.get_handler()
+        df = handler.read_input(input_worksheet)
+        output_df = self.predict_frame(df)
+        handler.write_output(output_df, worksheet_name=output_worksheet)
+        return len(output_df)
+
+
+def to_records(df):
+    """Convertit un DataFrame en dicts JSON-compatibles (NaN -> None)"""
+    df = df.astype(object).where(pd.notna(df), None)
+    return [
+        {k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+        for row in df.to_dict(orient="records")
+    ]
+
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP du serveur de prédiction"""
+
+    service = None
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s" % (self.address_string(), format % args))
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        """Corps JSON de la requête ({} s'il est vide); ValueError s'il est illisible"""
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif self.path == "/ready":
+            if self.service.ready:
+                self.send_json(200, {
+                    "status": "ready",
+                    "models": list(self.service.predictor.models),
+                    "loaded_at": self.service.loaded_at
+                })
+            else:
+                self.send_json(503, {"status": "loading"})
+        elif self.path == "/metrics":
+            # Format Prometheus, cumulé depuis le démarrage du serveur
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/metrics.json":
+            self.send_json(200, metrics.snapshot())
+        else:
+            self.send_json(404, {"error": f"Route inconnue: {self.path}"})
+
+    def do_POST(self):
+        try:
+            payload = self.read_json()
+        except ValueError as e:
+            # JSON mal formé, encodage ou Content-Length invalide: erreur du client
+            self.send_json(400, {"error": f"Corps JSON invalide: {e}"})
+            return
+        try:
+            if self.path == "/predict":
+                records = payload.get("records", []) if isinstance(payload, dict) else payload
+                if not isinstance(records, list):
+                    self.send_json(400, {"error": "Une liste d'annonces est attendue"})
+                    return
+                results = self.service.predict_records(records)
+                self.send_json(200, {"count": len(results), "predictions": results})
+            elif self.path == "/predict/sheets":
+                if not isinstance(payload, dict):
+                    self.send_json(400, {"error": "Un objet JSON est attendu"})
+                    return
+                count = self.service.predict_sheets(
+                    payload.get("input_worksheet", INPUT_WORKSHEET_NAME),
+                    payload.get("output_worksheet", OUTPUT_WORKSHEET_NAME)
+                )
+                self.send_json(200, {"count": count})
+            elif self.path == "/reload":
+                self.service.load()
+                self.send_json(200, {"status": "reloaded", "loaded_at": self.service.loaded_at})
+            else:
+                self.send_json(404, {"error": f"Route inconnue: {self.path}"})
+        except RuntimeError as e:
+            self.send_json(503, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Erreur sur {self.path}: {e}")
+            self.send_json(500, {"error": str(e)})
+
+
+def watch_models(service, interval, stop_event):
+    """Vérifie périodiquement les fichiers modèles et recharge si besoin"""
+    while not stop_event.wait(interval):
+        service.reload_if_changed()
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, reload_interval=SERVER_RELOAD_INTERVAL,
+          service=None):
+    """Lance le serveur de prédiction jusqu'à interruption"""
+    service = service or PredictionService()
+
+    handler_class = type("BoundPredictionRequestHandler", (PredictionRequestHandler,), {
+        "service": service
+    })
+    server = ThreadingHTTPServer((host, port), handler_class)
+
+    # Écouter tout de suite pour que /health réponde pendant le chargement
+    stop_event = threading.Event()
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    logger.info(f"Serveur de prédiction sur http://{host}:{port}")
+
+    try:
+        service.load()
+        if reload_interval and reload_interval > 0:
+            threading.Thread(
+                target=watch_models, args=(service, reload_interval, stop_event), daemon=True
+            ).start()
+        server_thread.join()
+    except KeyboardInterrupt:
+        logger.info("Arrêt du serveur...")
+    finally:
+        stop_event.set()
+        server.shutdown()
+        server.server_close()
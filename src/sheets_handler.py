@@ -2,58 +2,230 @@
 Module d'intégration avec Google Sheets
 """
 
-import gspread
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
 
-from configs.config import SERVICE_ACCOUNT_PATH, SHEET_NAME, INPUT_WORKSHEET_NAME, OUTPUT_WORKSHEET_NAME
+from configs.config import (
+    SERVICE_ACCOUNT_PATH, SHEET_NAME, INPUT_WORKSHEET_NAME, OUTPUT_WORKSHEET_NAME,
+    SHEETS_INCREMENTAL_WRITE, SHEETS_CACHE_DIR, SHEETS_MAX_CELLS_PER_REQUEST, SHEETS_APPEND_BATCH_ROWS,
+    SHEETS_READ_CHUNK_ROWS, SHEETS_ROW_KEY, NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, EXTRAS_LIST
+)
+from src.metrics import metrics
 from src.utils import get_logger
 
 logger = get_logger(__name__)
 
+# gspread, Google auth et gspread_dataframe (~0,7 s à l'import) ne sont
+# chargés qu'au premier appel qui en a besoin
+
+
+def sheet_values(df):
+    """En-tête et lignes d'un DataFrame en valeurs de cellules (NaN -> "")"""
+    rows = df.astype(object).where(pd.notna(df), "").values.tolist()
+    rows = [[v.item() if isinstance(v, np.generic) else v for v in row] for row in rows]
+    return [str(col) for col in df.columns], rows
+
+
+def to_numeric_lossless(series):
+    """Série convertie en nombres si aucune valeur non vide n'est perdue, sinon None"""
+    converted = pd.to_numeric(series, errors="coerce")
+    if (converted.notna() == series.notna()).all():
+        return converted
+    return None
+
+
+def apply_input_schema(df):
+    """Types déclarés des colonnes d'entrée d'un bloc
+
+    - NUMERICAL_COLUMNS: float64 si toutes les valeurs sont numériques
+      (sinon texte brut, nettoyé par le préprocesseur, ex: "80 m²");
+    - CATEGORICAL_COLUMNS: category (avec "Unknown", valeur de remplissage);
+    - extras: int8 (0/1), float32 s'il manque des valeurs;
+    - autres colonnes: nombres si la conversion est sans perte, sinon texte.
+
+    Les types sont choisis d'après les valeurs du bloc: catégories,
+    int8/float32 et nombres/texte peuvent différer d'un bloc à l'autre.
+    Prétraiter chaque bloc (DataPreprocessor.preprocess) avant de les
+    concaténer; des blocs bruts concaténés ont des colonnes en object.
+    """
+    for col in df.columns:
+        series = df[col]
+        if col in CATEGORICAL_COLUMNS:
+            categories = pd.Index(series.dropna().unique(), dtype=object)
+            if "Unknown" not in categories:
+                categories = categories.append(pd.Index(["Unknown"], dtype=object))
+            df[col] = pd.Categorical(series, categories=categories)
+            continue
+        converted = to_numeric_lossless(series)
+        if converted is None:
+            continue
+        if col in EXTRAS_LIST:
+            df[col] = converted.astype("int8") if converted.notna().all() else converted.astype("float32")
+        elif col in NUMERICAL_COLUMNS:
+            df[col] = converted.astype("float64")
+        else:
+            df[col] = converted
+    return df
+
+
+def count_api_call(op, n=1):
+    """Compteur des appels à l'API Sheets, par type d'opération"""
+    metrics.inc("sheets_api_calls", n, op=op)
+
+
+def row_hash(row):
+    """Empreinte d'une ligne de cellules"""
+    data = json.dumps(row, ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def row_keys(df, key):
+    """Clé de chaque ligne: valeur de la colonne key si elle identifie les lignes, sinon position"""
+    if key in df.columns:
+        keys = df[key].astype(str).tolist()
+        if df[key].notna().all() and len(set(keys)) == len(keys):
+            return keys
+        logger.warning(f"Colonne '{key}' vide ou en double: lignes identifiées par leur position")
+    return [str(i) for i in range(len(df))]
+
+
+def row_ranges(indices):
+    """Regroupe des indices de lignes triés en plages contiguës [(début, fin)]"""
+    ranges = []
+    for i in indices:
+        if ranges and i == ranges[-1][1] + 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return [tuple(r) for r in ranges]
+
 
 class SheetsHandler:
     """Gère la lecture/écriture dans Google Sheets"""
     
-    def __init__(self, service_account_path=SERVICE_ACCOUNT_PATH, sheet_name=SHEET_NAME):
+    def __init__(self, service_account_path=SERVICE_ACCOUNT_PATH, sheet_name=SHEET_NAME, gc=None,
+                 cache_dir=SHEETS_CACHE_DIR):
         self.service_account_path = service_account_path
         self.sheet_name = sheet_name
-        self.gc = None
+        # Client gspread injectable (ex: faux backend en mémoire pour les tests)
+        self.gc = gc
         self.sh = None
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._append_lock = threading.Lock()
+        # Onglets cibles des ajouts, pour ne pas relire leurs métadonnées à chaque ajout
+        self._append_worksheets = {}
         self.connect()
     
     def connect(self):
         """Se connecte à Google Sheets"""
         logger.info("Connexion à Google Sheets...")
         try:
-            self.gc = gspread.service_account(filename=self.service_account_path)
+            if self.gc is None:
+                import gspread
+                self.gc = gspread.service_account(filename=self.service_account_path)
             self.sh = self.gc.open(self.sheet_name)
             logger.info("Connexion réussie!")
         except Exception as e:
             logger.error(f"Erreur de connexion: {str(e)}")
             raise
     
+    @metrics.timed("sheets_read")
     def read_input(self, worksheet_name=INPUT_WORKSHEET_NAME):
         """Lit les données d'entrée"""
         logger.info(f"Lecture depuis l'onglet '{worksheet_name}'...")
+        from gspread_dataframe import get_as_dataframe
         try:
             worksheet = self.sh.worksheet(worksheet_name)
             df = get_as_dataframe(worksheet, evaluate_formulas=True)
             df = df.dropna(how="all")
+            count_api_call("worksheet")
+            count_api_call("values_get")
+            metrics.inc("sheets_rows_read", len(df))
             logger.info(f"{len(df)} lignes lues!")
             return df
         except Exception as e:
             logger.error(f"Erreur de lecture: {str(e)}")
             raise
     
-    def write_output(self, df, worksheet_name=OUTPUT_WORKSHEET_NAME):
-        """Écrit les résultats dans Google Sheets"""
+    def iter_input(self, worksheet_name=INPUT_WORKSHEET_NAME, chunk_rows=SHEETS_READ_CHUNK_ROWS):
+        """Lit l'onglet d'entrée par plages de chunk_rows lignes (générateur de DataFrames)
+
+        Chaque bloc reçoit les types déclarés (apply_input_schema, choisis
+        d'après ses valeurs), les lignes entièrement vides sont retirées.
+        La mémoire utilisée ne dépend que de la taille des blocs.
+        """
+        from gspread.utils import rowcol_to_a1
+        logger.info(f"Lecture par blocs de {chunk_rows} lignes depuis l'onglet '{worksheet_name}'...")
+        try:
+            with metrics.span("sheets_read_chunk"):
+                worksheet = self.sh.worksheet(worksheet_name)
+                header_rows = worksheet.get(f"A1:{rowcol_to_a1(1, worksheet.col_count)}")
+            count_api_call("worksheet")
+            count_api_call("values_get")
+            if not header_rows:
+                return
+            header = [str(col) for col in header_rows[0]]
+            n_cols = len(header)
+            last_col = rowcol_to_a1(1, n_cols).rstrip("0123456789")
+            
+            total = 0
+            start = 2
+            while start <= worksheet.row_count:
+                end = min(start + chunk_rows - 1, worksheet.row_count)
+                # Temps de lecture et de typage du bloc, hors traitement par l'appelant
+                with metrics.span("sheets_read_chunk"):
+                    rows = worksheet.get(f"A{start}:{last_col}{end}")
+                    df = None
+                    if rows:
+                        # L'API omet les cellules vides de fin de ligne
+                        padded = [list(row) + [""] * (n_cols - len(row)) for row in rows]
+                        df = pd.DataFrame(padded, columns=header).replace("", np.nan).dropna(how="all")
+                        df = apply_input_schema(df) if len(df) else None
+                count_api_call("values_get")
+                if df is not None:
+                    total += len(df)
+                    metrics.inc("sheets_rows_read", len(df))
+                    yield df
+                # L'API omet les lignes vides de fin de plage: un bloc court ou vide
+                # peut être suivi de données, on lit jusqu'à row_count par plages
+                # de chunk_rows lignes (jamais plus d'un bloc en mémoire)
+                start = end + 1
+            logger.info(f"{total} lignes lues!")
+        except Exception as e:
+            logger.error(f"Erreur de lecture: {str(e)}")
+            raise
+    
+    def write_output(self, df, worksheet_name=OUTPUT_WORKSHEET_NAME, incremental=SHEETS_INCREMENTAL_WRITE):
+        """Écrit les résultats dans Google Sheets
+
+        En mode incrémental, l'onglet est conservé et seules les lignes
+        modifiées depuis la dernière écriture sont envoyées.
+        """
+        if incremental:
+            return self.write_incremental(df, worksheet_name)
+        
         logger.info(f"Écriture dans l'onglet '{worksheet_name}'...")
+        with metrics.span("sheets_write", mode="full"):
+            self._write_full(df, worksheet_name)
+        metrics.inc("sheets_rows_written", len(df))
+    
+    def _write_full(self, df, worksheet_name):
+        """Supprime et recrée l'onglet puis y écrit tout le DataFrame"""
+        import gspread
+        from gspread_dataframe import set_with_dataframe
         try:
             # Supprimer l'onglet s'il existe
             try:
+                count_api_call("worksheet")
                 output_worksheet = self.sh.worksheet(worksheet_name)
+                count_api_call("del_worksheet")
                 self.sh.del_worksheet(output_worksheet)
+                self._append_worksheets.pop(worksheet_name, None)
                 logger.info(f"Onglet '{worksheet_name}' supprimé")
             except gspread.exceptions.WorksheetNotFound:
                 pass
@@ -66,8 +238,10 @@ class SheetsHandler:
                 rows=max_rows,
                 cols=max_cols
             )
+            count_api_call("add_worksheet")
             
             # Écrire les données
+            count_api_call("update_cells")
             set_with_dataframe(
                 output_worksheet,
                 df,
@@ -80,22 +254,263 @@ class SheetsHandler:
             logger.error(f"Erreur d'écriture: {str(e)}")
             raise
     
+    def cache_path(self, worksheet_name):
+        """Fichier d'état local d'un onglet (empreintes des lignes écrites)"""
+        key = hashlib.blake2b(f"{self.sh.id}/{worksheet_name}".encode("utf-8"), digest_size=8).hexdigest()
+        return self.cache_dir / f"{key}.json"
+    
+    def load_write_state(self, worksheet_name):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.cache_path(worksheet_name), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def save_write_state(self, worksheet_name, state):
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_path(worksheet_name)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        tmp_path.replace(path)
+    
+    def invalidate_write_state(self, worksheet_name):
+        if self.cache_dir is not None:
+            self.cache_path(worksheet_name).unlink(missing_ok=True)
+    
+    @metrics.timed("sheets_write", mode="incremental")
+    def write_incremental(self, df, worksheet_name=OUTPUT_WORKSHEET_NAME, key=SHEETS_ROW_KEY, upsert=False):
+        """Écrit seulement les lignes modifiées depuis la dernière écriture
+
+        Les lignes sont identifiées par la colonne key (URL de l'annonce),
+        ou par leur position si df ne l'a pas: l'état local de la dernière
+        écriture associe à chaque clé sa ligne dans l'onglet et l'empreinte
+        de ses cellules. Les clés modifiées sont réécrites sur place, les
+        nouvelles occupent les lignes libérées puis sont ajoutées en fin
+        d'onglet, le tout en quelques appels values_batch_update: insérer
+        ou retirer une annonce ne décale pas les autres.
+
+        upsert=False: df est le contenu complet, les clés absentes sont
+        vidées. upsert=True: seules les lignes de df sont écrites, les
+        autres restent (ex: annonces d'un run de scraping ajoutées au
+        catalogue).
+
+        Sans état valide (premier run, autre onglet, colonnes différentes),
+        l'onglet est réécrit en entier; en mode upsert son contenu est
+        d'abord relu pour y fusionner df. Retourne le nombre de lignes
+        envoyées.
+        """
+        import gspread
+        logger.info(f"Écriture incrémentale dans l'onglet '{worksheet_name}'...")
+        try:
+            if upsert and key not in df.columns:
+                raise ValueError(f"Colonne clé '{key}' absente: impossible d'écrire en upsert")
+            
+            try:
+                count_api_call("worksheet")
+                worksheet = self.sh.worksheet(worksheet_name)
+            except gspread.exceptions.WorksheetNotFound:
+                count_api_call("add_worksheet")
+                worksheet = self.sh.add_worksheet(
+                    title=worksheet_name, rows=len(df) + 1, cols=max(len(df.columns), 1)
+                )
+            
+            header = [str(col) for col in df.columns]
+            state = self.load_write_state(worksheet_name)
+            valid = (
+                state is not None
+                and state.get("worksheet_id") == worksheet.id
+                and state.get("header") == header
+                and state.get("key") == key
+                and "rows" in state
+            )
+            if upsert and not valid:
+                df = self._merge_with_worksheet(worksheet, df, key)
+                upsert = False
+            
+            header, rows = sheet_values(df)
+            keys = row_keys(df, key)
+            hashes = [row_hash(row) for row in rows]
+            n_cols = max(len(header), 1)
+            
+            if valid:
+                old = state["rows"]
+                free = list(state["free"])
+                next_row = state["next_row"]
+                entries = {}
+                if upsert:
+                    entries.update(old)
+                else:
+                    # Clés disparues: leurs lignes sont libérées
+                    current = set(keys)
+                    free.extend(entry[0] for k, entry in old.items() if k not in current)
+                freed = set(free) - set(state["free"])
+                free.sort(reverse=True)
+                updates = {}
+                for k, row, h in zip(keys, rows, hashes):
+                    entry = old.get(k)
+                    if entry is None:
+                        sheet_row = free.pop() if free else next_row
+                        next_row = max(next_row, sheet_row + 1)
+                        updates[sheet_row] = row
+                    else:
+                        sheet_row = entry[0]
+                        if entry[1] != h:
+                            updates[sheet_row] = row
+                    entries[k] = [sheet_row, h]
+                # Lignes libérées non réutilisées: à vider
+                stale = sorted(freed & set(free))
+            else:
+                count_api_call("clear")
+                worksheet.clear()
+                entries = {k: [i + 2, h] for i, (k, h) in enumerate(zip(keys, hashes))}
+                updates = {i + 2: row for i, row in enumerate(rows)}
+                free, stale = [], []
+                next_row = len(rows) + 2
+            
+            needed_rows = next_row - 1
+            if worksheet.row_count < needed_rows or worksheet.col_count < n_cols:
+                count_api_call("resize")
+                worksheet.resize(rows=max(worksheet.row_count, needed_rows),
+                                 cols=max(worksheet.col_count, n_cols))
+            
+            data = []
+            if not valid:
+                data.append((1, [header]))
+            changed = sorted(updates)
+            for start, end in row_ranges(changed):
+                data.append((start, [updates[i] for i in range(start, end + 1)]))
+            for start, end in row_ranges(stale):
+                data.append((start, [[""] * n_cols for _ in range(start, end + 1)]))
+            self.batch_update_rows(worksheet, data, n_cols)
+            
+            self.save_write_state(worksheet_name, {
+                "worksheet_id": worksheet.id, "header": header, "key": key,
+                "rows": entries, "free": sorted(free), "next_row": next_row
+            })
+            metrics.inc("sheets_rows_written", len(changed))
+            logger.info(f"{len(changed)} lignes modifiées sur {len(rows)} écrites "
+                        f"dans l'onglet '{worksheet_name}'!")
+            return len(changed)
+        except Exception as e:
+            logger.error(f"Erreur d'écriture: {str(e)}")
+            raise
+    
+    def _merge_with_worksheet(self, worksheet, df, key):
+        """Contenu actuel de l'onglet, mis à jour et complété par les lignes de df (clé key)"""
+        count_api_call("get_all_values")
+        values = worksheet.get_all_values()
+        if len(values) < 2 or key not in values[0]:
+            return df
+        existing = pd.DataFrame(values[1:], columns=values[0]).replace("", np.nan)
+        existing = existing[~existing[key].astype(str).isin(df[key].astype(str))]
+        return pd.concat([existing, df], ignore_index=True)
+    
+    def batch_update_rows(self, worksheet, data, n_cols):
+        """Envoie des blocs de lignes [(première ligne, valeurs)] en values_batch_update
+
+        Les blocs sont découpés et regroupés pour ne pas dépasser
+        SHEETS_MAX_CELLS_PER_REQUEST cellules par appel.
+        """
+        from gspread.utils import absolute_range_name, rowcol_to_a1
+        rows_per_block = max(1, SHEETS_MAX_CELLS_PER_REQUEST // n_cols)
+        requests, cells = [], 0
+        for first_row, values in data:
+            for offset in range(0, len(values), rows_per_block):
+                block = values[offset:offset + rows_per_block]
+                if requests and cells + len(block) * n_cols > SHEETS_MAX_CELLS_PER_REQUEST:
+                    count_api_call("values_batch_update")
+                    self.sh.values_batch_update({"valueInputOption": "RAW", "data": requests})
+                    requests, cells = [], 0
+                row = first_row + offset
+                a1 = f"{rowcol_to_a1(row, 1)}:{rowcol_to_a1(row + len(block) - 1, n_cols)}"
+                requests.append({"range": absolute_range_name(worksheet.title, a1), "values": block})
+                cells += len(block) * n_cols
+        if requests:
+            count_api_call("values_batch_update")
+            self.sh.values_batch_update({"valueInputOption": "RAW", "data": requests})
+    
     def append_data(self, df, worksheet_name=INPUT_WORKSHEET_NAME):
-        """Ajoute des données à une feuille existante"""
+        """Ajoute des données à une feuille existante
+
+        Utilise l'API append de Sheets: la fin du tableau est trouvée côté
+        serveur, sans relire la feuille, et deux ajouts concurrents ne
+        s'écrasent pas.
+        """
         logger.info(f"Ajout de données à l'onglet '{worksheet_name}'...")
         try:
-            worksheet = self.sh.worksheet(worksheet_name)
-            set_with_dataframe(
-                worksheet,
-                df,
-                include_index=False,
-                include_column_header=False,
-                row=len(worksheet.get_all_values()) + 1
-            )
+            _, rows = sheet_values(df)
+            self.append_rows(rows, worksheet_name)
             logger.info("Données ajoutées avec succès!")
         except Exception as e:
             logger.error(f"Erreur lors de l'ajout: {str(e)}")
             raise
+    
+    @metrics.timed("sheets_append")
+    def append_rows(self, rows, worksheet_name=INPUT_WORKSHEET_NAME):
+        """Ajoute des lignes de cellules en fin d'onglet (une requête par bloc de cellules)"""
+        if not rows:
+            return
+        worksheet = self._append_worksheets.get(worksheet_name)
+        if worksheet is None:
+            count_api_call("worksheet")
+            worksheet = self._append_worksheets[worksheet_name] = self.sh.worksheet(worksheet_name)
+        n_cols = max(len(row) for row in rows)
+        rows_per_request = max(1, SHEETS_MAX_CELLS_PER_REQUEST // n_cols)
+        # L'état de la dernière écriture incrémentale ne décrit plus l'onglet
+        self.invalidate_write_state(worksheet_name)
+        with self._append_lock:
+            for start in range(0, len(rows), rows_per_request):
+                count_api_call("append_rows")
+                worksheet.append_rows(
+                    rows[start:start + rows_per_request],
+                    value_input_option="RAW",
+                    insert_data_option="INSERT_ROWS",
+                    table_range="A1"
+                )
+        metrics.inc("sheets_rows_written", len(rows))
+
+
+class SheetsAppender:
+    """Regroupe plusieurs petits ajouts dans un même onglet en une seule requête
+
+    Partageable entre threads: les lignes sont mises en tampon et envoyées
+    par blocs d'au moins batch_rows lignes, ou à flush()/close().
+    """
+    
+    def __init__(self, handler, worksheet_name=INPUT_WORKSHEET_NAME, batch_rows=SHEETS_APPEND_BATCH_ROWS):
+        self.handler = handler
+        self.worksheet_name = worksheet_name
+        self.batch_rows = batch_rows
+        self.buffer = []
+        self._lock = threading.Lock()
+    
+    def append(self, df):
+        _, rows = sheet_values(df)
+        with self._lock:
+            self.buffer.extend(rows)
+            if len(self.buffer) < self.batch_rows:
+                return
+            rows, self.buffer = self.buffer, []
+        self.handler.append_rows(rows, self.worksheet_name)
+    
+    def flush(self):
+        with self._lock:
+            rows, self.buffer = self.buffer, []
+        self.handler.append_rows(rows, self.worksheet_name)
+    
+    def close(self):
+        self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 
 def prepare_output(df_original, predictions, price_real=None):
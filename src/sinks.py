@@ -0,0 +1,246 @@
+"""
+Sorties du scraping en flux
+
+Les moteurs de scraping produisent les annonces une à une (stream()); les
+sinks les reçoivent au fil de l'eau et les écrivent par blocs, sans garder
+tout le run en mémoire.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from configs.config import SINK_CHUNK_SIZE, STORAGE_WRITE_ROWS
+from src.storage import raw_schema, to_table, write_dataset
+from src.utils import get_logger
+from src.webhook import WebhookDelivery
+
+logger = get_logger(__name__)
+
+
+def iter_chunks(ads, chunk_size=SINK_CHUNK_SIZE):
+    """Regroupe un flux d'annonces en DataFrames de chunk_size lignes
+
+    Permet de lancer le prétraitement pendant le scraping:
+    for df in iter_chunks(scraper.stream()): preprocessor.preprocess(df)
+    """
+    chunk = []
+    for property_data in ads:
+        chunk.append(property_data)
+        if len(chunk) >= chunk_size:
+            yield pd.DataFrame(chunk)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk)
+
+
+def write_stream(ads, sinks, on_written=None):
+    """Envoie chaque annonce du flux à tous les sinks puis les ferme
+
+    Un sink en erreur est désactivé sans interrompre le scraping ni les
+    autres sinks. on_written(n) est appelé dès que les n premières
+    annonces sont écrites par tous les sinks actifs (tampons des
+    ChunkedSink vidés). Retourne le nombre d'annonces lues.
+    """
+    active = list(sinks)
+    count = written = 0
+
+    def report():
+        nonlocal written
+        n = written_count(active, count)
+        if on_written is not None and n > written:
+            written = n
+            on_written(n)
+
+    try:
+        for property_data in ads:
+            count += 1
+            for sink in list(active):
+                try:
+                    sink.write(property_data)
+                except Exception as e:
+                    logger.error(f"Sink {type(sink).__name__} désactivé: {e}")
+                    active.remove(sink)
+            report()
+    finally:
+        for sink in active:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.error(f"Erreur à la fermeture du sink {type(sink).__name__}: {e}")
+        # Un sink dont la fermeture a échoué garde ses annonces non écrites
+        report()
+    return count
+
+
+def written_count(sinks, count):
+    """Nombre d'annonces du flux (sur count) écrites par tous les sinks
+
+    Les ChunkedSink n'ont écrit que rows_written annonces, le reste est en
+    tampon; les autres sinks (webhook: file et spool) les ont prises en charge.
+    """
+    return min([count] + [sink.rows_written for sink in sinks if isinstance(sink, ChunkedSink)])
+
+
+class ChunkedSink:
+    """Sink qui accumule les annonces et les écrit par blocs de chunk_size"""
+
+    def __init__(self, chunk_size=SINK_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.columns = None
+        self.rows_written = 0
+
+    def write(self, property_data):
+        self.buffer.append(property_data)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        df = pd.DataFrame(self.buffer)
+        # Colonnes figées au premier bloc pour que tous les blocs s'alignent
+        if self.columns is None:
+            self.columns = list(df.columns)
+        else:
+            df = df.reindex(columns=self.columns)
+        self.write_chunk(df)
+        self.rows_written += len(df)
+        self.buffer = []
+
+    def write_chunk(self, df):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CallbackSink(ChunkedSink):
+    """Appelle callback(df) sur chaque bloc (ex: prétraitement pendant le scraping)"""
+
+    def __init__(self, callback, chunk_size=SINK_CHUNK_SIZE):
+        super().__init__(chunk_size)
+        self.callback = callback
+
+    def write_chunk(self, df):
+        self.callback(df)
+
+
+class CsvSink(ChunkedSink):
+    """Écrit les annonces dans un CSV, bloc par bloc"""
+
+    def __init__(self, path, chunk_size=SINK_CHUNK_SIZE):
+        super().__init__(chunk_size)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write_chunk(self, df):
+        first = self.rows_written == 0
+        df.to_csv(self.path, mode="w" if first else "a", header=first, index=False, encoding="utf-8")
+
+    def close(self):
+        super().close()
+        logger.info(f"{self.rows_written} annonces écrites dans {self.path}")
+
+
+class ParquetSink(ChunkedSink):
+    """Écrit les annonces dans un fichier Parquet, un row group par bloc"""
+
+    def __init__(self, path, chunk_size=SINK_CHUNK_SIZE):
+        super().__init__(chunk_size)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.writer = None
+        self.schema = None
+
+    def write_chunk(self, df):
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            self.schema = raw_schema(df.columns)
+            self.writer = pq.ParquetWriter(str(self.path), self.schema)
+        self.writer.write_table(to_table(df, self.schema))
+
+    def close(self):
+        super().close()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        logger.info(f"{self.rows_written} annonces écrites dans {self.path}")
+
+
+class DatasetSink(ChunkedSink):
+    """Ajoute les annonces au jeu Parquet partitionné (date de scraping, ville) de src.storage
+
+    Chaque bloc produit un fichier par partition: des blocs plus grands que
+    pour les autres sinks évitent une multitude de petits fichiers.
+    """
+
+    def __init__(self, root, chunk_size=STORAGE_WRITE_ROWS):
+        super().__init__(chunk_size)
+        self.root = Path(root)
+        self.schema = None
+
+    def write_chunk(self, df):
+        if self.schema is None:
+            self.schema = raw_schema(df.columns)
+        write_dataset(df, self.root, schema=self.schema)
+
+    def close(self):
+        super().close()
+        logger.info(f"{self.rows_written} annonces écrites dans {self.root}")
+
+
+class WebhookSink:
+    """Envoie les annonces au webhook n8n en arrière-plan (src.webhook.WebhookDelivery)"""
+
+    def __init__(self, url, **delivery_options):
+        self.delivery = WebhookDelivery(url, **delivery_options).start()
+
+    def write(self, property_data):
+        self.delivery.submit(property_data)
+
+    def close(self):
+        self.delivery.close()
+
+
+class SheetsSink(ChunkedSink):
+    """Écrit les annonces dans un onglet Google Sheets, bloc par bloc
+
+    Le premier bloc remplace l'onglet (avec en-tête), les suivants y sont
+    ajoutés. Avec key (colonne clé, ex: "url"), l'onglet est gardé: chaque
+    bloc y est fusionné (write_incremental en upsert), les annonces déjà
+    présentes sont mises à jour sur place et les nouvelles ajoutées.
+    """
+
+    def __init__(self, handler, worksheet_name, chunk_size=SINK_CHUNK_SIZE, key=None):
+        super().__init__(chunk_size)
+        self.handler = handler
+        self.worksheet_name = worksheet_name
+        self.key = key
+
+    def write_chunk(self, df):
+        if self.key is not None:
+            self.handler.write_incremental(df, worksheet_name=self.worksheet_name, key=self.key, upsert=True)
+        elif self.rows_written == 0:
+            # Onglet recréé: les blocs suivants sont ajoutés derrière
+            self.handler.write_output(df, worksheet_name=self.worksheet_name, incremental=False)
+        else:
+            self.handler.append_data(df, worksheet_name=self.worksheet_name)
+
+
+def file_sink(path, chunk_size=SINK_CHUNK_SIZE):
+    """CsvSink ou ParquetSink selon l'extension du fichier, DatasetSink pour un dossier"""
+    suffix = Path(path).suffix
+    if suffix == ".parquet":
+        return ParquetSink(path, chunk_size)
+    if suffix == ".csv":
+        return CsvSink(path, chunk_size)
+    return DatasetSink(path)
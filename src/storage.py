@@ -0,0 +1,213 @@
+"""
+Stockage colonnaire des annonces brutes et prétraitées (Parquet partitionné)
+
+Chaque jeu de données est un dossier Parquet partitionné à la Hive par
+date de scraping puis par ville (scrape_date=2026-10-17/ville=Rabat/...),
+avec un schéma typé: texte pour les champs bruts, int8 pour les extras,
+float64 pour les colonnes numériques prétraitées. Les lectures ne chargent
+que les colonnes demandées et poussent les filtres jusqu'aux partitions
+et aux statistiques des row groups. Le CSV reste un format d'export.
+
+    df = read_dataset(SCRAPE_OUTPUT_PATH, columns=["prix", "surface"],
+                      filters=[("ville", "=", "Rabat"), ("scrape_date", ">=", "2026-10-01")])
+"""
+
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from configs.config import EXTRAS_LIST, NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, STORAGE_BATCH_ROWS
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Colonnes de partitionnement, dans l'ordre des dossiers
+PARTITION_COLUMNS = ["scrape_date", "ville"]
+UNKNOWN_VILLE = "Unknown"
+
+
+def ville_from_localisation(localisation):
+    """Ville d'une série de localisations 'Zone à Ville' (même règle que DataPreprocessor.extract_location)"""
+    loc = localisation.astype(object).where(localisation.notna(), None)
+    parts = loc.str.split(" à ", n=1)
+    ville = parts.str[1].where(parts.str.len() > 1, loc).str.strip()
+    return ville.replace("", None).fillna(UNKNOWN_VILLE)
+
+
+def with_partitions(df, scrape_date=None):
+    """Ajoute les colonnes de partitionnement manquantes (date du jour, ville de la localisation)"""
+    df = df.copy(deep=False)
+    today = scrape_date or time.strftime("%Y-%m-%d")
+    if "scrape_date" not in df.columns:
+        df["scrape_date"] = today
+    if "ville" not in df.columns:
+        if "localisation" in df.columns:
+            df["ville"] = ville_from_localisation(df["localisation"])
+        else:
+            df["ville"] = UNKNOWN_VILLE
+    for col, default in (("scrape_date", today), ("ville", UNKNOWN_VILLE)):
+        df[col] = df[col].astype(object).where(df[col].notna(), default).astype(str)
+    return df
+
+
+def raw_schema(columns):
+    """Annonces brutes: texte pour les champs, entier pour les extras (0/1)"""
+    import pyarrow as pa
+    return pa.schema([
+        (col, pa.int8() if col in EXTRAS_LIST else pa.string()) for col in columns
+    ])
+
+
+def processed_schema(df):
+    """Annonces prétraitées: float64 pour les numériques et le prix, texte pour
+    les catégories, int8 pour les extras, type déduit pour le reste"""
+    import pyarrow as pa
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in inferred:
+        if field.name in NUMERICAL_COLUMNS or field.name == "prix_dh":
+            fields.append(pa.field(field.name, pa.float64()))
+        elif field.name in CATEGORICAL_COLUMNS or field.name in PARTITION_COLUMNS:
+            fields.append(pa.field(field.name, pa.string()))
+        elif field.name in EXTRAS_LIST:
+            fields.append(pa.field(field.name, pa.int8()))
+        else:
+            fields.append(field)
+    return pa.schema(fields)
+
+
+def to_table(df, schema):
+    """DataFrame -> table Arrow au schéma donné (texte manquant -> null, extras manquants -> 0)"""
+    import pyarrow as pa
+    df = df.copy(deep=False)
+    for field in schema:
+        if field.name not in df.columns:
+            df[field.name] = None
+        if pa.types.is_string(field.type):
+            present = df[field.name].notna()
+            df[field.name] = df[field.name].astype(str).astype(object).where(present, None)
+        elif pa.types.is_int8(field.type):
+            df[field.name] = pd.to_numeric(df[field.name], errors="coerce").fillna(0).astype("int8")
+        elif pa.types.is_floating(field.type):
+            df[field.name] = pd.to_numeric(df[field.name], errors="coerce")
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(
+        pa.schema([(col, pa.string()) for col in PARTITION_COLUMNS]), flavor="hive"
+    )
+
+
+def write_dataset(df, root, schema=None, scrape_date=None, written_partitions=None):
+    """Ajoute df au jeu de données root (un fichier par partition et par appel)
+
+    schema: schéma des colonnes hors partitions (défaut: raw_schema des
+    colonnes de df). written_partitions: ensemble des partitions
+    (scrape_date, ville) déjà écrites par l'appelant, mis à jour; les
+    autres partitions de df sont alors remplacées au lieu d'être
+    complétées, ce qui permet de réécrire un jeu bloc par bloc sans
+    dupliquer les lignes d'un run précédent. Retourne le nombre de lignes
+    écrites.
+    """
+    import pyarrow.dataset as ds
+
+    if df.empty:
+        return 0
+    df = with_partitions(df, scrape_date)
+    if schema is None:
+        schema = raw_schema([col for col in df.columns if col not in PARTITION_COLUMNS])
+    for col in PARTITION_COLUMNS:
+        if col not in schema.names:
+            schema = schema.append(_partitioning().schema.field(col))
+
+    parts = [(df, "overwrite_or_ignore")]
+    if written_partitions is not None:
+        keys = pd.MultiIndex.from_frame(df[PARTITION_COLUMNS])
+        fresh = ~keys.isin(list(written_partitions))
+        written_partitions.update(keys.unique())
+        # delete_matching vide les dossiers des partitions écrites avant d'y écrire
+        parts = [(df[fresh], "delete_matching"), (df[~fresh], "overwrite_or_ignore")]
+
+    Path(root).mkdir(parents=True, exist_ok=True)
+    for part, existing_data_behavior in parts:
+        if part.empty:
+            continue
+        ds.write_dataset(
+            to_table(part, schema), str(root), format="parquet", partitioning=_partitioning(),
+            # Nom unique: les écritures successives s'ajoutent sans s'écraser
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior=existing_data_behavior,
+        )
+    return len(df)
+
+
+def _filter_expression(filters):
+    """Filtres en liste [(colonne, op, valeur)] (ou liste de listes: OU de ET) -> expression Arrow"""
+    if filters is None:
+        return None
+    import pyarrow.parquet as pq
+    if isinstance(filters, list):
+        return pq.filters_to_expression(filters)
+    return filters
+
+
+def open_dataset(root):
+    """Jeu de données Arrow de root, schéma unifié sur tous ses fichiers"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if not Path(root).exists():
+        raise ValueError(f"Jeu de données introuvable: {root}")
+    dataset = ds.dataset(str(root), format="parquet", partitioning=_partitioning())
+    # Les colonnes peuvent varier d'une écriture à l'autre (nouvel extra...)
+    schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+    if len(schemas) > 1:
+        schema = pa.unify_schemas(schemas + [_partitioning().schema])
+        dataset = ds.dataset(str(root), format="parquet", partitioning=_partitioning(), schema=schema)
+    return dataset
+
+
+def read_dataset(root, columns=None, filters=None):
+    """Lit root en DataFrame: seulement les colonnes demandées et les lignes qui passent filters"""
+    dataset = open_dataset(root)
+    table = dataset.to_table(columns=columns, filter=_filter_expression(filters))
+    logger.info(f"{table.num_rows} lignes lues depuis {root}")
+    return table.to_pandas()
+
+
+def iter_dataset(root, columns=None, filters=None, batch_rows=STORAGE_BATCH_ROWS):
+    """Lit root par DataFrames d'environ batch_rows lignes (mémoire bornée)"""
+    import pyarrow as pa
+
+    dataset = open_dataset(root)
+    pending, rows = [], 0
+    for batch in dataset.to_batches(columns=columns, filter=_filter_expression(filters),
+                                    batch_size=batch_rows):
+        if batch.num_rows == 0:
+            continue
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= batch_rows:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def export_csv(root, path, columns=None, filters=None, batch_rows=STORAGE_BATCH_ROWS):
+    """Exporte root (ou la sélection colonnes/filtres) en un fichier CSV; retourne le nombre de lignes"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for df in iter_dataset(root, columns, filters, batch_rows):
+        df.to_csv(path, mode="w" if total == 0 else "a", header=total == 0, index=False, encoding="utf-8")
+        total += len(df)
+    if total == 0:
+        pd.DataFrame(columns=columns or []).to_csv(path, index=False, encoding="utf-8")
+    logger.info(f"{total} lignes exportées dans {path}")
+    return total
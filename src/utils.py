@@ -17,13 +17,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def is_missing(value):
+    """pd.isna pour une valeur isolée; pandas n'est importé qu'au premier appel"""
+    import pandas as pd
+    return pd.isna(value)
+
+
 class PropertyScraper:
     """Classe utilitaire pour le scraping de propriétés"""
     
     @staticmethod
     def extract_number(text):
         """Extrait le premier nombre d'un texte"""
-        if not text or pd.isna(text):
+        if not text or is_missing(text):
             return None
         match = re.search(r'\d+', str(text).replace(',', ''))
         return int(match.group()) if match else None
@@ -31,7 +37,7 @@ class PropertyScraper:
     @staticmethod
     def extract_price(prix_str):
         """Nettoie et convertit le prix en DH"""
-        if pd.isna(prix_str):
+        if is_missing(prix_str):
             return None
         
         prix_str = str(prix_str)
@@ -53,7 +59,7 @@ class PropertyScraper:
     @staticmethod
     def extract_surface(val):
         """Extrait et convertit la surface en m²"""
-        if pd.isna(val):
+        if is_missing(val):
             return None
         digits = re.sub(r'\D', '', str(val))
         return int(digits) if digits else None
@@ -65,7 +71,7 @@ class DataValidator:
     @staticmethod
     def is_valid_price(price, min_price=10000, max_price=100000000):
         """Vérifie si le prix est valide"""
-        if pd.isna(price):
+        if is_missing(price):
             return False
         try:
             price = float(price)
@@ -76,7 +82,7 @@ class DataValidator:
     @staticmethod
     def is_valid_surface(surface, min_surface=10, max_surface=10000):
         """Vérifie si la surface est valide"""
-        if pd.isna(surface):
+        if is_missing(surface):
             return False
         try:
             surface = float(surface)
@@ -87,7 +93,7 @@ class DataValidator:
     @staticmethod
     def is_valid_rooms(rooms):
         """Vérifie si le nombre de pièces est valide"""
-        if pd.isna(rooms):
+        if is_missing(rooms):
             return True
         try:
             return 0 <= int(rooms) <= 20
@@ -104,11 +110,3 @@ def ensure_directory(path):
 def get_logger(name):
     """Retourne un logger configuré"""
     return logging.getLogger(name)
-
-
-# Import pandas ici pour éviter les imports circulaires
-try:
-    import pandas as pd
-except ImportError:
-    logger.warning("pandas not installed")
-    pd = None
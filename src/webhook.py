@@ -0,0 +1,280 @@
+"""
+Envoi des annonces au webhook n8n en arrière-plan
+
+Les annonces sont mises en file sans bloquer le scraping, regroupées en
+tableaux JSON et envoyées par un thread dédié sur une connexion
+keep-alive. Les envois échoués sont retentés avec backoff exponentiel puis
+écrits sur disque (spool), et renvoyés dès que n8n répond à nouveau.
+Après un échec, les lots suivants vont directement au spool: un seul
+essai, sans reprise, toutes les probe_interval secondes tant que n8n ne
+répond pas.
+"""
+
+import json
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from configs.config import (
+    WEBHOOK_URL, WEBHOOK_BATCH_SIZE, WEBHOOK_FLUSH_INTERVAL, WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_RETRIES, WEBHOOK_BACKOFF, WEBHOOK_TIMEOUT, WEBHOOK_SPOOL_DIR,
+    WEBHOOK_PROBE_INTERVAL, WEBHOOK_CLOSE_TIMEOUT
+)
+from src.metrics import metrics as run_metrics
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Fin de la file: vider les lots en cours puis arrêter le thread
+_STOP = object()
+
+# Statuts HTTP transitoires qui justifient une nouvelle tentative
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def write_jsonl(path, records):
+    """Écrit un fichier JSON Lines atomiquement (fichier temporaire puis renommage)"""
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    tmp_path.replace(path)
+
+
+class WebhookDelivery:
+    """File d'envoi en arrière-plan vers un webhook, par lots"""
+
+    def __init__(self, url=WEBHOOK_URL, batch_size=WEBHOOK_BATCH_SIZE,
+                 flush_interval=WEBHOOK_FLUSH_INTERVAL, max_queue=WEBHOOK_QUEUE_SIZE,
+                 retries=WEBHOOK_RETRIES, backoff=WEBHOOK_BACKOFF, timeout=WEBHOOK_TIMEOUT,
+                 spool_dir=WEBHOOK_SPOOL_DIR, probe_interval=WEBHOOK_PROBE_INTERVAL):
+        if not url:
+            raise ValueError("URL du webhook manquante")
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.probe_interval = probe_interval
+        # Webhook injoignable: prochain essai à cette date (time.monotonic), None sinon
+        self._next_probe = None
+        # close() a expiré: plus d'envoi, tout va au spool
+        self._abandoned = False
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.session = self._build_session()
+        self.thread = None
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            "queued": 0, "sent": 0, "batches_sent": 0, "retries": 0,
+            "failed_batches": 0, "spooled": 0, "replayed": 0, "short_circuited": 0,
+            "max_queue_depth": 0, "responses": 0, "latency_total": 0.0, "latency_max": 0.0,
+        }
+
+    def _build_session(self):
+        """Session keep-alive; les reprises sont gérées ici, pas par urllib3"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _count(self, **increments):
+        with self._metrics_lock:
+            for name, value in increments.items():
+                self.metrics[name] += value
+        for name, value in increments.items():
+            run_metrics.inc(f"webhook_{name}", value)
+
+    def start(self):
+        """Démarre le thread d'envoi (et renvoie d'abord le spool d'un run précédent)"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="webhook-delivery", daemon=True)
+            self.thread.start()
+        return self
+
+    def submit(self, property_data):
+        """Met une annonce en file sans bloquer; file pleine: écrite directement dans le spool"""
+        try:
+            self.queue.put_nowait(property_data)
+        except queue.Full:
+            self._spool([property_data])
+            return
+        self._count(queued=1)
+        depth = self.queue.qsize()
+        with self._metrics_lock:
+            self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], depth)
+
+    def close(self, timeout=WEBHOOK_CLOSE_TIMEOUT):
+        """Envoie les annonces restantes puis arrête le thread
+
+        Ce qui n'a pas pu partir avant timeout (s) est écrit dans le spool,
+        y compris si le thread est bloqué ou arrêté et la file pleine.
+        """
+        if self.thread is not None:
+            deadline = time.monotonic() + timeout
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self.thread.join(max(0.0, deadline - time.monotonic()))
+            if self.thread.is_alive():
+                logger.warning("Envoi webhook non terminé, annonces restantes écrites dans le spool")
+                # Le lot en cours d'envoi va aussi au spool, sans autre reprise
+                self._abandoned = True
+            # Thread bloqué, ou arrêté par une erreur: la file restante va au spool
+            self._spool(self._drain())
+            if self.thread.is_alive():
+                try:
+                    self.queue.put_nowait(_STOP)
+                except queue.Full:
+                    pass
+            self.thread = None
+        self.session.close()
+        logger.info(f"Webhook: {self.snapshot()}")
+
+    def _drain(self):
+        records = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return records
+            if item is not _STOP:
+                records.append(item)
+
+    def _run(self):
+        self.replay_spool()
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                if batch:
+                    self._deliver(batch)
+                return
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                if self._deliver(batch):
+                    self.replay_spool()
+                batch, deadline = [], None
+
+    @property
+    def offline(self):
+        """True si le dernier envoi a échoué (lots envoyés au spool jusqu'au prochain essai)"""
+        return self._next_probe is not None
+
+    def _mark_offline(self):
+        if self._next_probe is None:
+            logger.warning(f"Webhook injoignable, lots écrits dans le spool "
+                           f"(nouvel essai dans {self.probe_interval:g} s)")
+        self._next_probe = time.monotonic() + self.probe_interval
+
+    def _mark_online(self):
+        if self._next_probe is not None:
+            logger.info("Webhook de nouveau joignable")
+            self._next_probe = None
+
+    def post(self, records, retries=None):
+        """Un envoi (avec reprises); retourne True si le webhook a accepté le lot"""
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            if attempt and self._abandoned:
+                break
+            if attempt:
+                self._count(retries=1)
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.url, json=records, timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.warning(f"Erreur lors de l'envoi au webhook: {e}")
+                continue
+            latency = time.perf_counter() - start
+            run_metrics.observe("webhook_post", latency)
+            with self._metrics_lock:
+                self.metrics["responses"] += 1
+                self.metrics["latency_total"] += latency
+                self.metrics["latency_max"] = max(self.metrics["latency_max"], latency)
+            if response.ok:
+                return True
+            logger.warning(f"Erreur webhook: {response.status_code}")
+            if response.status_code not in RETRY_STATUSES:
+                break
+        return False
+
+    def _deliver(self, records):
+        if self._abandoned or (self.offline and time.monotonic() < self._next_probe):
+            # Webhook injoignable: pas d'attente de timeout ni de backoff par lot
+            self._count(short_circuited=len(records))
+            self._spool(records)
+            return False
+        # Hors ligne, le lot sert de sonde: un seul essai
+        if self.post(records, retries=0 if self.offline else None):
+            self._mark_online()
+            self._count(sent=len(records), batches_sent=1)
+            return True
+        self._mark_offline()
+        self._count(failed_batches=1)
+        self._spool(records)
+        return False
+
+    def _spool(self, records):
+        """Écrit un lot non envoyé sur disque (un fichier JSON Lines par lot)"""
+        if not records:
+            return
+        if self.spool_dir is None:
+            logger.error(f"{len(records)} annonces perdues (pas de spool configuré)")
+            return
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spool_dir / f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.jsonl"
+        write_jsonl(path, records)
+        self._count(spooled=len(records))
+        logger.warning(f"{len(records)} annonces écrites dans le spool {path.name}")
+
+    def replay_spool(self):
+        """Renvoie les lots du spool, du plus ancien au plus récent; s'arrête au premier échec"""
+        if self.spool_dir is None or not self.spool_dir.exists():
+            return 0
+        replayed = 0
+        for path in sorted(self.spool_dir.glob("*.jsonl")):
+            with open(path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            for i in range(0, len(records), self.batch_size):
+                batch = records[i:i + self.batch_size]
+                if not self.post(batch, retries=0 if self.offline else None):
+                    # Garder le reste pour le prochain essai
+                    write_jsonl(path, records[i:])
+                    self._mark_offline()
+                    return replayed
+                self._mark_online()
+                self._count(replayed=len(batch), sent=len(batch), batches_sent=1)
+                replayed += len(batch)
+            path.unlink()
+            logger.info(f"Spool {path.name} renvoyé au webhook")
+        return replayed
+
+    def snapshot(self):
+        """Métriques courantes: profondeur de file, envois, latence moyenne/max (s)"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        responses = metrics["responses"]
+        metrics["queue_depth"] = self.queue.qsize()
+        metrics["latency_mean"] = round(metrics.pop("latency_total") / responses, 4) if responses else 0.0
+        metrics["latency_max"] = round(metrics["latency_max"], 4)
+        return metrics
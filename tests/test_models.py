@@ -0,0 +1,58 @@
+"""
+Prédiction parallèle de PricePredictor: mêmes résultats quel que soit le
+backend, et chaque modèle n'est envoyé qu'une fois aux processus workers
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sklearn.linear_model import LinearRegression, Ridge
+
+from src.models import PricePredictor
+
+
+class CountingRegression(LinearRegression):
+    """Compte ses sérialisations; le worker reçoit une LinearRegression ordinaire"""
+
+    pickles = 0
+
+    def __reduce_ex__(self, protocol):
+        type(self).pickles += 1
+        return LinearRegression, (), dict(self.__dict__)
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1000, 4))
+    y = X @ np.array([1.0, -2.0, 0.5, 3.0]) + rng.normal(scale=0.1, size=1000)
+    return X, y
+
+
+@pytest.fixture
+def models(data):
+    X, y = data
+    CountingRegression.pickles = 0
+    return {"lineaire": CountingRegression().fit(X, y), "ridge": Ridge().fit(X, y)}
+
+
+@pytest.mark.parametrize("n_jobs,backend", [(1, "threading"), (2, "threading"), (2, "loky")])
+def test_predictions_match_across_backends(data, models, n_jobs, backend):
+    X, _ = data
+    predictor = PricePredictor(models=models, n_jobs=n_jobs, backend=backend, chunk_size=128)
+    predictions = predictor.predict(X)
+    for name, model in models.items():
+        np.testing.assert_allclose(predictions[f"prix_predit_{name}"], model.predict(X))
+
+
+def test_process_backend_sends_each_model_once(data, models):
+    X, _ = data
+    predictor = PricePredictor(models=models, n_jobs=2, backend="loky", chunk_size=100)
+    predictor.predict_matrix(X)
+    # 10 blocs de lignes, mais un seul envoi du modèle
+    assert CountingRegression.pickles == 1
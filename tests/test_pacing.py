@@ -0,0 +1,133 @@
+"""
+Limite de débit du scraping (src.pacing.RateLimiter) et cadence des workers
+de PropertyScraper.stream_parallel sur le site local (benchmarks/fixture_site.py)
+"""
+
+import itertools
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_parallel import FixtureScraper
+from benchmarks.fake_driver import HttpDriver
+from benchmarks.fixture_site import FixtureSite
+from src.pacing import RateLimiter
+
+DELAY = 0.05
+
+
+class RecordingDriver(HttpDriver):
+    """HttpDriver qui note l'instant de chaque chargement de page"""
+
+    numbers = itertools.count()
+
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+        # id() peut être réutilisé par un driver créé après la fin d'un autre
+        self.number = next(self.numbers)
+
+    def get(self, url):
+        self.log.append((self.number, time.monotonic()))
+        super().get(url)
+
+
+class RecordingScraper(FixtureScraper):
+    log = None
+
+    def setup_driver(self):
+        self.driver = RecordingDriver(self.log)
+
+
+@pytest.fixture(scope="module")
+def site():
+    with FixtureSite(pages=4, per_page=3) as site:
+        yield site
+
+
+def run_parallel(site, workers, delay=0.0, global_delay=0.0):
+    log = []
+    scraper = type("Scraper", (RecordingScraper,), {"log": log})(
+        base_url=site.base_url, page_url_template=site.page_url_template, workers=workers,
+        delay=delay, jitter=0, global_delay=global_delay, extract_mode="source",
+        wait_timeout=0.05, ready_timeout=0.5
+    )
+    ads = list(scraper.stream_parallel())
+    assert {ad["url"] for ad in ads} == site.ad_urls()
+    return log
+
+
+def span(times):
+    times = sorted(times)
+    return times[-1] - times[0], len(times)
+
+
+def assert_paced(times, interval):
+    """Au plus un appel par intervalle
+
+    RateLimiter espace les créneaux; un thread réveillé en retard rapproche
+    son appel du suivant, mais ce retard ne se cumule pas: seule la durée
+    totale est garantie (à un intervalle près pour le premier appel).
+    """
+    elapsed, count = span(times)
+    assert count > 2
+    assert elapsed >= (count - 2) * interval
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(DELAY)
+    times = []
+    for _ in range(5):
+        limiter.wait()
+        times.append(time.monotonic())
+    assert_paced(times, DELAY)
+
+
+def test_rate_limiter_is_shared_between_threads():
+    limiter = RateLimiter(DELAY)
+    times = []
+
+    def worker():
+        for _ in range(3):
+            limiter.wait()
+            times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(times) == 9
+    assert_paced(times, DELAY)
+
+
+def test_rate_limiter_disabled():
+    limiter = RateLimiter(0)
+    start = time.perf_counter()
+    assert all(limiter.wait() == 0.0 for _ in range(100))
+    assert time.perf_counter() - start < 0.1
+
+
+def test_each_worker_has_its_own_rate_limit(site):
+    log = run_parallel(site, workers=2, delay=DELAY)
+    drivers = {driver for driver, _ in log}
+    assert len(drivers) == 2
+
+    # Chaque worker respecte l'intervalle...
+    for driver in drivers:
+        assert_paced([t for d, t in log if d == driver], DELAY)
+    # ...mais les workers ne s'attendent pas entre eux: deux fois plus de
+    # pages dans à peu près la même durée
+    elapsed, count = span(t for _, t in log)
+    assert elapsed < (count - 1) * DELAY * 0.75
+
+
+def test_global_delay_is_shared_by_workers(site):
+    log = run_parallel(site, workers=2, global_delay=DELAY)
+    assert len({driver for driver, _ in log}) == 2
+    assert_paced([t for _, t in log], DELAY)
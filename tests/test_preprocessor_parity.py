@@ -0,0 +1,101 @@
+"""
+Parité entre le nettoyage ligne à ligne (clean_price, clean_surface) et
+les versions vectorisées (clean_price_series, clean_surface_series)
+"""
+
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.preprocessor import DataPreprocessor
+
+PRICES = [
+    "1 200 000 DH", "1200000 DH", "850000DH", "Prix: 2 500 000 DH à négocier",
+    "1\u00a0200\u00a0000 DH", "1\u202f200\u202f000 DH", "1\t200 000 DH", "1 200\n000 EUR",
+    "150 000 EUR", "99000EUR", "DH", "EUR", "Prix sur demande", "",
+    "1.5e6", "  42  ", "12,5", "١٢٠٠٠٠٠ DH", "١٢٠٠٠٠٠",
+    None, np.nan, pd.NA, 1200000, 850000.5, 0, -3.0, True, False,
+]
+
+SURFACES = [
+    "120 m²", "120m2", "1 250 m²", "1\u00a0250 m²", "1\u202f250 m²", "Surface: 85,5 m²", "m²", "", "  ",
+    "١٢٠ m²", "۱۲۰ m²", "१२० m²", "12345678901234567890 m²",
+    None, np.nan, pd.NA, 120, 85.5, 0, True, False,
+]
+
+
+def same_value(expected, actual):
+    if pd.isna(expected) or pd.isna(actual):
+        return pd.isna(expected) and pd.isna(actual)
+    if isinstance(expected, int):
+        return int(actual) == expected
+    return math.isclose(float(expected), float(actual), rel_tol=1e-12)
+
+
+def assert_parity(series, scalar, vectorized):
+    expected = series.apply(scalar)
+    actual = vectorized(series)
+    assert len(actual) == len(series)
+    assert actual.index.equals(series.index)
+    mismatches = [
+        (value, e, a) for value, e, a in zip(series, expected, actual) if not same_value(e, a)
+    ]
+    assert not mismatches
+
+
+@pytest.fixture
+def preprocessor():
+    return DataPreprocessor()
+
+
+@pytest.mark.parametrize("value", PRICES, ids=repr)
+def test_clean_price_series_matches_scalar(preprocessor, value):
+    series = pd.Series([value], dtype=object)
+    assert_parity(series, preprocessor.clean_price, preprocessor.clean_price_series)
+
+
+@pytest.mark.parametrize("value", SURFACES, ids=repr)
+def test_clean_surface_series_matches_scalar(preprocessor, value):
+    series = pd.Series([value], dtype=object)
+    assert_parity(series, preprocessor.clean_surface, preprocessor.clean_surface_series)
+
+
+def test_clean_price_series_mixed_column(preprocessor):
+    # Valeurs répétées (factorize) et index non contigu
+    series = pd.Series(PRICES * 3, index=range(100, 100 + 3 * len(PRICES)), dtype=object)
+    assert_parity(series, preprocessor.clean_price, preprocessor.clean_price_series)
+
+
+def test_clean_surface_series_mixed_column(preprocessor):
+    series = pd.Series(SURFACES * 3, index=range(100, 100 + 3 * len(SURFACES)), dtype=object)
+    assert_parity(series, preprocessor.clean_surface, preprocessor.clean_surface_series)
+
+
+@pytest.mark.parametrize("series", [
+    pd.Series([1200000, 850000, 0]),
+    pd.Series([1.5e6, np.nan, -2.0]),
+    pd.Series([True, False, True]),
+    pd.Series(["1 200 000 DH", None, "150 000 EUR"], dtype="string"),
+    pd.Series([np.nan, np.nan]),
+    pd.Series([], dtype=object),
+], ids=["int", "float", "bool", "string", "all-nan", "empty"])
+def test_clean_price_series_typed_columns(preprocessor, series):
+    assert_parity(series, preprocessor.clean_price, preprocessor.clean_price_series)
+
+
+@pytest.mark.parametrize("series", [
+    pd.Series([120, 85, 0]),
+    pd.Series([120.0, np.nan, 85.5]),
+    pd.Series([True, False]),
+    pd.Series(["120 m²", None, "85 m²"], dtype="string"),
+    pd.Series([np.nan, np.nan]),
+    pd.Series([], dtype=object),
+], ids=["int", "float", "bool", "string", "all-nan", "empty"])
+def test_clean_surface_series_typed_columns(preprocessor, series):
+    assert_parity(series, preprocessor.clean_surface, preprocessor.clean_surface_series)
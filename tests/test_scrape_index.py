@@ -0,0 +1,132 @@
+"""
+Scraping incrémental sur le site local (benchmarks/fixture_site.py): une
+annonce n'est indexée qu'une fois produite et écrite par les sinks
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_parallel import make_scraper
+from benchmarks.fake_sheets import FakeClient
+from benchmarks.fixture_site import FixtureSite
+from src.scrape_index import ScrapeIndex
+from src.sheets_handler import SheetsHandler
+from src.sinks import CsvSink, SheetsSink
+
+ENGINES = [("http", 1), ("selenium", 1), ("selenium", 2)]
+
+
+@pytest.fixture(scope="module")
+def site():
+    with FixtureSite(pages=3, per_page=10) as site:
+        yield site
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ScrapeIndex(tmp_path / "index.sqlite")
+    yield index
+    index.close()
+
+
+def scraper_for(engine, workers, site, index, max_ads):
+    scraper = make_scraper(engine, site, workers, delay=0)
+    scraper.index = index
+    scraper.max_ads = max_ads
+    # Une seule attente par annonce (les pages du site n'ont pas tous les champs)
+    scraper.extract_mode = "source"
+    return scraper
+
+
+def stream(scraper):
+    if hasattr(scraper, "stream_parallel"):
+        return scraper.stream_parallel()
+    return scraper.stream()
+
+
+def indexed_urls(index):
+    return {record["url"] for record in index.iter_records()}
+
+
+@pytest.mark.parametrize("engine,workers", ENGINES)
+def test_max_ads_stop_indexes_only_yielded_ads(site, index, engine, workers):
+    first = list(stream(scraper_for(engine, workers, site, index, max_ads=5)))
+    assert len(first) == 5
+    assert indexed_urls(index) == {ad["url"] for ad in first}
+
+    # Le run suivant reprend les annonces non produites au lieu de s'arrêter
+    second = list(stream(scraper_for(engine, workers, site, index, max_ads=5)))
+    assert len(second) == 5
+    assert not {ad["url"] for ad in first} & {ad["url"] for ad in second}
+    assert len(index) == 10
+
+
+@pytest.mark.parametrize("engine,workers", ENGINES)
+def test_full_run_then_nothing_new(site, index, engine, workers):
+    ads = list(stream(scraper_for(engine, workers, site, index, max_ads=1000)))
+    assert {ad["url"] for ad in ads} == site.ad_urls()
+    assert indexed_urls(index) == site.ad_urls()
+    assert index.load_checkpoint(site.base_url) == 0
+
+    assert list(stream(scraper_for(engine, workers, site, index, max_ads=1000))) == []
+
+
+def test_abandoned_consumer_leaves_last_ad_unindexed(site, index):
+    ads = stream(scraper_for("http", 1, site, index, max_ads=1000))
+    taken = [next(ads) for _ in range(3)]
+    ads.close()
+    # La troisième annonce n'a pas été reprise par le consommateur
+    assert indexed_urls(index) == {ad["url"] for ad in taken[:2]}
+
+
+@pytest.mark.parametrize("engine,workers", ENGINES)
+def test_scrape_into_indexes_after_sink_flush(site, index, tmp_path, engine, workers):
+    scraper = scraper_for(engine, workers, site, index, max_ads=1000)
+    flushed = []
+
+    class RecordingSink(CsvSink):
+        def write_chunk(self, df):
+            # Aucune annonce du bloc n'est indexée avant son écriture
+            assert not indexed_urls(index) & set(df["url"])
+            super().write_chunk(df)
+            flushed.extend(df["url"])
+
+    count = scraper.scrape_into([RecordingSink(tmp_path / "ads.csv", chunk_size=7)])
+    assert count == len(site.ad_urls())
+    assert indexed_urls(index) == set(flushed) == site.ad_urls()
+    assert index.load_checkpoint(site.base_url) == 0
+
+
+def test_failed_sink_close_keeps_buffered_ads_unindexed(site, index, tmp_path):
+    scraper = scraper_for("http", 1, site, index, max_ads=1000)
+
+    class FailingSink(CsvSink):
+        def close(self):
+            raise OSError("disque plein")
+
+    scraper.scrape_into([FailingSink(tmp_path / "ads.csv", chunk_size=7)])
+    # 30 annonces, blocs de 7: les 2 dernières sont restées en tampon
+    assert len(index) == 28
+    # Point de reprise: dernière page dont toutes les annonces sont écrites
+    assert index.load_checkpoint(site.base_url) == 2
+
+
+def test_sheets_catalogue_receives_only_the_run_ads(site, index, tmp_path):
+    handler = SheetsHandler(gc=FakeClient(), cache_dir=tmp_path / "cache")
+    worksheet = "Scraped Properties"
+
+    for run in range(3):
+        handler.sh.cells_sent = 0
+        scraper = scraper_for("http", 1, site, index, max_ads=12)
+        count = scraper.scrape_into([SheetsSink(handler, worksheet, chunk_size=5, key="url")])
+        values = handler.sh.sheets[worksheet].values()
+        header = values[0]
+        # Catalogue de tous les runs; seules les annonces du run envoyées
+        assert len(values) - 1 == len(index) == min(12 * (run + 1), 30)
+        assert handler.sh.cells_sent == count * len(header) + (len(header) if run == 0 else 0)
+    urls = {row[header.index("url")] for row in values[1:]}
+    assert urls == site.ad_urls()
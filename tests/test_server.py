@@ -0,0 +1,55 @@
+"""
+Routes du serveur de prédiction (src.server) avec un service factice
+"""
+
+import json
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.server import PredictionRequestHandler
+
+
+class FakeService:
+    ready = True
+
+    def predict_records(self, records):
+        return [{"prix_predit_ensemble": 1_000_000.0} for _ in records]
+
+
+@pytest.fixture(scope="module")
+def url():
+    handler_class = type("TestHandler", (PredictionRequestHandler,), {"service": FakeService()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body):
+    return requests.post(url, data=body, headers={"Content-Type": "application/json"}, timeout=5)
+
+
+def test_predict_records(url):
+    response = post(f"{url}/predict", json.dumps({"records": [{"titre": "a"}, {"titre": "b"}]}))
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+
+
+@pytest.mark.parametrize("body", [b"{not json", b'{"records": [', b"\xff\xfe"], ids=["syntax", "truncated", "encoding"])
+def test_malformed_json_is_a_client_error(url, body):
+    response = post(f"{url}/predict", body)
+    assert response.status_code == 400
+    assert "JSON" in response.json()["error"]
+
+
+def test_predict_requires_a_list(url):
+    assert post(f"{url}/predict", json.dumps({"records": "a"})).status_code == 400
+    assert post(f"{url}/predict/sheets", json.dumps([1, 2])).status_code == 400
@@ -0,0 +1,131 @@
+"""
+SheetsHandler sur le faux backend gspread en mémoire (benchmarks/fake_sheets.py)
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_sheets import FakeClient
+from src.sheets_handler import SheetsHandler, sheet_values
+
+WORKSHEET = "Scraped Properties"
+
+
+def make_ads(ids):
+    return pd.DataFrame({
+        "url": [f"https://example.com/annonce/{i}" for i in ids],
+        "titre": [f"Appartement {i}" for i in ids],
+        "prix": [f"{(i + 5) * 100} 000 DH" for i in ids],
+    })
+
+
+@pytest.fixture
+def handler(tmp_path):
+    return SheetsHandler(gc=FakeClient(), cache_dir=tmp_path / "cache")
+
+
+def sheet_rows(handler, worksheet=WORKSHEET):
+    values = handler.sh.sheets[worksheet].values()
+    return values[0], sorted(tuple(row) for row in values[1:] if any(row))
+
+
+def expected_rows(df):
+    header, rows = sheet_values(df)
+    return header, sorted(tuple(row) for row in rows)
+
+
+def test_insertion_only_sends_new_row(handler):
+    df = make_ads(range(100))
+    assert handler.write_incremental(df, WORKSHEET) == 100
+
+    # Nouvelle annonce en tête: les autres ne sont pas décalées ni réécrites
+    grown = pd.concat([make_ads([1000]), df], ignore_index=True)
+    handler.sh.cells_sent = 0
+    assert handler.write_incremental(grown, WORKSHEET) == 1
+    assert handler.sh.cells_sent == len(grown.columns)
+    assert sheet_rows(handler) == expected_rows(grown)
+
+
+def test_removed_rows_are_cleared_and_reused(handler):
+    df = make_ads(range(20))
+    handler.write_incremental(df, WORKSHEET)
+
+    shrunk = df.drop(index=[0, 5]).reset_index(drop=True)
+    assert handler.write_incremental(shrunk, WORKSHEET) == 0
+    assert sheet_rows(handler) == expected_rows(shrunk)
+
+    # Les lignes libérées sont réutilisées avant d'agrandir l'onglet
+    grown = pd.concat([shrunk, make_ads([100, 101, 102])], ignore_index=True)
+    assert handler.write_incremental(grown, WORKSHEET) == 3
+    assert sheet_rows(handler) == expected_rows(grown)
+    assert len(handler.sh.sheets[WORKSHEET].values()) == 22
+
+
+def test_reordered_rows_with_one_change(handler):
+    df = make_ads(range(50))
+    handler.write_incremental(df, WORKSHEET)
+
+    reordered = df.iloc[::-1].reset_index(drop=True)
+    reordered.loc[10, "prix"] = "1 DH"
+    assert handler.write_incremental(reordered, WORKSHEET) == 1
+    assert sheet_rows(handler) == expected_rows(reordered)
+
+
+def test_upsert_keeps_other_rows(handler):
+    df = make_ads(range(10))
+    handler.write_incremental(df, WORKSHEET)
+
+    run = make_ads([3, 10, 11])
+    run.loc[0, "prix"] = "1 DH"
+    assert handler.write_incremental(run, WORKSHEET, upsert=True) == 3
+    catalogue = pd.concat([df[df["url"] != run.loc[0, "url"]], run], ignore_index=True)
+    assert sheet_rows(handler) == expected_rows(catalogue)
+
+
+def test_upsert_without_state_merges_sheet_content(tmp_path):
+    gc = FakeClient()
+    SheetsHandler(gc=gc, cache_dir=tmp_path / "a").write_incremental(make_ads(range(10)), WORKSHEET)
+
+    # Autre machine, sans état local: le contenu de l'onglet est conservé
+    handler = SheetsHandler(gc=gc, cache_dir=tmp_path / "b")
+    handler.write_incremental(make_ads([10, 11]), WORKSHEET, upsert=True)
+    assert sheet_rows(handler) == expected_rows(make_ads(range(12)))
+
+
+def test_without_key_column_rows_are_positional(handler):
+    df = make_ads(range(10)).drop(columns="url")
+    handler.write_incremental(df, WORKSHEET)
+    df.loc[4, "prix"] = "1 DH"
+    assert handler.write_incremental(df, WORKSHEET) == 1
+    assert handler.sh.sheets[WORKSHEET].values() == [list(df.columns)] + sheet_values(df)[1]
+
+
+def test_upsert_requires_key_column(handler):
+    with pytest.raises(ValueError):
+        handler.write_incremental(make_ads(range(3)).drop(columns="url"), WORKSHEET, upsert=True)
+
+
+def test_iter_input_reads_sparse_sheet_in_bounded_windows(handler, monkeypatch):
+    from gspread.utils import a1_to_rowcol
+
+    df = make_ads(range(4))
+    handler.write_incremental(df, "Feuille 1")
+    worksheet = handler.sh.sheets["Feuille 1"]
+    # Lignes vides puis d'autres données bien plus bas
+    worksheet.resize(rows=4010)
+    worksheet.write(4001, 1, sheet_values(make_ads([10, 11, 12]))[1])
+
+    ranges = []
+    get = worksheet.get
+    monkeypatch.setattr(worksheet, "get", lambda range_name: ranges.append(range_name) or get(range_name))
+
+    chunks = list(handler.iter_input("Feuille 1", chunk_rows=1000))
+    assert sum(len(chunk) for chunk in chunks) == 7
+    for range_name in ranges:
+        start, _, end = range_name.partition(":")
+        assert a1_to_rowcol(end)[0] - a1_to_rowcol(start)[0] + 1 <= 1000
@@ -0,0 +1,56 @@
+"""
+Jeu Parquet partitionné (src.storage): réécriture des partitions prétraitées
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("pyarrow")
+
+from benchmarks.synthetic import generate_ads
+from src.preprocessor import DataPreprocessor
+from src.storage import read_dataset, write_dataset
+
+
+@pytest.fixture
+def raw(tmp_path):
+    root = tmp_path / "raw"
+    write_dataset(generate_ads(300, seed=1), root, scrape_date="2026-10-16")
+    write_dataset(generate_ads(200, seed=2), root, scrape_date="2026-10-17")
+    return root
+
+
+def test_preprocess_dataset_twice_does_not_duplicate(raw, tmp_path):
+    target = tmp_path / "processed"
+    # Petits blocs: plusieurs écritures par partition dans un même run
+    assert DataPreprocessor().preprocess_dataset(raw, target, batch_rows=64) == 500
+    first = read_dataset(target)
+    assert DataPreprocessor().preprocess_dataset(raw, target, batch_rows=64) == 500
+    second = read_dataset(target)
+
+    assert len(second) == len(first) == 500
+    key = list(first.columns)
+    pd.testing.assert_frame_equal(
+        first.sort_values(key, ignore_index=True), second.sort_values(key, ignore_index=True)
+    )
+
+
+def test_preprocess_dataset_keeps_other_partitions(raw, tmp_path):
+    target = tmp_path / "processed"
+    DataPreprocessor().preprocess_dataset(raw, target)
+    DataPreprocessor().preprocess_dataset(raw, target, filters=[("scrape_date", "=", "2026-10-17")])
+
+    counts = read_dataset(target, columns=["scrape_date"])["scrape_date"].value_counts()
+    assert counts.to_dict() == {"2026-10-16": 300, "2026-10-17": 200}
+
+
+def test_write_dataset_appends_by_default(tmp_path):
+    df = generate_ads(50)
+    write_dataset(df, tmp_path / "raw", scrape_date="2026-10-17")
+    write_dataset(df, tmp_path / "raw", scrape_date="2026-10-17")
+    assert len(read_dataset(tmp_path / "raw")) == 100
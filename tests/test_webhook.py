@@ -0,0 +1,101 @@
+"""
+Envoi au webhook en arrière-plan (src.webhook) contre le faux webhook local
+de benchmarks/bench_webhook.py: lots, reprises, spool et fermeture bornée
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_webhook import StubWebhook, make_ads
+from src.webhook import WebhookDelivery
+
+
+@pytest.fixture
+def stub():
+    stub = StubWebhook()
+    yield stub
+    stub.close()
+
+
+def delivery(stub, spool_dir, **options):
+    options = {"batch_size": 10, "flush_interval": 0.05, "retries": 2, "backoff": 0.01,
+               "timeout": 2, "probe_interval": 0.05, **options}
+    return WebhookDelivery(stub.url, spool_dir=spool_dir, **options)
+
+
+def spooled_files(spool_dir):
+    return sorted(Path(spool_dir).glob("*.jsonl")) if Path(spool_dir).exists() else []
+
+
+def test_records_are_sent_in_batches(stub, tmp_path):
+    webhook = delivery(stub, tmp_path / "spool").start()
+    for ad in make_ads(95):
+        webhook.submit(ad)
+    webhook.close()
+    assert stub.received == 95
+    assert webhook.metrics["batches_sent"] == 10
+    assert not spooled_files(tmp_path / "spool")
+
+
+def test_outage_is_retried_then_spooled_and_replayed(stub, tmp_path):
+    stub.down = True
+    webhook = delivery(stub, tmp_path / "spool").start()
+    for ad in make_ads(50):
+        webhook.submit(ad)
+    webhook.close()
+
+    assert stub.received == 0
+    assert webhook.metrics["spooled"] == 50
+    # Reprises sur le premier lot seulement: les suivants vont directement au spool
+    assert webhook.metrics["retries"] >= 2
+    assert webhook.metrics["short_circuited"] > 0
+    assert stub.requests < 50 // 10 * 3
+
+    # Webhook rétabli: le spool est renvoyé au démarrage suivant
+    stub.down = False
+    webhook = delivery(stub, tmp_path / "spool").start()
+    webhook.close()
+    assert stub.received == 50
+    assert webhook.metrics["replayed"] == 50
+    assert not spooled_files(tmp_path / "spool")
+
+
+def test_close_timeout_spools_stuck_batch(tmp_path):
+    stub = StubWebhook(latency=1.0)
+    try:
+        webhook = delivery(stub, tmp_path / "spool", batch_size=5, timeout=5).start()
+        for ad in make_ads(20):
+            webhook.submit(ad)
+        start = time.perf_counter()
+        webhook.close(timeout=0.2)
+        assert time.perf_counter() - start < 1.0
+        assert webhook.metrics["spooled"] >= 15
+        # Le lot en cours d'envoi finit envoyé ou dans le spool: rien n'est perdu
+        deadline = time.monotonic() + 3
+        while webhook.metrics["spooled"] + webhook.metrics["sent"] < 20 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert webhook.metrics["spooled"] + webhook.metrics["sent"] == 20
+    finally:
+        stub.close()
+
+
+def test_close_does_not_block_on_full_queue_with_dead_thread(stub, tmp_path):
+    webhook = delivery(stub, tmp_path / "spool", max_queue=5)
+    # Thread d'envoi déjà arrêté (ex: erreur inattendue)
+    webhook.thread = threading.Thread(target=lambda: None)
+    webhook.thread.start()
+    webhook.thread.join()
+    for ad in make_ads(8):
+        webhook.submit(ad)
+
+    start = time.perf_counter()
+    webhook.close(timeout=0.3)
+    assert time.perf_counter() - start < 1.0
+    assert webhook.metrics["spooled"] == 8
+    assert sum(len(path.read_text().splitlines()) for path in spooled_files(tmp_path / "spool")) == 8